@@ -0,0 +1,169 @@
+import asyncio
+import time
+import traceback
+from metronome import Metronome, SCHEDULE_ABSOLUTE
+
+
+class LoopScheduler:
+    """
+    Runs metronome click generators on an asyncio event loop.
+
+    Same interface as the threaded Scheduler, but every click is a
+    loop.call_at timer on the generator's absolute deadline, so one event
+    loop can host any number of metronomes without extra threads.
+    """
+
+    def __init__(self):
+        """Initialize a scheduler for the running loop of the first task."""
+        self._handles = {}  # key -> TimerHandle of the task's next click
+
+    def __len__(self):
+        """int: Number of registered tasks."""
+        return len(self._handles)
+
+    def register(self, key, clicks):
+        """
+        Add a click generator (must be called on the event loop).
+
+        Args:
+            key (object): Identifies the task (usually its Metronome)
+            clicks (generator): Yields the deadline of each click in nanoseconds
+        """
+        deadline_ns = next(clicks, None)
+        if deadline_ns is not None:
+            self._schedule(key, clicks, deadline_ns)
+
+    def unregister(self, key):
+        """
+        Remove a task and cancel its pending click.
+
+        Args:
+            key (object): The key the task was registered with
+        """
+        handle = self._handles.pop(key, None)
+        if handle:
+            handle.cancel()
+
+    def _schedule(self, key, clicks, deadline_ns):
+        """
+        Set a loop timer for the next click of a task.
+
+        The deadline is on the monotonic clock; it is converted to the
+        loop's own clock so this works with any event loop implementation.
+        """
+        loop = asyncio.get_running_loop()
+        when = loop.time() + (deadline_ns - time.monotonic_ns()) / 1_000_000_000
+        self._handles[key] = loop.call_at(when, self._resume, key, clicks)
+
+    def _resume(self, key, clicks):
+        """Play a task's click and schedule its next one."""
+        try:
+            deadline_ns = next(clicks, None)
+        except Exception:
+            traceback.print_exc()
+            deadline_ns = None
+
+        if deadline_ns is None:
+            self._handles.pop(key, None)  # Task finished by itself
+        elif key in self._handles:
+            self._schedule(key, clicks, deadline_ns)
+
+
+class AsyncMetronome:
+    """
+    asyncio front end of the metronome.
+
+    Clicks are played by loop timers on the absolute grid, and beat and
+    subdivision events are read straight from the metronome's event
+    ring on the loop, without a thread hop:
+
+        metronome = AsyncMetronome(120)
+        await metronome.start()
+        async for event in metronome.beats():
+            print(event.beat, event.deadline_ns, event.time_ns)
+    """
+
+    def __init__(self, bpm, beats_per_measure=4, scheduler=None):
+        """
+        Initialize an async metronome.
+
+        Args:
+            bpm (int): Beats per minute
+            beats_per_measure (int, optional): Number of beats per measure, defaults to 4
+            scheduler (LoopScheduler, optional): Scheduler shared with other
+                metronomes on the same loop, a new one by default
+
+        Raises:
+            ValueError: If BPM is outside valid range
+        """
+        self.scheduler = scheduler if scheduler is not None else LoopScheduler()
+        self.metronome = Metronome(bpm, beats_per_measure=beats_per_measure,
+                                   scheduling=SCHEDULE_ABSOLUTE, scheduler=self.scheduler)
+        self._waiting = set()  # Wake-up events of running beats() iterators
+
+    @property
+    def is_running(self):
+        """bool: Whether the metronome is playing."""
+        return self.metronome.is_running
+
+    @property
+    def bpm(self):
+        """int: Current tempo."""
+        return self.metronome.bpm
+
+    async def start(self):
+        """Start playing on the running event loop."""
+        self.metronome.start()
+
+    async def stop(self):
+        """Stop playing and end every beats() iterator."""
+        self.metronome.stop()
+        for ready in self._waiting:
+            ready.set()
+
+    async def update_bpm(self, new_bpm):
+        """
+        Change the tempo at the next beat line.
+
+        Args:
+            new_bpm (int): New BPM value
+
+        Raises:
+            ValueError: If BPM is outside valid range
+        """
+        self.metronome.update_bpm(new_bpm)
+
+    async def set_rhythm_mode(self, mode):
+        """
+        Set the rhythm mode (any pattern defined in patterns.json).
+
+        Args:
+            mode (str): The rhythm mode to set
+
+        Returns:
+            str: The current rhythm mode after setting
+        """
+        return self.metronome.set_rhythm_mode(mode)
+
+    async def beats(self):
+        """
+        Iterate over clicks as they are played, until the metronome stops.
+
+        Yields:
+            BeatEvent: Beat and subdivision events with their scheduled
+                (deadline_ns) and actual (time_ns) monotonic times
+        """
+        ring = self.metronome.events
+        ready = asyncio.Event()
+        # Events are published by loop timers, so waking is a plain set()
+        reader = ring.subscribe(wake=ready.set)
+        self._waiting.add(ready)
+        try:
+            while self.is_running:
+                await ready.wait()
+                ready.clear()
+                for event in reader.poll():
+                    yield event
+        finally:
+            self._waiting.discard(ready)
+            ring.unsubscribe(reader)
@@ -0,0 +1,537 @@
+import functools
+import os
+import threading
+import wave
+import pygame
+import pygame.mixer
+from collections import namedtuple, OrderedDict
+from constants import RENDER_SAMPLE_RATE, SOUND_CACHE_BYTES, SOUND_FILE, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION
+
+# The three WAV files of a metronome's clicks: beat 1, the other beats
+# (and group accents), and subdivisions
+SoundSet = namedtuple("SoundSet", ["accent", "upbeat", "subdivision"])
+DEFAULT_SOUND_SET = SoundSet(SOUND_FILE, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION)
+
+#=======================================================
+# Audio Backends
+#=======================================================
+#
+# A backend is where the engine's clicks go. Every backend has the same
+# methods, so the engine does not care whether clicks reach a sound
+# card, a list or a WAV file:
+#
+#   open()                          -> bool, False if the device is missing
+#   load_sound(path)                -> sound handle
+#   release_sound(sound)            the handle is no longer needed
+#   channel(index)                  -> channel handle
+#   reserve_channels(count)         make sure `count` channels exist
+#   play(channel, sound, deadline_ns)
+#   stop_sound(sound)
+#   close()
+#
+# `streaming` tells whether the backend can queue rendered buffers on
+# the sound card, which the lookahead and loop scheduling modes need.
+
+
+class SoundCache:
+    """
+    Decoded sounds shared by every metronome of the process.
+
+    Entries are keyed by (path, modification time, mixer format), so an
+    edited file or a mixer reopened with another format decodes again.
+    Each entry counts the holders that acquired it and did not release
+    it yet. Entries nobody holds stay cached for the next metronome or
+    sound set, and the least recently used of them are dropped once the
+    cache holds more than max_bytes of samples. Held entries are never
+    dropped, so the cap can be exceeded by the sounds in use.
+    """
+
+    def __init__(self, max_bytes=SOUND_CACHE_BYTES):
+        """
+        Args:
+            max_bytes (int, optional): Samples kept, defaults to SOUND_CACHE_BYTES
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> [sound, size in bytes, holders], oldest first
+        self.keys = {}                # id(sound) -> key
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        """int: Number of cached sounds."""
+        return len(self.entries)
+
+    def acquire(self, path):
+        """
+        Get a sound decoded by the current mixer, decoding it on a miss.
+
+        Args:
+            path (str): WAV file of the sound
+
+        Returns:
+            pygame.mixer.Sound: The sound, to be given back with release()
+
+        Raises:
+            FileNotFoundError: If the file is missing
+        """
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns, pygame.mixer.get_init())
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                sound = pygame.mixer.Sound(path)
+                entry = [sound, len(sound.get_raw()), 0]
+                self.entries[key] = entry
+                self.keys[id(sound)] = key
+                self.bytes += entry[1]
+            self.entries.move_to_end(key)
+            entry[2] += 1
+            self._evict()
+            return entry[0]
+
+    def release(self, sound):
+        """
+        Give back a sound from acquire(). Sounds the cache no longer
+        knows (dropped by clear()) are ignored.
+
+        Args:
+            sound (pygame.mixer.Sound): The sound
+        """
+        with self.lock:
+            key = self.keys.get(id(sound))
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is sound and entry[2] > 0:
+                entry[2] -= 1
+                self._evict()
+
+    def _evict(self):
+        """
+        Drop unheld sounds, least recently used first, while over the cap.
+        Called with the lock held.
+        """
+        for key in list(self.entries):
+            if self.bytes <= self.max_bytes:
+                return
+            sound, size, holders = self.entries[key]
+            if holders == 0:
+                del self.entries[key]
+                del self.keys[id(sound)]
+                self.bytes -= size
+
+    def clear(self):
+        """Forget every sound (the mixer that decoded them is gone)."""
+        with self.lock:
+            self.entries.clear()
+            self.keys.clear()
+            self.bytes = 0
+
+
+class AudioSession:
+    """
+    The process-wide pygame mixer and the sounds decoded into it.
+
+    Opening the sound card and decoding the WAV files takes hundreds of
+    milliseconds, so the session does it once and keeps both: the mixer
+    stays open between metronomes, and the decoded sounds stay in a
+    SoundCache. Metronomes get lightweight PygameBackend handles onto
+    the session, so stopping one and starting the next (a new BPM in the
+    CLI) clicks right away.
+    """
+
+    def __init__(self, max_bytes=SOUND_CACHE_BYTES):
+        """
+        Args:
+            max_bytes (int, optional): Cap of the sound cache, defaults to SOUND_CACHE_BYTES
+        """
+        self.sounds = SoundCache(max_bytes)
+        self.is_open = False
+        self.lock = threading.Lock()
+
+    def open(self):
+        """
+        Initialize the mixer, unless it is open already.
+
+        Returns:
+            bool: False if no audio device was found
+        """
+        with self.lock:
+            if self.is_open and pygame.mixer.get_init():
+                return True
+            # Sounds belong to the mixer that decoded them
+            self.sounds.clear()
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                self.is_open = False
+                return False
+            self.is_open = True
+            return True
+
+    def acquire(self, path):
+        """
+        Args:
+            path (str): WAV file to load
+
+        Returns:
+            pygame.mixer.Sound: The sound, decoded unless it is cached
+        """
+        return self.sounds.acquire(path)
+
+    def release(self, sound):
+        """
+        Args:
+            sound (pygame.mixer.Sound): A sound from acquire() that is no longer needed
+        """
+        self.sounds.release(sound)
+
+    def close(self):
+        """Shut the mixer down and forget the decoded sounds."""
+        with self.lock:
+            if self.is_open:
+                pygame.mixer.quit()
+            self.sounds.clear()
+            self.is_open = False
+
+
+@functools.lru_cache(maxsize=None)
+def audio_session():
+    """
+    Returns:
+        AudioSession: The session shared by the whole process
+    """
+    return AudioSession()
+
+
+class PygameBackend:
+    """
+    Plays clicks on the sound card through pygame.mixer.
+
+    A handle onto the process-wide AudioSession: opening it opens the
+    mixer only the first time, and closing it leaves the mixer open.
+    Sounds come from the session's cache.
+    """
+
+    streaming = True
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session (AudioSession, optional): Mixer session, defaults to audio_session()
+        """
+        self.session = session if session is not None else audio_session()
+
+    def open(self):
+        """
+        Open the session's mixer if it is not open yet.
+
+        Returns:
+            bool: False if no audio device was found
+        """
+        return self.session.open()
+
+    def load_sound(self, path):
+        """
+        Args:
+            path (str): WAV file to load
+
+        Returns:
+            pygame.mixer.Sound: The sound, decoded once per session
+        """
+        return self.session.acquire(path)
+
+    def release_sound(self, sound):
+        """
+        Args:
+            sound (pygame.mixer.Sound): A sound from load_sound() that is no longer needed
+        """
+        self.session.release(sound)
+
+    def channel(self, index):
+        """
+        Args:
+            index (int): Channel number
+
+        Returns:
+            pygame.mixer.Channel: The mixer channel
+        """
+        return pygame.mixer.Channel(index)
+
+    def reserve_channels(self, count):
+        """
+        Args:
+            count (int): Number of channels needed
+        """
+        if pygame.mixer.get_num_channels() < count:
+            pygame.mixer.set_num_channels(count)
+
+    def mixer_format(self):
+        """
+        Returns:
+            tuple: (frequency, size, channels) of the open mixer, where size is
+                the sample size in bits (negative for signed samples)
+        """
+        return pygame.mixer.get_init()
+
+    def buffer_sound(self, data):
+        """
+        Args:
+            data (bytes): Raw samples in the mixer_format() of the mixer
+
+        Returns:
+            pygame.mixer.Sound: A sound playing the samples
+        """
+        return pygame.mixer.Sound(buffer=data)
+
+    def play(self, channel, sound, deadline_ns):
+        """
+        Play a sound now, cutting off the channel's previous sound.
+
+        Args:
+            channel (pygame.mixer.Channel): Channel to play on
+            sound (pygame.mixer.Sound): Sound to play
+            deadline_ns (int): Scheduled time of the click (the sound card plays it now)
+        """
+        channel.play(sound)
+
+    def stop_sound(self, sound):
+        """
+        Args:
+            sound (pygame.mixer.Sound): Sound to silence on every channel
+        """
+        sound.stop()
+
+    def close(self):
+        """Release the handle. The mixer stays open for the next metronome."""
+
+
+class NullBackend:
+    """
+    Plays nothing and records every click instead.
+
+    Useful on hosts without a sound card and for benchmarks, where the
+    onsets can be checked afterwards.
+    """
+
+    streaming = False
+
+    def __init__(self):
+        self.onsets = []  # (deadline_ns, channel, sound) of every click
+
+    def open(self):
+        """
+        Returns:
+            bool: Always True
+        """
+        return True
+
+    def load_sound(self, path):
+        """
+        Args:
+            path (str): WAV file of the sound
+
+        Returns:
+            str: The path, which stands for the sound in the recorded onsets
+        """
+        return path
+
+    def release_sound(self, sound):
+        """Nothing was loaded."""
+
+    def channel(self, index):
+        """
+        Args:
+            index (int): Channel number
+
+        Returns:
+            int: The channel number
+        """
+        return index
+
+    def reserve_channels(self, count):
+        """Channels are plain numbers, there is nothing to reserve."""
+
+    def mixer_format(self):
+        """
+        Returns:
+            tuple: (frequency, size, channels), 16-bit stereo at RENDER_SAMPLE_RATE
+        """
+        return RENDER_SAMPLE_RATE, -16, 2
+
+    def buffer_sound(self, data):
+        """
+        Args:
+            data (bytes): Raw samples in the mixer_format()
+
+        Returns:
+            bytes: The samples, which stand for the sound in the recorded onsets
+        """
+        return data
+
+    def play(self, channel, sound, deadline_ns):
+        """
+        Record a click.
+
+        Args:
+            channel (int): Channel number
+            sound (str): Path of the sound
+            deadline_ns (int): Scheduled time of the click
+        """
+        self.onsets.append((deadline_ns, channel, sound))
+
+    def stop_sound(self, sound):
+        """Nothing is playing."""
+
+    def close(self):
+        """Nothing to close."""
+
+
+class WavSinkBackend:
+    """
+    Writes the click stream to a 16-bit stereo WAV file as it is played.
+
+    Each click is placed at the sample of its scheduled deadline rather
+    than at the time it was played, so the file is sample-accurate even
+    when the engine runs late (or on a virtual clock, much faster than
+    real time). Time zero of the file is the first click.
+
+    Click deadlines never go backwards, so every sample before the
+    newest click is final and is written out right away. Only the tails
+    of the clicks still sounding are kept in memory. Overlapping clicks
+    are mixed, like in the offline renderer.
+    """
+
+    streaming = False
+
+    def __init__(self, path, rate=RENDER_SAMPLE_RATE):
+        """
+        Args:
+            path (str): Output WAV file
+            rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        """
+        self.path = path
+        self.rate = rate
+        self.wav = None
+        self.origin_ns = None  # Deadline of the first click
+        self.written = 0       # Frames already on disk
+        self.pending = None    # Click tails starting at frame `written`
+
+    def open(self):
+        """
+        Create the output file.
+
+        Returns:
+            bool: Always True
+        """
+        # Imported here so numpy is only needed for the WAV sink
+        import numpy as np
+
+        self.wav = wave.open(self.path, "wb")
+        self.wav.setnchannels(2)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(self.rate)
+        self.origin_ns = None
+        self.written = 0
+        self.pending = np.zeros((0, 2), dtype=np.float32)
+        return True
+
+    def load_sound(self, path):
+        """
+        Args:
+            path (str): WAV file to load
+
+        Returns:
+            numpy.ndarray: (frames, 2) float samples at the sink's rate
+        """
+        from render import decode_wav
+        return decode_wav(path, self.rate)
+
+    def release_sound(self, sound):
+        """Decoded samples are freed with their last reference."""
+
+    def channel(self, index):
+        """
+        Args:
+            index (int): Channel number
+
+        Returns:
+            int: The channel number (all channels are mixed into the file)
+        """
+        return index
+
+    def reserve_channels(self, count):
+        """All channels are mixed, there is nothing to reserve."""
+
+    def mixer_format(self):
+        """
+        Returns:
+            tuple: (frequency, size, channels), 16-bit stereo at the sink's rate
+        """
+        return self.rate, -16, 2
+
+    def buffer_sound(self, data):
+        """
+        Args:
+            data (bytes): Raw 16-bit stereo samples in the mixer_format()
+
+        Returns:
+            numpy.ndarray: (frames, 2) float samples, like load_sound()
+        """
+        import numpy as np
+        return np.frombuffer(data, dtype=np.int16).reshape(-1, 2).astype(np.float32) / 32768
+
+    def _flush(self, frames):
+        """
+        Write the next frames of the stream to disk.
+
+        Args:
+            frames (int): Number of frames that are final
+        """
+        import numpy as np
+        from render import to_pcm16
+
+        if frames <= 0:
+            return
+        if len(self.pending) < frames:
+            silence = np.zeros((frames - len(self.pending), 2), dtype=np.float32)
+            self.pending = np.concatenate([self.pending, silence])
+        self.wav.writeframes(to_pcm16(self.pending[:frames]))
+        self.pending = self.pending[frames:]
+        self.written += frames
+
+    def play(self, channel, sound, deadline_ns):
+        """
+        Mix a click into the stream at the sample of its deadline.
+
+        Args:
+            channel (int): Channel number (unused, all channels are mixed)
+            sound (numpy.ndarray): Samples of the click
+            deadline_ns (int): Scheduled time of the click
+        """
+        import numpy as np
+
+        if self.origin_ns is None:
+            self.origin_ns = deadline_ns
+        # Deadlines are rounded down to whole nanoseconds, so the exact
+        # onset lies within the nanosecond after them: take the frame at
+        # its end, which is the frame the offline renderer uses
+        frame = ((deadline_ns - self.origin_ns + 1) * self.rate - 1) // 1_000_000_000
+
+        # Everything before this click is final
+        self._flush(frame - self.written)
+
+        # Mix the click into the tails of the clicks still sounding
+        start = max(frame, self.written) - self.written
+        end = start + len(sound)
+        if len(self.pending) < end:
+            self.pending = np.concatenate([self.pending, np.zeros((end - len(self.pending), 2), dtype=np.float32)])
+        self.pending[start:end] += sound
+
+    def stop_sound(self, sound):
+        """Clicks already in the stream stay there."""
+
+    def close(self):
+        """Write the remaining tails and finish the file."""
+        if self.wav is None:
+            return
+        self._flush(len(self.pending))
+        self.wav.close()
+        self.wav = None
@@ -0,0 +1,446 @@
+# benchmark.py
+import os
+# Run headless: the dummy driver mixes nothing but keeps pygame's timing
+os.environ.setdefault('SDL_AUDIODRIVER', "dummy")
+# Suppress Pygame's welcome message
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import argparse
+import json
+import platform
+import threading
+import time
+import numpy as np
+import pygame.mixer
+
+from constants import CURRENT_LANG, MIN_BPM, MAX_BPM
+from metronome import Metronome, NORMAL_MODE, SCHEDULE_RELATIVE, SCHEDULE_ABSOLUTE, click_deadline_ns
+from patterns import PATTERNS
+from scheduler import Scheduler
+from timerfd import TimerfdScheduler, timerfd_available
+from clock import VirtualClock
+from audio import NullBackend, audio_session
+from isolated import IsolatedMetronome
+
+#-------------------------------------------------------
+# Benchmark modes
+#-------------------------------------------------------
+THREADS = "threads"      # One thread per metronome
+SCHEDULER = "scheduler"  # Every metronome on one shared Scheduler thread
+TIMERFD = "timerfd"      # Every metronome on one thread waiting on their timerfds (Linux)
+BENCHMARK_MODES = (THREADS, SCHEDULER, TIMERFD) if timerfd_available() else (THREADS, SCHEDULER)
+
+#-------------------------------------------------------
+# Engine placements of the isolation benchmark
+#-------------------------------------------------------
+IN_PROCESS = "in-process"  # Engine thread next to the UI, sharing its GIL
+ISOLATED = "isolated"      # Engine in a child process (IsolatedMetronome)
+ISOLATION_ENGINES = (IN_PROCESS, ISOLATED)
+
+#=======================================================
+# Measurement
+#=======================================================
+
+class LatenessRecorder:
+    """
+    on_beat callback measuring how late each beat fires.
+
+    The i-th beat of a metronome in normal mode is due at
+    click_deadline_ns(origin_ns, i, bpm, 1), so lateness is the callback
+    time minus that deadline.
+    """
+
+    def __init__(self, bpm, samples):
+        """
+        Args:
+            bpm (int): Tempo of the measured metronome
+            samples (list): Shared list the lateness values are appended to
+        """
+        self.bpm = bpm
+        self.samples = samples
+        self.metronome = None
+        self.beats = 0
+        self.recording = False
+
+    def __call__(self, beat_number):
+        now_ns = time.monotonic_ns()
+        if self.recording:
+            deadline_ns = click_deadline_ns(self.metronome.origin_ns, self.beats, self.bpm, 1)
+            self.samples.append(now_ns - deadline_ns)
+        self.beats += 1
+
+
+def run_benchmark(count, mode, bpm=120, seconds=5.0, warmup=1.0):
+    """
+    Run `count` metronomes at once and measure beat lateness and CPU use.
+
+    Args:
+        count (int): Number of concurrent metronomes
+        mode (str): THREADS, SCHEDULER or TIMERFD
+        bpm (int, optional): Tempo of every metronome, defaults to 120
+        seconds (float, optional): Length of the measured window, defaults to 5
+        warmup (float, optional): Time to settle before measuring, defaults to 1
+
+    Returns:
+        dict: Instances, threads, beats, lateness p50/p99/max in ms and CPU percent
+    """
+    if mode == SCHEDULER:
+        scheduler = Scheduler()
+    elif mode == TIMERFD:
+        scheduler = TimerfdScheduler()
+    else:
+        scheduler = None
+    lateness = []
+    recorders = []
+    metronomes = []
+    for _ in range(count):
+        recorder = LatenessRecorder(bpm, lateness)
+        metronome = Metronome(bpm, on_beat=recorder, scheduling=SCHEDULE_ABSOLUTE, scheduler=scheduler)
+        recorder.metronome = metronome
+        recorders.append(recorder)
+        metronomes.append(metronome)
+
+    for metronome in metronomes:
+        metronome.start()
+    time.sleep(warmup)
+
+    # Measured window
+    for recorder in recorders:
+        recorder.recording = True
+    threads = threading.active_count()
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    for recorder in recorders:
+        recorder.recording = False
+
+    # Stop every loop before closing the mixer they all share
+    for metronome in metronomes:
+        metronome.stop()
+    if scheduler is not None:
+        scheduler.shutdown()
+    audio_session().close()
+
+    late_ms = np.array(lateness, dtype=np.float64) / 1_000_000
+    return {
+        "instances": count,
+        "mode": mode,
+        "threads": threads,
+        "beats": len(late_ms),
+        "p50_ms": float(np.percentile(late_ms, 50)) if len(late_ms) else 0.0,
+        "p99_ms": float(np.percentile(late_ms, 99)) if len(late_ms) else 0.0,
+        "max_ms": float(late_ms.max()) if len(late_ms) else 0.0,
+        "cpu_percent": 100 * cpu / wall,
+    }
+
+#=======================================================
+# Timing Sweep
+#=======================================================
+
+SWEEP_BPMS = (MIN_BPM, 60, 120, 240, MAX_BPM)
+SWEEP_METERS = tuple(range(1, 13))
+SWEEP_SCHEDULING = (SCHEDULE_RELATIVE, SCHEDULE_ABSOLUTE)
+
+
+def context_switches(thread_id):
+    """
+    Count how often a thread was switched out, read from /proc (Linux only).
+    
+    Every wake-up from a sleep ends a voluntary switch, so the difference
+    between two readings is the number of wake-ups in between.
+    
+    Args:
+        thread_id (int): Native id of the thread
+        
+    Returns:
+        int: Voluntary plus involuntary context switches, or None if unknown
+    """
+    try:
+        with open(f"/proc/self/task/{thread_id}/status") as status:
+            return sum(int(line.split()[1]) for line in status if "ctxt_switches" in line)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def sweep_cases(bpms=SWEEP_BPMS, modes=None, meters=SWEEP_METERS, full=False):
+    """
+    List the (bpm, mode, meter) cases of a timing sweep.
+    
+    By default every tempo is paired with every rhythm mode in 4/4, and
+    every meter is played once at 120 BPM in normal mode, since the meter
+    only changes which sound is played. With full, every combination is run.
+    
+    Args:
+        bpms (tuple, optional): Tempos to sweep, defaults to SWEEP_BPMS
+        modes (tuple, optional): Rhythm modes, defaults to all of patterns.json
+        meters (tuple, optional): Beats per measure, defaults to 1-12
+        full (bool, optional): Run the full cross product, defaults to False
+        
+    Returns:
+        list: (bpm, mode, meter) tuples in run order
+    """
+    modes = tuple(modes or PATTERNS)
+    if full:
+        return [(bpm, mode, meter) for bpm in bpms for mode in modes for meter in meters]
+    cases = [(bpm, mode, 4) for bpm in bpms for mode in modes]
+    cases += [(120, NORMAL_MODE, meter) for meter in meters if (120, NORMAL_MODE, meter) not in cases]
+    return cases
+
+
+def run_timing_case(bpm, mode, meter, scheduling=SCHEDULE_RELATIVE, seconds=2.0):
+    """
+    Play one metronome on its own thread and measure its click timing.
+    
+    Args:
+        bpm (int): Beats per minute
+        mode (str): Rhythm mode
+        meter (int): Beats per measure
+        scheduling (str, optional): SCHEDULE_RELATIVE or SCHEDULE_ABSOLUTE
+        seconds (float, optional): Length of the run, defaults to 2
+        
+    Returns:
+        dict: The case, the clicks played, jitter p50/p99/max in ms, drift
+            extrapolated to ms per hour, process CPU time per click in
+            microseconds (the mixer thread included), wake-ups per second
+            of the beat thread (None without /proc), late clicks, and the
+            p99 overshoot of the precision waits and time spent spinning
+    """
+    metronome = Metronome(bpm, beats_per_measure=meter, scheduling=scheduling)
+    if mode != NORMAL_MODE:
+        metronome.set_rhythm_mode(mode)
+    
+    cpu_started = time.process_time()
+    metronome.start()
+    switches_started = context_switches(metronome.beat_thread.native_id)
+    time.sleep(seconds)
+    switches = context_switches(metronome.beat_thread.native_id)
+    cpu = time.process_time() - cpu_started
+    summary = metronome.timing_summary()
+    waits = metronome.clock.wait_summary()
+    metronome.stop()
+    
+    clicks = summary.clicks if summary else 0
+    wakeups = None
+    if switches is not None and switches_started is not None:
+        wakeups = round((switches - switches_started) / seconds, 1)
+    return {
+        "bpm": bpm,
+        "mode": mode,
+        "meter": meter,
+        "scheduling": scheduling,
+        "seconds": seconds,
+        "clicks": clicks,
+        "p50_ms": summary.p50_ms if summary else 0.0,
+        "p99_ms": summary.p99_ms if summary else 0.0,
+        "max_ms": summary.max_ms if summary else 0.0,
+        "drift_ms_per_hour": metronome.timing.drift_per_hour_ms(),
+        "cpu_us_per_click": cpu * 1_000_000 / clicks if clicks else 0.0,
+        "wakeups_per_second": wakeups,
+        "late": summary.late if summary else 0,
+        "wait_p99_us": waits.p99_us if waits else None,
+        "spin_ms": waits.spin_ms if waits else None,
+    }
+
+
+def run_timing_sweep(cases, schedulings=SWEEP_SCHEDULING, seconds=2.0, report=None):
+    """
+    Run a timing sweep, one case after the other.
+    
+    Args:
+        cases (list): (bpm, mode, meter) tuples, see sweep_cases()
+        schedulings (tuple, optional): Engines to compare, defaults to relative and absolute
+        seconds (float, optional): Length of each run, defaults to 2
+        report (function, optional): Called with each result as it comes in
+        
+    Returns:
+        dict: Environment description and the list of results, ready for JSON
+    """
+    results = []
+    for scheduling in schedulings:
+        for bpm, mode, meter in cases:
+            result = run_timing_case(bpm, mode, meter, scheduling, seconds)
+            results.append(result)
+            if report:
+                report(result)
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "audio_driver": os.environ.get('SDL_AUDIODRIVER'),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+def simulate_session(bpm, hours, scheduling=SCHEDULE_RELATIVE, wake_latency_us=100.0):
+    """
+    Simulate a long session on a virtual clock in a fraction of its length.
+    
+    Every sleep wakes wake_latency_us late, like a real sleep primitive,
+    so the result shows how much each engine drifts over the session.
+    
+    Args:
+        bpm (int): Beats per minute
+        hours (float): Simulated session length
+        scheduling (str, optional): SCHEDULE_RELATIVE or SCHEDULE_ABSOLUTE
+        wake_latency_us (float, optional): Lateness of every wake-up, defaults to 100
+        
+    Returns:
+        dict: The case, the clicks played, the drift at the end of the
+            session in ms and the real seconds the simulation took
+    """
+    clock = VirtualClock(wake_latency_ns=int(wake_latency_us * 1000))
+    # Simulated time has no sound card to keep up with
+    metronome = Metronome(bpm, scheduling=scheduling, clock=clock, audio=NullBackend())
+    started = time.perf_counter()
+    metronome.start()
+    clock.run_until(int(hours * 3600 * 1_000_000_000))
+    summary = metronome.timing_summary()
+    metronome.stop()
+    return {
+        "bpm": bpm,
+        "hours": hours,
+        "scheduling": scheduling,
+        "wake_latency_us": wake_latency_us,
+        "clicks": summary.clicks,
+        "drift_ms": summary.drift_ms,
+        "real_seconds": time.perf_counter() - started,
+    }
+
+def run_isolation_case(engine, bpm=120, seconds=5.0, load_threads=2, on_beat_ms=5.0):
+    """
+    Measure click timing while this process behaves like a busy UI.
+    
+    The load threads run pure Python work that holds the GIL, like heavy
+    redraws, and on_beat spins for on_beat_ms, like a slow callback.
+    In-process, both compete with the beat thread; an isolated engine
+    only runs on_beat on the relay thread of this process.
+    
+    Args:
+        engine (str): IN_PROCESS or ISOLATED
+        bpm (int, optional): Beats per minute, defaults to 120
+        seconds (float, optional): Length of the run, defaults to 5
+        load_threads (int, optional): Busy UI threads, defaults to 2
+        on_beat_ms (float, optional): Time spent in on_beat, defaults to 5
+        
+    Returns:
+        dict: The case, the engine's scheduling priority, the clicks
+            played, jitter p50/p99/max in ms and late clicks
+    """
+    def slow_on_beat(beat_number):
+        until = time.perf_counter() + on_beat_ms / 1000
+        while time.perf_counter() < until:
+            pass
+    
+    stop_load = threading.Event()
+    def ui_load():
+        while not stop_load.is_set():
+            sum(i * i for i in range(10_000))
+    
+    placement = IsolatedMetronome if engine == ISOLATED else Metronome
+    metronome = placement(bpm, on_beat=slow_on_beat, scheduling=SCHEDULE_ABSOLUTE)
+    loads = [threading.Thread(target=ui_load, daemon=True) for _ in range(load_threads)]
+    for thread in loads:
+        thread.start()
+    
+    metronome.start()
+    time.sleep(seconds)
+    summary = metronome.timing_summary()
+    priority = metronome.priority if engine == ISOLATED else "normal"
+    metronome.stop()
+    stop_load.set()
+    for thread in loads:
+        thread.join()
+    
+    return {
+        "engine": engine,
+        "bpm": bpm,
+        "seconds": seconds,
+        "load_threads": load_threads,
+        "on_beat_ms": on_beat_ms,
+        "priority": priority,
+        "clicks": summary.clicks if summary else 0,
+        "p50_ms": summary.p50_ms if summary else 0.0,
+        "p99_ms": summary.p99_ms if summary else 0.0,
+        "max_ms": summary.max_ms if summary else 0.0,
+        "late": summary.late if summary else 0,
+    }
+
+#=======================================================
+# Main Program Function
+#=======================================================
+
+def run_benchmarks():
+    """
+    Compare thread-per-metronome and shared-scheduler playback, run a
+    timing sweep over tempos, rhythm modes and meters (--sweep),
+    simulate the drift of a long session (--simulate), or compare an
+    in-process engine with an isolated one under UI load (--isolation).
+    This is the main function of the benchmark command-line tool.
+    """
+    parser = argparse.ArgumentParser(description="Measure beat lateness and CPU with many metronomes.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="numbers of concurrent metronomes (default: 1 10 100 1000)")
+    parser.add_argument("--modes", nargs="+", default=list(BENCHMARK_MODES), choices=BENCHMARK_MODES,
+                        help="playback modes to compare (default: all available)")
+    parser.add_argument("--bpm", type=int, default=120, help="tempo of every metronome (default: 120)")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="measured seconds per run (default: 5, or 2 with --sweep)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="sweep tempos, rhythm modes and meters on a single metronome")
+    parser.add_argument("--bpms", type=int, nargs="+", default=list(SWEEP_BPMS),
+                        help="tempos of the sweep (default: %(default)s)")
+    parser.add_argument("--rhythm-modes", nargs="+", default=list(PATTERNS), choices=list(PATTERNS),
+                        help="rhythm modes of the sweep (default: all)")
+    parser.add_argument("--meters", type=int, nargs="+", default=list(SWEEP_METERS),
+                        help="beats per measure of the sweep (default: 1-12)")
+    parser.add_argument("--scheduling", nargs="+", default=list(SWEEP_SCHEDULING), choices=SWEEP_SCHEDULING,
+                        help="engines of the sweep (default: both)")
+    parser.add_argument("--full", action="store_true", help="sweep every combination of the above")
+    parser.add_argument("--output", default="timing_benchmark.json",
+                        help="JSON file for the sweep results (default: %(default)s)")
+    parser.add_argument("--simulate", type=float, metavar="HOURS",
+                        help="simulate a session of this many hours on a virtual clock")
+    parser.add_argument("--wake-latency-us", type=float, default=100.0,
+                        help="simulated lateness of every wake-up (default: %(default)s)")
+    parser.add_argument("--isolation", action="store_true",
+                        help="compare an in-process and an isolated engine under synthetic UI load")
+    parser.add_argument("--load-threads", type=int, default=2,
+                        help="busy UI threads of the isolation benchmark (default: %(default)s)")
+    parser.add_argument("--on-beat-ms", type=float, default=5.0,
+                        help="time spent in on_beat in the isolation benchmark (default: %(default)s)")
+    args = parser.parse_args()
+    
+    if args.isolation:
+        print(CURRENT_LANG["ISOLATION_HEADER"])
+        for engine in ISOLATION_ENGINES:
+            result = run_isolation_case(engine, args.bpm, args.seconds or 5.0, args.load_threads, args.on_beat_ms)
+            print(CURRENT_LANG["ISOLATION_ROW"].format(**result))
+        return
+    
+    if args.simulate:
+        for scheduling in args.scheduling:
+            result = simulate_session(args.bpm, args.simulate, scheduling, args.wake_latency_us)
+            print(CURRENT_LANG["SIMULATION_ROW"].format(**result))
+        return
+    
+    if args.sweep:
+        cases = sweep_cases(args.bpms, args.rhythm_modes, args.meters, args.full)
+        print(CURRENT_LANG["SWEEP_HEADER"])
+        report = lambda result: print(CURRENT_LANG["SWEEP_ROW"].format(**result))
+        sweep = run_timing_sweep(cases, args.scheduling, args.seconds or 2.0, report)
+        with open(args.output, "w") as file:
+            json.dump(sweep, file, indent=2)
+        print(CURRENT_LANG["SWEEP_SAVED"].format(len(sweep["results"]), args.output))
+        return
+
+    print(CURRENT_LANG["BENCHMARK_HEADER"])
+    for count in args.counts:
+        for mode in args.modes:
+            result = run_benchmark(count, mode, args.bpm, args.seconds or 5.0)
+            print(CURRENT_LANG["BENCHMARK_ROW"].format(**result))
+
+# Program entry point
+if __name__ == "__main__":
+    run_benchmarks()
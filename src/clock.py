@@ -0,0 +1,337 @@
+import functools
+import os
+import threading
+import time
+from array import array
+from collections import namedtuple
+from constants import (
+    PRECISION_CPU_BUDGET, PRECISION_STATS_SIZE, PRECISION_CALIBRATION_WAITS,
+    PRECISION_CALIBRATION_SLEEP_US, PRECISION_SPIN_MARGIN, PRECISION_MIN_SPIN_US, PRECISION_MAX_SPIN_US
+)
+from timing import percentile
+
+# Gives the CPU to other ready threads without sleeping. time.sleep(0)
+# would sleep for the kernel's timer slack (about 50 us on Linux).
+yield_cpu = getattr(os, "sched_yield", lambda: None)
+
+# Overshoot of the waits of a PrecisionClock that ran to their deadline
+# (microseconds), and the total time spent spinning (milliseconds)
+WaitSummary = namedtuple("WaitSummary", ["waits", "p50_us", "p99_us", "max_us", "spin_ms"])
+
+
+class SystemClock:
+    """
+    The real time source: the monotonic nanosecond clock and event waits.
+    """
+
+    realtime = True
+
+    def now_ns(self):
+        """
+        Returns:
+            int: Current monotonic time in nanoseconds
+        """
+        return time.monotonic_ns()
+
+    def wait(self, event, timeout_ns):
+        """
+        Sleep until an event is set or a timeout passes.
+
+        Args:
+            event (threading.Event): Event that cuts the sleep short
+            timeout_ns (int): Longest sleep in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        return event.wait(timeout_ns / 1_000_000_000)
+
+    def wait_until(self, event, deadline_ns):
+        """
+        Sleep until an event is set or an absolute deadline passes.
+
+        Args:
+            event (threading.Event): Event that cuts the sleep short
+            deadline_ns (int): Deadline on this clock in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        return self.wait(event, deadline_ns - self.now_ns())
+
+    def interrupt(self):
+        """Tell sleepers an event was set (event waits notice it by themselves)."""
+
+    def track(self, thread):
+        """Announce a thread that will sleep on this clock (nothing to do here)."""
+
+
+@functools.lru_cache(maxsize=None)
+def calibrate_spin_ns(waits=PRECISION_CALIBRATION_WAITS):
+    """
+    Measure how late short sleeps wake up on this machine (once per process).
+
+    Args:
+        waits (int, optional): Number of test sleeps, defaults to PRECISION_CALIBRATION_WAITS
+
+    Returns:
+        int: Spin threshold in nanoseconds: the worst overshoot times
+            PRECISION_SPIN_MARGIN, within PRECISION_MIN_SPIN_US and PRECISION_MAX_SPIN_US
+    """
+    event = threading.Event()
+    sleep_ns = int(PRECISION_CALIBRATION_SLEEP_US * 1000)
+    worst_ns = 0
+    for _ in range(waits):
+        start_ns = time.monotonic_ns()
+        event.wait(sleep_ns / 1_000_000_000)
+        worst_ns = max(worst_ns, time.monotonic_ns() - start_ns - sleep_ns)
+    spin_ns = int(worst_ns * PRECISION_SPIN_MARGIN)
+    return min(max(spin_ns, int(PRECISION_MIN_SPIN_US * 1000)), int(PRECISION_MAX_SPIN_US * 1000))
+
+
+class PrecisionClock(SystemClock):
+    """
+    The system clock with waits that end on their deadline, not after it.
+
+    Event waits (like time.sleep and pygame.time.wait) wake up 0.1-2 ms
+    late depending on kernel and load, which is audible as flams at high
+    subdivision rates. This clock sleeps until spin_ns before the
+    deadline and then yields the CPU in a loop until the deadline has
+    passed. The event is checked on every turn, so stop() and setting
+    changes still cut the wait short.
+
+    The spin threshold is calibrated from the measured overshoot of
+    short sleeps. cpu_budget trades precision for power: the spin never
+    takes more than that fraction of a wait, and 0 turns spinning off.
+
+    Every wait that runs to its deadline records how late it returned,
+    in a preallocated ring like TimingStats.
+    """
+
+    def __init__(self, spin_us=None, cpu_budget=PRECISION_CPU_BUDGET, size=PRECISION_STATS_SIZE):
+        """
+        Initialize the clock.
+
+        Args:
+            spin_us (float, optional): Spin threshold in microseconds, defaults
+                to None (calibrated)
+            cpu_budget (float, optional): Largest fraction of a wait spent
+                spinning, defaults to PRECISION_CPU_BUDGET
+            size (int, optional): Waits kept for the overshoot percentiles,
+                defaults to PRECISION_STATS_SIZE
+        """
+        self.spin_ns = int(spin_us * 1000) if spin_us is not None else calibrate_spin_ns()
+        self.cpu_budget = cpu_budget
+        self.size = size
+        self.overshoot_ns = array("q", bytes(8 * size))
+        self.waits = 0         # Waits that ran to their deadline
+        self.spin_total_ns = 0  # Time spent spinning
+
+    def wait(self, event, timeout_ns):
+        """
+        Sleep, then spin, until an event is set or a timeout passes.
+
+        Args:
+            event (threading.Event): Event that cuts the wait short
+            timeout_ns (int): Length of the wait in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        return self.wait_until(event, time.monotonic_ns() + timeout_ns)
+
+    def wait_until(self, event, deadline_ns):
+        """
+        Sleep, then spin, until an event is set or an absolute deadline passes.
+
+        Args:
+            event (threading.Event): Event that cuts the wait short
+            deadline_ns (int): Monotonic deadline in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        timeout_ns = deadline_ns - time.monotonic_ns()
+        spin_ns = min(self.spin_ns, int(timeout_ns * self.cpu_budget))
+
+        # Coarse sleep until just before the deadline
+        if timeout_ns > spin_ns and event.wait((timeout_ns - spin_ns) / 1_000_000_000):
+            return True
+
+        # Yield until the deadline
+        spin_start_ns = now_ns = time.monotonic_ns()
+        while now_ns < deadline_ns:
+            if event.is_set():
+                return True
+            yield_cpu()
+            now_ns = time.monotonic_ns()
+
+        self.overshoot_ns[self.waits % self.size] = now_ns - deadline_ns
+        self.spin_total_ns += now_ns - spin_start_ns
+        self.waits += 1
+        return event.is_set()
+
+    def wait_summary(self):
+        """
+        Summarize how late the waits returned.
+
+        Returns:
+            WaitSummary: Overshoot p50/p99/max and the time spent spinning,
+                or None if no wait ran to its deadline yet
+        """
+        count = min(self.waits, self.size)
+        if count == 0:
+            return None
+        overshoot = sorted(self.overshoot_ns[:count])
+        return WaitSummary(
+            waits=self.waits,
+            p50_us=percentile(overshoot, 0.50) / 1000,
+            p99_us=percentile(overshoot, 0.99) / 1000,
+            max_us=overshoot[-1] / 1000,
+            spin_ms=self.spin_total_ns / 1_000_000,
+        )
+
+
+class VirtualClock:
+    """
+    A simulated time source for running hours of playback in milliseconds.
+
+    Time stands still until the controlling thread (a test, or the
+    benchmark) calls run_until() or advance(). These jump from one
+    sleeper's deadline to the next, and each time wait for the woken
+    engine thread to play its clicks and go back to sleep. Every click
+    therefore lands exactly on its simulated deadline, and settings
+    changes made between two run_until() calls take effect at a known
+    simulated time.
+
+    wake_latency_ns models a sleep primitive that wakes late: every
+    sleep that runs to its deadline ends that much later, which lets
+    long-session drift be simulated.
+    """
+
+    realtime = False
+
+    def __init__(self, start_ns=0, wake_latency_ns=0):
+        """
+        Initialize a stopped clock.
+
+        Args:
+            start_ns (int, optional): Initial simulated time, defaults to 0
+            wake_latency_ns (int, optional): Added to every completed sleep, defaults to 0
+        """
+        self.time_ns = start_ns
+        self.wake_latency_ns = wake_latency_ns
+        self._condition = threading.Condition()
+        self._sleepers = {}   # thread -> (wake time, event)
+        self._threads = []    # Threads that must settle before time moves
+
+    def now_ns(self):
+        """
+        Returns:
+            int: Current simulated time in nanoseconds
+        """
+        return self.time_ns
+
+    def wait(self, event, timeout_ns):
+        """
+        Sleep in simulated time until an event is set or a timeout passes.
+
+        Args:
+            event (threading.Event): Event that cuts the sleep short
+            timeout_ns (int): Longest sleep in simulated nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        thread = threading.current_thread()
+        with self._condition:
+            wake_ns = self.time_ns + timeout_ns + self.wake_latency_ns
+            self._sleepers[thread] = (wake_ns, event)
+            self._condition.notify_all()  # Now asleep: the controller may go on
+            while not event.is_set() and self.time_ns < wake_ns:
+                self._condition.wait()
+            del self._sleepers[thread]
+            return event.is_set()
+
+    def wait_until(self, event, deadline_ns):
+        """
+        Sleep in simulated time until an event is set or a deadline passes.
+
+        Args:
+            event (threading.Event): Event that cuts the sleep short
+            deadline_ns (int): Simulated deadline in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        return self.wait(event, deadline_ns - self.time_ns)
+
+    def interrupt(self):
+        """Wake sleepers so they notice an event set by another thread."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def track(self, thread):
+        """
+        Announce a thread that will sleep on this clock before it starts,
+        so time does not move on before it reached its first sleep.
+
+        Args:
+            thread (threading.Thread): The engine thread
+        """
+        with self._condition:
+            self._threads.append(thread)
+
+    #-----------------------------------------------------
+    # Controlling Time
+    #-----------------------------------------------------
+
+    def _settled(self):
+        """
+        Check whether every tracked thread is asleep with nothing to do.
+        Called with the condition held.
+
+        Returns:
+            bool: True if time may move on
+        """
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        for thread in self._threads:
+            sleeper = self._sleepers.get(thread)
+            if sleeper is None:
+                return False  # Still running, or not asleep yet
+            wake_ns, event = sleeper
+            if wake_ns <= self.time_ns or event.is_set():
+                return False  # About to wake up
+        return True
+
+    def _settle(self):
+        """Wait until every tracked thread is asleep. Called with the condition held."""
+        # Finished threads do not notify, so check again now and then
+        while not self._settled():
+            self._condition.wait(0.001)
+
+    def run_until(self, target_ns):
+        """
+        Move simulated time forward, waking every sleeper on the way.
+
+        Args:
+            target_ns (int): Simulated time to stop at
+        """
+        with self._condition:
+            while True:
+                self._settle()
+                due = [wake_ns for wake_ns, _ in self._sleepers.values()]
+                if not due or min(due) > target_ns:
+                    break
+                self.time_ns = max(self.time_ns, min(due))
+                self._condition.notify_all()
+            self.time_ns = max(self.time_ns, target_ns)
+
+    def advance(self, duration_ns):
+        """
+        Move simulated time forward by a duration.
+
+        Args:
+            duration_ns (int): Simulated nanoseconds to run
+        """
+        self.run_until(self.time_ns + duration_ns)
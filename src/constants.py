@@ -3,18 +3,54 @@ from pathlib import Path
 # Technical constants (no language needed)
 MIN_BPM = 10
 MAX_BPM = 400
+MIN_BEATS = 1                 # Range of beats per measure
+MAX_BEATS = 12
 SOUND_FILE = str(Path(__file__).parent / "sounds/4c.wav")
 SOUND_FILE_UP = str(Path(__file__).parent / "sounds/4d.wav")
 SOUND_FILE_SUBDIVISION = str(Path(__file__).parent / "sounds/tripl.wav")
+PATTERNS_FILE = str(Path(__file__).parent / "patterns.json")
+LOOKAHEAD_MS = 100.0          # How often the lookahead scheduler wakes up
+SCHEDULE_AHEAD_TIME = 0.2     # Length of each window it queues, in seconds
+MEASURE_CACHE_SIZE = 8        # Pre-rendered measure loops kept in memory
+RENDER_SAMPLE_RATE = 48000    # Sample rate of offline rendered click tracks
+STREAM_BLOCK_FRAMES = 48000   # Frames per block of a streamed click track
+STREAM_CACHE_BLOCKS = 512     # Rendered blocks kept by the web server
+PULL_BLOCK_FRAMES = 1024      # Frames per block pulled from the sample-clock engine
+SOUND_CACHE_BYTES = 32 * 1024 * 1024  # Decoded samples kept by the audio session
+MAX_TRACK_SECONDS = 3 * 3600  # Longest click track the web server renders
+EVENT_RING_SIZE = 256         # Beat events kept for slow consumers
+TIMING_RING_SIZE = 4096       # Clicks kept for timing percentiles
+LATE_CLICK_MS = 2.0           # Clicks played later than this count as late
+TRACE_BUFFER_SIZE = 65536     # Beat loop phases kept by a tracer
+TRACE_ENV = "METRONOMNOM_TRACE"  # Environment variable naming a trace file
+PRECISION_CPU_BUDGET = 0.1    # Largest fraction of a wait the precision clock spins
+PRECISION_STATS_SIZE = 1024   # Waits kept for overshoot percentiles
+PRECISION_CALIBRATION_WAITS = 20      # Test sleeps measured at startup
+PRECISION_CALIBRATION_SLEEP_US = 1000.0  # Length of each test sleep
+PRECISION_SPIN_MARGIN = 1.5   # Spin threshold over the worst measured overshoot
+PRECISION_MIN_SPIN_US = 100.0   # Bounds of the calibrated spin threshold
+PRECISION_MAX_SPIN_US = 3000.0
+TIMERFD_OVERRUN_MS = 1.0      # Lateness of a timerfd wakeup counted as one overrun
+ISOLATE_ENV = "METRONOMNOM_ISOLATE"  # Environment variable asking for an engine process
+ENGINE_POLL_MS = 100.0        # Longest wait of the engine process between control checks
+ENGINE_REPLY_TIMEOUT = 1.0    # Seconds to wait for the engine process to answer
+ENGINE_STOP_TIMEOUT = 5.0     # Seconds to wait for the engine process to exit
+ENGINE_RT_PRIORITY = 10       # Real-time priority asked for the engine process
+ENGINE_NICE = -10             # Nice increment tried when real-time is not allowed
 QUIT_COMMAND = "q"
 STOP_COMMAND = "s"
 EIGHTH_COMMAND = "e"
 TRIPLET_COMMAND = "t"
 SIXTEENTH_COMMAND = "x"
+QUINTUPLET_COMMAND = "p"
+SWING_COMMAND = "w"
+DOTTED_COMMAND = "d"
+SEPTUPLET_COMMAND = "g"
+STATS_COMMAND = "i"
 
 # Language-specific messages
 LANG_EN = {
-    "PROMPT_BPM": "Enter BPM (or 'q' to quit, 's' to stop, 'e' for eighth notes, 't' for triplets, 'x' for sixteenth notes, '1-9' for time signature): ",
+    "PROMPT_BPM": "Enter BPM (or 'q' to quit, 's' to stop, 'e' for eighth notes, 't' for triplets, 'x' for sixteenth notes, 'p' for quintuplets, 'w' for swing, 'd' for dotted, 'g' for 2+2+3, 'i' for timing stats, '1-9' for time signature): ",
     "GOODBYE_MSG": "Goodbye!",
     "INVALID_BPM_MSG": f"Please enter a number between {MIN_BPM} and {MAX_BPM}",
     "INVALID_BPM_INIT": f"BPM must be between {MIN_BPM} and {MAX_BPM}",
@@ -27,11 +63,38 @@ LANG_EN = {
     "TEMPO_CHANGE_MSG": "Tempo changed to {} BPM",
     "DECIMAL_ERROR_MSG": "You must enter a whole number.",
     "NOWAVE_FILE": f"{SOUND_FILE} not found",
-    "NOWAVE_FILE_DOWN": f"{SOUND_FILE} (downbeat sound) not found",
-    "NOWAVE_FILE_UP": f"{SOUND_FILE_UP} (upbeat sound) not found",
-    "NOWAVE_FILE_SUBDIVISION": f"{SOUND_FILE_SUBDIVISION} (subdivision sound) not found",
-    "INVALID_MODE": "Invalid mode. Must be normal, eighth, triplet, or sixteenth.",
+    "NOWAVE_FILE_DOWN": "{} (downbeat sound) not found",
+    "NOWAVE_FILE_UP": "{} (upbeat sound) not found",
+    "NOWAVE_FILE_SUBDIVISION": "{} (subdivision sound) not found",
+    "INVALID_MODE": "Invalid mode. Must be a rhythm mode from patterns.json.",
+    "INVALID_LAYER": "A polymeter needs layers with at least one beat of positive length.",
+    "INVALID_TEMPO_MAP": "Tempo map sections need at least one bar and beat and a constant, linear, or exponential curve.",
+    "INVALID_BAR": "Bar must be between 1 and {}.",
+    "INVALID_SCHEDULER": "A shared scheduler needs absolute scheduling.",
+    "INVALID_EVENT_RING": "Event ring needs at least one slot and a drop_oldest or drop_newest policy.",
+    "INVALID_CLOCK": "A virtual clock needs relative or absolute scheduling on the metronome's own thread.",
+    "INVALID_BACKEND": "Lookahead and loop scheduling need an audio backend that plays on the sound card.",
+    "INVALID_APPLY_MODE": "Changes must apply on the next bar, beat or subdivision.",
+    "INVALID_PATTERN": "Rhythm pattern '{}' must start on the beat with increasing offsets below 1.",
+    "INVALID_SCHEDULING": "Invalid scheduling mode. Must be relative, absolute, lookahead, or loop.",
     "WAV_NOT_LOADED": "Error: Sound files are not loaded.",
+    "RENDER_DONE": "Rendered {} s of click track to {} in {:.3f} s",
+    "BENCHMARK_HEADER": "instances  mode       threads  beats    p50 ms   p99 ms   max ms   CPU %",
+    "BENCHMARK_ROW": "{instances:>9}  {mode:<9}  {threads:>7}  {beats:>5}  {p50_ms:>8.3f} {p99_ms:>8.3f} {max_ms:>8.3f} {cpu_percent:>7.1f}",
+    "SWEEP_HEADER": "  bpm  mode        meter  scheduling  clicks   p50 ms   p99 ms   max ms  drift ms/h  CPU us/click  wakeups/s",
+    "SWEEP_ROW": "{bpm:>5}  {mode:<10}  {meter:>5}  {scheduling:<10}  {clicks:>6} {p50_ms:>8.3f} {p99_ms:>8.3f} {max_ms:>8.3f} {drift_ms_per_hour:>11.1f} {cpu_us_per_click:>13.1f} {wakeups_per_second!s:>10}",
+    "SWEEP_SAVED": "Saved {} results to {}",
+    "SIMULATION_ROW": "{scheduling:<10} {hours} h at {bpm} BPM: {clicks} clicks, drift {drift_ms:.3f} ms (simulated in {real_seconds:.2f} s)",
+    "ISOLATION_HEADER": "engine      priority  clicks   p50 ms   p99 ms   max ms   late",
+    "ISOLATION_ROW": "{engine:<10}  {priority!s:<8}  {clicks:>6} {p50_ms:>8.3f} {p99_ms:>8.3f} {max_ms:>8.3f} {late:>6}",
+    "SETLIST_ROW_ERROR": "Setlist line {}: expected title, bpm, beats, mode and length.",
+    "SETLIST_ROW_INVALID": "Setlist line {}: {}",
+    "SETLIST_SONG_DONE": "{:>2}. {} ({} BPM, {}/4, {}) -> {} [{:.3f} s]",
+    "SETLIST_SONG_FAILED": "{:>2}. {}: {}",
+    "SETLIST_SUMMARY": "Rendered {} songs ({:.0f} s of audio) in {:.2f} s, {:.0f}x real time.",
+    "INVALID_TIME_SIG": f"Time signature must be between {MIN_BEATS} and {MAX_BEATS} beats.",
+    "INVALID_DURATION": "Duration must be longer than 0 seconds.",
+    "INVALID_TRACK_LENGTH": f"Length must be between 1 and {MAX_TRACK_SECONDS} seconds.",
     "UI_VALID_BPM": "Current BPM: {}",
     "UI_BEAT_DISPLAY": "Beat: {}",
     "UI_DEFAULT_STATUS": "Enter BPM to start",
@@ -42,9 +105,16 @@ LANG_EN = {
     "MODE_NORMAL": "Switched to normal mode",
     "MODE_CHANGE_STOPPED": "Cannot change mode while metronome is stopped",
     "MODE_SIXTEENTH": "Switched to sixteenth notes mode",
+    "MODE_QUINTUPLET": "Switched to quintuplet mode",
+    "MODE_SWING": "Switched to swing mode",
+    "MODE_DOTTED": "Switched to dotted eighths mode",
+    "MODE_SEPTUPLET": "Switched to 2+2+3 septuplet mode",
     "TIME_SIG_SET": "Time signature set to {}/{}",
     "TIME_SWITCH": "Time signature set to {}/4",
     "NOT_RUNNING": "Metronomone not running.",
+    "TIMING_STATS": "Timing over {clicks} clicks: jitter p50 {p50_ms:.3f} ms, p99 {p99_ms:.3f} ms, max {max_ms:.3f} ms, drift {drift_ms:.3f} ms, {late} late",
+    "TIMING_OVERRUNS": ", {} timer overruns",
+    "TIMING_EMPTY": "No clicks timed yet.",
     "PYGAME_INSTALL_MSG": "Please install pygame: pip install pygame",
     "TEXTUAL_ERROR": "Error: Textual library is required for the UI version.",
     "TEXTUAL_INSTALL_MSG": "Please install textual: pip install textual",
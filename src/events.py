@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from constants import EVENT_RING_SIZE, CURRENT_LANG
+
+#-------------------------------------------------------
+# Overflow policies
+#-------------------------------------------------------
+DROP_OLDEST = "drop_oldest"  # Overwrite the oldest unread event
+DROP_NEWEST = "drop_newest"  # Discard the new event while the ring is full
+POLICIES = {DROP_OLDEST, DROP_NEWEST}
+
+# One published click: sequence number, beat in the measure, click sound
+# (SOUND_BEAT on beats; grid modes also publish subdivisions), scheduled
+# time and actual publish time (both monotonic nanoseconds), and the
+# polymeter layer that played it (always 0 for a single meter)
+BeatEvent = namedtuple("BeatEvent", ["seq", "beat", "sound_id", "deadline_ns", "time_ns", "layer"], defaults=(0,))
+
+
+class EventRing:
+    """
+    A fixed-size ring of beat events between the audio thread and its consumers.
+
+    The audio thread only ever writes one slot and bumps a counter, so
+    publishing never waits on a consumer. Every reader keeps its own
+    cursor and drains the ring on its own thread or event loop. When a
+    reader falls more than `size` events behind, events are dropped
+    according to the policy and counted, instead of delaying a click.
+    """
+
+    def __init__(self, size=EVENT_RING_SIZE, policy=DROP_OLDEST):
+        """
+        Initialize an empty ring.
+
+        Args:
+            size (int, optional): Number of slots, defaults to EVENT_RING_SIZE
+            policy (str, optional): DROP_OLDEST or DROP_NEWEST, defaults to DROP_OLDEST
+
+        Raises:
+            ValueError: If the size or policy is invalid
+        """
+        if size < 1 or policy not in POLICIES:
+            raise ValueError(CURRENT_LANG["INVALID_EVENT_RING"])
+        self.size = size
+        self.policy = policy
+        self.head = 0          # Sequence number of the next event
+        self.dropped = 0       # Events discarded by DROP_NEWEST
+        self._slots = [None] * size
+        self._readers = []
+
+    def publish(self, beat, sound_id, deadline_ns, layer=0):
+        """
+        Publish an event (called from the audio thread).
+
+        Args:
+            beat (int): Beat number in the measure
+            sound_id (int): Sound ID of the click
+            deadline_ns (int): Scheduled monotonic time of the click
+            layer (int, optional): Polymeter layer of the click, defaults to 0
+
+        Returns:
+            bool: False if the event was dropped
+        """
+        seq = self.head
+        if self.policy == DROP_NEWEST and self._readers:
+            if seq - min(reader.cursor for reader in self._readers) >= self.size:
+                self.dropped += 1
+                return False
+
+        self._slots[seq % self.size] = BeatEvent(seq, beat, sound_id, deadline_ns, time.monotonic_ns(), layer)
+        self.head = seq + 1
+
+        # Wake readers waiting on their own thread or loop
+        for reader in self._readers:
+            if reader.wake:
+                reader.wake()
+        return True
+
+    def subscribe(self, wake=None):
+        """
+        Create a reader that starts at the next published event.
+
+        Args:
+            wake (function, optional): Called after each publish; must not block
+
+        Returns:
+            EventReader: The new reader
+        """
+        reader = EventReader(self, wake)
+        self._readers = self._readers + [reader]
+        return reader
+
+    def unsubscribe(self, reader):
+        """
+        Remove a reader.
+
+        Args:
+            reader (EventReader): Reader returned by subscribe()
+        """
+        self._readers = [other for other in self._readers if other is not reader]
+
+
+class EventReader:
+    """
+    A consumer's cursor into an EventRing.
+    """
+
+    def __init__(self, ring, wake=None):
+        """
+        Args:
+            ring (EventRing): The ring to read
+            wake (function, optional): Called after each publish
+        """
+        self.ring = ring
+        self.wake = wake
+        self.cursor = ring.head
+        self.dropped = 0       # Events overwritten before this reader got them
+
+    def poll(self):
+        """
+        Take every event published since the last poll.
+
+        Returns:
+            list: BeatEvent tuples in order (may be empty)
+        """
+        ring = self.ring
+        events = []
+        head = ring.head
+
+        # Skip events the producer already overwrote
+        if head - self.cursor > ring.size:
+            self.dropped += head - ring.size - self.cursor
+            self.cursor = head - ring.size
+
+        while self.cursor < head:
+            event = ring._slots[self.cursor % ring.size]
+            if event is None or event.seq != self.cursor:
+                # Overwritten while reading: count it and move on
+                self.dropped += 1
+                self.cursor += 1
+                continue
+            events.append(event)
+            self.cursor += 1
+        return events
+
+
+class EventDispatcher:
+    """
+    Drains a ring on a thread of its own and hands events to a callback.
+
+    Slow consumers (like a UI that waits for its own event loop) block
+    only this thread. The audio thread keeps publishing meanwhile.
+    """
+
+    def __init__(self, ring, callback):
+        """
+        Start dispatching.
+
+        Args:
+            ring (EventRing): The ring to drain
+            callback (function): Called with a non-empty list of new events
+        """
+        self.callback = callback
+        self._ready = threading.Event()
+        self._running = True
+        self.reader = ring.subscribe(wake=self._ready.set)
+        self._thread = threading.Thread(target=self._run, name="beat-events", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Dispatcher loop: wait for a publish, then hand over every new event."""
+        while self._running:
+            self._ready.wait()
+            self._ready.clear()
+            events = self.reader.poll()
+            if events and self._running:
+                self.callback(events)
+
+    def stop(self, wait=True):
+        """
+        Stop dispatching and detach from the ring.
+
+        Args:
+            wait (bool, optional): Join the dispatcher thread, defaults to True.
+                Pass False from a thread the callback itself waits on (like
+                a UI event loop), or the two would wait on each other.
+        """
+        self._running = False
+        self.reader.ring.unsubscribe(self.reader)
+        self._ready.set()
+        if wait and self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+async def iter_events(ring):
+    """
+    Iterate over a ring's events from an asyncio event loop.
+
+    The audio thread wakes the loop with call_soon_threadsafe and the
+    events are read on the loop, so no extra thread is needed.
+
+    Args:
+        ring (EventRing): The ring to read
+
+    Yields:
+        BeatEvent: Each event, in order
+    """
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+
+    def wake():
+        try:
+            loop.call_soon_threadsafe(ready.set)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    reader = ring.subscribe(wake=wake)
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            for event in reader.poll():
+                yield event
+    finally:
+        ring.unsubscribe(reader)
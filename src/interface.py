@@ -10,17 +10,11 @@ from constants import (
     CURRENT_LANG, 
     QUIT_COMMAND, 
     STOP_COMMAND,
-    EIGHTH_COMMAND,
-    TRIPLET_COMMAND,
-    SIXTEENTH_COMMAND  
-)
-from main import validate_bpm, check_dependencies
-from metronome import (
-    Metronome,
-    EIGHTH_MODE,
-    TRIPLET_MODE,
-    SIXTEENTH_MODE  
+    STATS_COMMAND
 )
+from main import validate_bpm, check_dependencies, format_timing_stats, MODE_COMMANDS
+from isolated import metronome_from_env
+from events import EventDispatcher
 
 #=====================================================
 # Main UI Application Class
@@ -46,6 +40,7 @@ class MetroUI(App):
         """Initialize the MetroUI application with default settings."""
         super().__init__()
         self.metronome = None  # Will hold the metronome instance when running
+        self.beat_events = None  # Drains beat events off the audio thread
         self.beats_per_measure = 4  # Default time signature: 4/4
         self.beat_unit = 4  # Quarter note beat unit (fixed for now)
         
@@ -98,7 +93,8 @@ class MetroUI(App):
         Handles:
         - BPM changes (numeric input)
         - Stop/quit commands
-        - Rhythm mode changes (e/t/x commands)
+        - Rhythm mode changes (e/t/x/p/w/d/g commands)
+        - Timing statistics (i command)
         - Time signature changes (1-9)
         
         Args:
@@ -113,10 +109,14 @@ class MetroUI(App):
             # Handle metronome stopping and app quitting
             self._handle_stop_or_quit(value, status)
         
-        elif value in {EIGHTH_COMMAND, TRIPLET_COMMAND, SIXTEENTH_COMMAND}:
+        elif value in MODE_COMMANDS:
             # Handle rhythm subdivision mode changes
             self._handle_mode_change(value, status)
         
+        elif value == STATS_COMMAND:
+            # Show click timing statistics in the status area
+            status.update(format_timing_stats(self.metronome))
+        
         elif value.isdigit() and 1 <= int(value) <= 9:
             # Handle time signature changes using number keys
             self._handle_time_signature_change(int(value), status)
@@ -150,15 +150,14 @@ class MetroUI(App):
         
         # Update the metronome if it's running, otherwise just show message
         if self.metronome:
-            self.metronome.beats_per_measure = self.beats_per_measure
-            self.metronome.current_beat = 1  # Reset to first beat
+            self.metronome.set_time_signature(self.beats_per_measure)  # New measure starts on beat 1
             status.update(CURRENT_LANG["TIME_SIG_CHANGE"].format(beats, self.beat_unit))
         else:
             status.update(CURRENT_LANG["TIME_SWITCH"].format(beats))
 
     def _handle_mode_change(self, value: str, status: Static) -> None:
         """
-        Switch between different rhythm modes (eighth notes, triplets, sixteenth notes).
+        Switch between different rhythm modes (eighth notes, triplets, swing, ...).
         
         Args:
             value (str): The command character for the desired mode
@@ -169,15 +168,8 @@ class MetroUI(App):
             status.update(CURRENT_LANG["MODE_CHANGE_STOPPED"])
             return
         
-        # Map command characters to their corresponding modes
-        mode_map = {
-            EIGHTH_COMMAND: EIGHTH_MODE,      # 'e' for eighth notes
-            TRIPLET_COMMAND: TRIPLET_MODE,    # 't' for triplets
-            SIXTEENTH_COMMAND: SIXTEENTH_MODE,  # 'x' for sixteenth notes
-        }
-        
         # Set the new mode and show feedback
-        mode = mode_map.get(value)
+        mode = MODE_COMMANDS.get(value)
         if mode:
             current_mode = self.metronome.set_rhythm_mode(mode)
             status.update(CURRENT_LANG[f"MODE_{current_mode.upper()}"])
@@ -216,12 +208,11 @@ class MetroUI(App):
             bpm (int): The initial BPM for the metronome
             status (Static): The status display widget for feedback
         """
-        # Create metronome with callback to update beat display
-        self.metronome = Metronome(
-            bpm,
-            on_beat=self.update_beat_display,  # This will update the UI on each beat
-            beats_per_measure=self.beats_per_measure
-        )
+        # Create metronome; beat events reach the UI through its event ring,
+        # so a busy UI never delays a click. METRONOMNOM_ISOLATE moves the
+        # engine to a process of its own, METRONOMNOM_TRACE traces it.
+        self.metronome = metronome_from_env(bpm, beats_per_measure=self.beats_per_measure)
+        self.beat_events = EventDispatcher(self.metronome.events, self.handle_beat_events)
         self.metronome.start()
         status.update(f"{CURRENT_LANG['METRONOME_STARTED_MSG']} {bpm} BPM")
 
@@ -236,7 +227,9 @@ class MetroUI(App):
         # Stop the metronome if it's running
         if self.metronome:
             self.metronome.stop()
+            self.beat_events.stop(wait=False)  # The UI thread must not wait on it
             self.metronome = None
+            self.beat_events = None
             status.update(CURRENT_LANG["METRONOME_STOPPED_MSG"])
             
             # Reset the BPM display when stopped
@@ -251,10 +244,19 @@ class MetroUI(App):
     # UI Update Methods
     #-----------------------------------------------------
 
+    def handle_beat_events(self, events: list) -> None:
+        """
+        Show the newest beat from a batch of beat events.
+        Called on the event dispatcher thread, never on the audio thread.
+        
+        Args:
+            events (list): New BeatEvent tuples, oldest first
+        """
+        self.call_from_thread(self.update_beat_display, events[-1].beat)
+
     def update_beat_display(self, beat_number: int) -> None:
         """
         Update the UI to show the current beat number.
-        Called by metronome on each beat.
         
         Args:
             beat_number (int): The current beat in the measure
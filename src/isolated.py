@@ -0,0 +1,716 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from constants import (
+    CURRENT_LANG, MIN_BPM, MAX_BPM, MIN_BEATS, MAX_BEATS, EVENT_RING_SIZE, ISOLATE_ENV,
+    ENGINE_POLL_MS, ENGINE_REPLY_TIMEOUT, ENGINE_STOP_TIMEOUT, ENGINE_RT_PRIORITY, ENGINE_NICE
+)
+from metronome import (
+    Metronome, Config, NORMAL_MODE, SCHEDULE_RELATIVE, SCHEDULE_ABSOLUTE,
+    APPLY_ON_BEAT, APPLY_MODES
+)
+from patterns import PATTERNS, SOUND_BEAT
+from events import EventRing, BeatEvent, DROP_OLDEST
+from timing import TimingSummary
+from tracing import tracer_from_env
+
+#-------------------------------------------------------
+# Control block layout, in 8-byte words
+#-------------------------------------------------------
+# Written by the UI process
+CONTROL_GENERATION = 0     # Odd while the settings below are being written
+CONTROL_BPM = 1
+CONTROL_BEATS = 2          # Beats per measure
+CONTROL_MODE = 3           # Index of the rhythm mode in MODE_NAMES
+CONTROL_RUNNING = 4        # 0 tells the engine process to stop and exit
+CONTROL_STATS_REQUEST = 5  # Bumped to ask for a timing summary
+# Written by the engine process
+CONTROL_PRIORITY = 6       # PRIORITY_* the engine process got, -1 until known
+CONTROL_STATS_READY = 7    # Last timing summary request answered
+CONTROL_STATS = 8          # TimingSummary fields, as doubles
+CONTROL_WORDS = CONTROL_STATS + len(TimingSummary._fields)
+
+# Both processes import the same patterns.json, so indexes are stable
+MODE_NAMES = sorted(PATTERNS)
+
+# Event slot layout, in 8-byte words (word 0 of the ring is its head)
+SLOT_SEQ, SLOT_BEAT, SLOT_SOUND, SLOT_DEADLINE, SLOT_TIME = range(5)
+SLOT_WORDS = 5
+
+# Scheduling priority the engine process got from the OS
+PRIORITY_NORMAL = 0
+PRIORITY_NICE = 1
+PRIORITY_REALTIME = 2
+PRIORITY_NAMES = {PRIORITY_NORMAL: "normal", PRIORITY_NICE: "nice", PRIORITY_REALTIME: "realtime"}
+
+
+class ControlBlock:
+    """
+    The settings of an isolated engine in shared memory.
+
+    The UI process is the only writer of the settings. It makes the
+    generation counter odd, writes the fields, and makes it even again,
+    so the engine process can tell a torn read and retry (a seqlock).
+    Each word is one aligned 8-byte store, which neither process can
+    see half-written. The engine process writes its own status words
+    (priority, timing summary) after the settings.
+    """
+
+    def __init__(self, name=None):
+        """
+        Create a new block, or attach to an existing one.
+
+        Args:
+            name (str, optional): Shared memory name to attach to, defaults
+                to None (create one)
+        """
+        self.shm = SharedMemory(name=name, create=name is None, size=8 * CONTROL_WORDS)
+        self.name = self.shm.name
+        self.words = self.shm.buf.cast("q")
+        self.reals = self.shm.buf.cast("d")
+        if name is None:
+            self.words[CONTROL_PRIORITY] = -1
+
+    def write(self, config, running):
+        """
+        Publish new settings (UI process only).
+
+        Args:
+            config (Config): Settings snapshot to play
+            running (bool): False to stop the engine process
+        """
+        words = self.words
+        words[CONTROL_GENERATION] += 1  # Odd: being written
+        words[CONTROL_BPM] = config.bpm
+        words[CONTROL_BEATS] = config.beats_per_measure
+        words[CONTROL_MODE] = MODE_NAMES.index(config.rhythm_mode)
+        words[CONTROL_RUNNING] = int(running)
+        words[CONTROL_GENERATION] += 1  # Even: consistent again
+
+    def read(self):
+        """
+        Read the settings (engine process).
+
+        Returns:
+            tuple: (generation, bpm, beats per measure, rhythm mode, running),
+                or None if the UI process is writing them right now
+        """
+        words = self.words
+        generation = words[CONTROL_GENERATION]
+        if generation % 2:
+            return None
+        settings = (generation, words[CONTROL_BPM], words[CONTROL_BEATS],
+                    MODE_NAMES[words[CONTROL_MODE]], bool(words[CONTROL_RUNNING]))
+        if words[CONTROL_GENERATION] != generation:
+            return None  # Changed while reading
+        return settings
+
+    def write_stats(self, summary):
+        """
+        Store a timing summary (engine process).
+
+        Args:
+            summary (TimingSummary): The summary, or None if nothing was played yet
+        """
+        for index, value in enumerate(summary or (0,) * len(TimingSummary._fields)):
+            self.reals[CONTROL_STATS + index] = value
+
+    def read_stats(self):
+        """
+        Returns:
+            TimingSummary: The stored timing summary, or None if no click was timed
+        """
+        values = list(self.reals[CONTROL_STATS:CONTROL_WORDS])
+        summary = TimingSummary(*values)
+        if not summary.clicks:
+            return None
+        return summary._replace(clicks=int(summary.clicks), late=int(summary.late), overruns=int(summary.overruns))
+
+    def close(self, unlink=False):
+        """
+        Detach from the block.
+
+        Args:
+            unlink (bool, optional): Also free the shared memory, defaults to False
+        """
+        self.words.release()
+        self.reals.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SharedEventRing:
+    """
+    A ring of beat events in shared memory, from the engine process back
+    to the UI process.
+
+    It has the publish() of EventRing, so the engine's Metronome writes
+    into it straight from its audio thread. Publishing marks the slot as
+    being rewritten, fills it, stamps it with its sequence number and
+    then moves the head, so a reader that sees a changed stamp knows the
+    slot was overwritten under it. The `ready` semaphore is released
+    after each event; releasing never blocks the audio thread.
+    """
+
+    def __init__(self, name=None, size=EVENT_RING_SIZE, ready=None):
+        """
+        Create a new ring, or attach to an existing one.
+
+        Args:
+            name (str, optional): Shared memory name to attach to, defaults
+                to None (create one)
+            size (int, optional): Number of slots, defaults to EVENT_RING_SIZE
+            ready (multiprocessing.Semaphore, optional): Released after each publish
+        """
+        self.shm = SharedMemory(name=name, create=name is None, size=8 * (1 + size * SLOT_WORDS))
+        self.name = self.shm.name
+        self.size = size
+        self.ready = ready
+        self.words = self.shm.buf.cast("q")
+
+    def publish(self, beat, sound_id, deadline_ns):
+        """
+        Publish an event (engine's audio thread).
+
+        Args:
+            beat (int): Beat number in the measure
+            sound_id (int): Sound ID of the click
+            deadline_ns (int): Scheduled monotonic time of the click
+
+        Returns:
+            bool: Always True (the oldest event is overwritten when the ring is full)
+        """
+        words = self.words
+        seq = words[0]
+        base = 1 + (seq % self.size) * SLOT_WORDS
+        words[base + SLOT_SEQ] = -1  # Being rewritten
+        words[base + SLOT_BEAT] = beat
+        words[base + SLOT_SOUND] = sound_id
+        words[base + SLOT_DEADLINE] = deadline_ns
+        words[base + SLOT_TIME] = time.monotonic_ns()
+        words[base + SLOT_SEQ] = seq
+        words[0] = seq + 1
+        if self.ready is not None:
+            self.ready.release()
+        return True
+
+    def read(self, cursor):
+        """
+        Take every event published since a cursor (UI process).
+
+        Args:
+            cursor (int): Sequence number of the first event wanted
+
+        Returns:
+            tuple: (list of BeatEvent in order, cursor after the last one).
+                Events overwritten before they were read are skipped.
+        """
+        words = self.words
+        head = words[0]
+        cursor = max(cursor, head - self.size)
+        events = []
+        while cursor < head:
+            base = 1 + (cursor % self.size) * SLOT_WORDS
+            event = BeatEvent(*words[base:base + SLOT_WORDS])
+            if event.seq == cursor and words[base + SLOT_SEQ] == cursor:
+                events.append(event)
+            cursor += 1
+        return events, cursor
+
+    def close(self, unlink=False):
+        """
+        Detach from the ring.
+
+        Args:
+            unlink (bool, optional): Also free the shared memory, defaults to False
+        """
+        self.words.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def raise_priority():
+    """
+    Ask the OS to schedule the calling process ahead of normal ones.
+
+    Real-time round-robin scheduling is tried first, then a lower nice
+    value. Both usually need privileges (root, CAP_SYS_NICE or an
+    rtprio limit), so falling back to normal priority is expected.
+    Threads started afterwards inherit the priority.
+
+    Returns:
+        int: PRIORITY_REALTIME, PRIORITY_NICE or PRIORITY_NORMAL
+    """
+    try:
+        os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(ENGINE_RT_PRIORITY))
+        return PRIORITY_REALTIME
+    except (AttributeError, OSError):
+        pass  # Not available on this OS, or not allowed
+    try:
+        os.nice(ENGINE_NICE)
+        return PRIORITY_NICE
+    except (AttributeError, OSError):
+        return PRIORITY_NORMAL
+
+
+def take_sound_sets(metronome, sound_sets):
+    """
+    Switch the engine's metronome to the newest sound set sent by the UI process.
+
+    Args:
+        metronome (Metronome): The engine's metronome
+        sound_sets (multiprocessing.Queue): SoundSet tuples, oldest first
+    """
+    sound_set = None
+    while True:
+        try:
+            sound_set = sound_sets.get_nowait()
+        except queue.Empty:
+            break
+    if sound_set is not None:
+        metronome.set_sounds(sound_set)
+
+
+def run_engine(control_name, ring_name, ring_size, doorbell, ready, stats_ready, sound_sets, scheduling,
+               apply_changes, tempo_map=None, tempo_map_bar=1):
+    """
+    Main function of the engine process.
+
+    Plays a Metronome with the settings of the control block, publishes
+    its clicks into the shared ring, and follows setting changes until
+    the UI process asks it to stop (or goes away).
+
+    Args:
+        control_name (str): Shared memory name of the control block
+        ring_name (str): Shared memory name of the event ring
+        ring_size (int): Slots of the event ring
+        doorbell (multiprocessing.Event): Set by the UI process after each change
+        ready (multiprocessing.Semaphore): Released after each published event
+        stats_ready (multiprocessing.Event): Set after each answered timing summary request
+        sound_sets (multiprocessing.Queue): Sound sets sent by set_sounds()
+        scheduling (str): Scheduling mode of the engine
+        apply_changes (str): When setting changes apply
+        tempo_map (TempoMap, optional): Tempo map to follow instead of the BPM
+        tempo_map_bar (int, optional): Bar of the tempo map to start from, defaults to 1
+    """
+    # Before any thread is started, so the beat thread inherits it
+    priority = raise_priority()
+
+    control = ControlBlock(control_name)
+    ring = SharedEventRing(ring_name, ring_size, ready)
+    settings = None
+    while settings is None:
+        settings = control.read()
+    generation, bpm, beats_per_measure, rhythm_mode, running = settings
+
+    metronome = Metronome(bpm, beats_per_measure=beats_per_measure, scheduling=scheduling,
+                          apply_changes=apply_changes, tracer=tracer_from_env())
+    metronome.rhythm_mode = rhythm_mode
+    metronome.events = ring  # Clicks go straight to shared memory
+    control.words[CONTROL_PRIORITY] = priority
+    take_sound_sets(metronome, sound_sets)
+
+    parent = os.getppid()
+    answered = 0
+    try:
+        if running and tempo_map is not None:
+            metronome.play_tempo_map(tempo_map, tempo_map_bar)
+        elif running:
+            metronome.start()
+        while running:
+            doorbell.wait(ENGINE_POLL_MS / 1000)
+            doorbell.clear()
+            if os.getppid() != parent:
+                break  # The UI process is gone
+
+            # Follow setting changes
+            settings = control.read()
+            if settings is not None and settings[0] != generation:
+                generation, bpm, beats_per_measure, rhythm_mode, running = settings
+                if bpm != metronome.bpm:
+                    metronome.update_bpm(bpm)
+                if beats_per_measure != metronome.beats_per_measure:
+                    metronome.set_time_signature(beats_per_measure)
+                if rhythm_mode != metronome.rhythm_mode:
+                    metronome.rhythm_mode = rhythm_mode
+            take_sound_sets(metronome, sound_sets)
+
+            # Answer a timing summary request
+            request = control.words[CONTROL_STATS_REQUEST]
+            if request != answered:
+                control.write_stats(metronome.timing_summary())
+                control.words[CONTROL_STATS_READY] = answered = request
+                stats_ready.set()
+    finally:
+        metronome.stop()
+        ring.close()
+        control.close()
+
+
+class IsolatedMetronome:
+    """
+    A metronome whose audio engine runs in a child process.
+
+    The engine process has its own interpreter and GIL, and a raised
+    scheduling priority where the OS allows it, so heavy UI redraws or
+    a slow on_beat in this process cannot make a click late. It is
+    controlled through a small shared-memory ControlBlock, and its
+    clicks come back through a SharedEventRing. A relay thread copies
+    them into `events` (an ordinary EventRing) and calls on_beat, so
+    callers use the same API as a Metronome.
+
+    Settings, sound sets and tempo maps are forwarded to the engine
+    process. Only relative and absolute scheduling are available, and
+    the engine always plays through the pygame backend on its own clock.
+
+    The engine process is started by start() and ends with stop().
+    """
+
+    def __init__(self, bpm, on_beat=None, beats_per_measure=4, scheduling=SCHEDULE_RELATIVE,
+                 apply_changes=APPLY_ON_BEAT, event_ring_size=EVENT_RING_SIZE, event_policy=DROP_OLDEST):
+        """
+        Initialize a stopped metronome.
+
+        Args:
+            bpm (int): Beats per minute
+            on_beat (callable, optional): Called with the beat number of
+                every beat, on the relay thread of this process
+            beats_per_measure (int, optional): Number of beats per measure, defaults to 4
+            scheduling (str, optional): SCHEDULE_RELATIVE or SCHEDULE_ABSOLUTE,
+                defaults to SCHEDULE_RELATIVE
+            apply_changes (str, optional): APPLY_ON_SUBDIVISION, APPLY_ON_BEAT or
+                APPLY_ON_BAR, defaults to APPLY_ON_BEAT
+            event_ring_size (int, optional): Slots of `events`, defaults to EVENT_RING_SIZE
+            event_policy (str, optional): DROP_OLDEST or DROP_NEWEST when a
+                reader of `events` falls behind, defaults to DROP_OLDEST
+
+        Raises:
+            ValueError: If BPM is outside valid range, the scheduling mode or
+                apply_changes is unknown, or the event ring options are invalid
+        """
+        if bpm is None or bpm < MIN_BPM or bpm > MAX_BPM:
+            raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+        if scheduling not in (SCHEDULE_RELATIVE, SCHEDULE_ABSOLUTE):
+            raise ValueError(CURRENT_LANG["INVALID_SCHEDULING"])
+        if apply_changes not in APPLY_MODES:
+            raise ValueError(CURRENT_LANG["INVALID_APPLY_MODE"])
+
+        self.is_running = False
+        self.current_beat = 1
+        self.scheduling = scheduling
+        self.apply_changes = apply_changes
+        self.on_beat = on_beat
+        self.events = EventRing(event_ring_size, event_policy)
+
+        # Settings snapshot, mirrored into the control block
+        self.requested = Config(bpm, 60 / bpm, beats_per_measure, NORMAL_MODE, PATTERNS[NORMAL_MODE])
+        self.config_lock = threading.Lock()
+        self.sound_set = None          # SoundSet sent to the engine, None for the default sounds
+        self.tempo_map = None          # TempoMap to follow instead of a fixed BPM
+        self.tempo_map_bar = 1         # Bar of the tempo map to start from
+
+        # Engine process and shared memory, while running
+        self.process = None
+        self.control = None
+        self.ring = None
+        self.doorbell = None
+        self.ready = None
+        self.stats_ready = None
+        self.sound_sets = None
+        self.relay = None
+        self.engine_stopped = threading.Event()
+        self.stats_request = 0
+
+    #-----------------------------------------------------
+    # Engine Process
+    #-----------------------------------------------------
+
+    def start(self):
+        """
+        Start the engine process, which plays from its first beat at once.
+        """
+        if self.is_running:
+            return
+        # A fresh interpreter: no threads or mixer state are inherited
+        context = multiprocessing.get_context("spawn")
+        self.control = ControlBlock()
+        self.ring = SharedEventRing()
+        self.doorbell = context.Event()
+        self.ready = context.Semaphore(0)
+        self.stats_ready = context.Event()
+        self.sound_sets = context.Queue()
+        if self.sound_set is not None:
+            self.sound_sets.put(self.sound_set)
+        self.control.write(self.requested, running=True)
+        self.engine_stopped.clear()
+
+        self.process = context.Process(
+            target=run_engine,
+            args=(self.control.name, self.ring.name, self.ring.size, self.doorbell, self.ready,
+                  self.stats_ready, self.sound_sets, self.scheduling, self.apply_changes,
+                  self.tempo_map, self.tempo_map_bar),
+            name="metronome-engine",
+            daemon=True,
+        )
+        self.process.start()
+        self.is_running = True
+        self.relay = threading.Thread(target=self._relay, name="engine-events", daemon=True)
+        self.relay.start()
+
+    def stop(self):
+        """
+        Stop the engine process and free the shared memory.
+        """
+        if not self.is_running:
+            return
+        self.is_running = False
+        with self.config_lock:
+            self.control.write(self.requested, running=False)
+        self.doorbell.set()
+        self.process.join(ENGINE_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+        # Let the relay hand over the last events, then free everything
+        self.engine_stopped.set()
+        self.ready.release()
+        self.relay.join()
+        self.ring.close(unlink=True)
+        self.control.close(unlink=True)
+        self.sound_sets.close()
+        self.process = self.control = self.ring = self.relay = self.sound_sets = None
+
+    def _relay(self):
+        """
+        Relay thread: copy the engine's events into `events` and call on_beat.
+        """
+        cursor = 0
+        while True:
+            stopped = self.engine_stopped.is_set()
+            self.ready.acquire(timeout=ENGINE_POLL_MS / 1000)
+            events, cursor = self.ring.read(cursor)
+            for event in events:
+                self.events.publish(event.beat, event.sound_id, event.deadline_ns)
+                if event.sound_id == SOUND_BEAT:
+                    self.current_beat = event.beat
+                    if self.on_beat:
+                        self.on_beat(event.beat)
+            if stopped:
+                return
+
+    @property
+    def priority(self):
+        """str: Scheduling priority of the engine process, or None if unknown."""
+        if self.control is None:
+            return None
+        return PRIORITY_NAMES.get(self.control.words[CONTROL_PRIORITY])
+
+    def timing_summary(self):
+        """
+        Ask the engine process for the timing of its clicks.
+
+        Returns:
+            TimingSummary: The summary (see Metronome.timing_summary), or
+                None if no click was timed, the metronome is stopped or
+                the engine process did not answer in time
+        """
+        if not self.is_running:
+            return None
+        self.stats_request += 1
+        self.control.words[CONTROL_STATS_REQUEST] = self.stats_request
+        self.doorbell.set()
+
+        # Sleep until the engine answers; an answer to an older request
+        # wakes us too, so check the answered request number every time
+        deadline = time.monotonic() + ENGINE_REPLY_TIMEOUT
+        while True:
+            self.stats_ready.clear()
+            if self.control.words[CONTROL_STATS_READY] == self.stats_request:
+                return self.control.read_stats()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.stats_ready.wait(remaining):
+                return None
+
+    def play_tempo_map(self, tempo_map, start_bar=1):
+        """
+        Start following a tempo map instead of the fixed BPM.
+
+        Args:
+            tempo_map (TempoMap): The compiled tempo map to play
+            start_bar (int, optional): Bar to start from, defaults to 1
+
+        Raises:
+            ValueError: If the start bar is not in the map
+        """
+        tempo_map.bar_beat(start_bar)  # Validate before touching any state
+        self.tempo_map = tempo_map
+        self.tempo_map_bar = start_bar
+        self.start()
+
+    #-----------------------------------------------------
+    # Settings
+    #-----------------------------------------------------
+
+    def _swap_config(self, **changes):
+        """
+        Publish a new settings snapshot to the engine process.
+
+        Args:
+            **changes: Config fields to change
+        """
+        with self.config_lock:
+            self.requested = self.requested._replace(**changes)
+            if self.is_running:
+                self.control.write(self.requested, running=True)
+                self.doorbell.set()
+
+    def update_bpm(self, new_bpm):
+        """
+        Update the metronome's BPM (beats per minute).
+
+        Args:
+            new_bpm (int): New BPM value
+
+        Raises:
+            ValueError: If BPM is outside valid range
+        """
+        if new_bpm is None or new_bpm < MIN_BPM or new_bpm > MAX_BPM:
+            raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+        self._swap_config(bpm=new_bpm, interval=60 / new_bpm)
+
+    def set_sounds(self, sound_set):
+        """
+        Change the sound files of the clicks.
+
+        The engine process loads them and switches at its next beat; a
+        stopped metronome starts with them.
+
+        Args:
+            sound_set (SoundSet): Accent, upbeat and subdivision WAV files
+
+        Raises:
+            FileNotFoundError: If any of the sound files is missing
+        """
+        # Checked here, so a missing file is reported to the caller
+        for path, message in zip(sound_set, ("NOWAVE_FILE_DOWN", "NOWAVE_FILE_UP", "NOWAVE_FILE_SUBDIVISION")):
+            if not Path(path).is_file():
+                raise FileNotFoundError(CURRENT_LANG[message].format(path))
+        with self.config_lock:
+            self.sound_set = sound_set
+            if self.is_running:
+                self.sound_sets.put(sound_set)
+                self.doorbell.set()
+
+    def set_time_signature(self, beats_per_measure):
+        """
+        Change the number of beats per measure.
+        The new measure starts on its first beat when the change is applied.
+
+        Args:
+            beats_per_measure (int): Number of beats per measure
+
+        Raises:
+            ValueError: If the number of beats is outside the valid range
+        """
+        if beats_per_measure is None or beats_per_measure < MIN_BEATS or beats_per_measure > MAX_BEATS:
+            raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+        self._swap_config(beats_per_measure=beats_per_measure)
+
+    def set_rhythm_mode(self, mode):
+        """
+        Set the rhythm mode (any pattern defined in patterns.json).
+        Selecting the current mode again switches back to normal.
+
+        Args:
+            mode (str): The rhythm mode to set
+
+        Returns:
+            str: The current rhythm mode after setting
+
+        Raises:
+            ValueError: If an invalid mode is provided
+        """
+        if mode not in PATTERNS:
+            raise ValueError(CURRENT_LANG["INVALID_MODE"])
+        if mode == self.rhythm_mode:
+            mode = NORMAL_MODE
+        self._swap_config(rhythm_mode=mode, pattern=PATTERNS[mode])
+        return mode
+
+    def get_subdivision_interval(self):
+        """
+        Calculate the average interval between clicks of the current rhythm mode.
+
+        Returns:
+            float: Time interval in seconds (exact for evenly spaced modes)
+        """
+        return self.interval / self.pattern.clicks
+
+    @property
+    def bpm(self):
+        """int: Requested beats per minute."""
+        return self.requested.bpm
+
+    @bpm.setter
+    def bpm(self, value):
+        self.update_bpm(value)
+
+    @property
+    def interval(self):
+        """float: Requested beat interval in seconds."""
+        return self.requested.interval
+
+    @interval.setter
+    def interval(self, value):
+        self.update_bpm(round(60 / value))
+
+    @property
+    def beats_per_measure(self):
+        """int: Requested beats per measure."""
+        return self.requested.beats_per_measure
+
+    @beats_per_measure.setter
+    def beats_per_measure(self, value):
+        self.set_time_signature(value)
+
+    @property
+    def rhythm_mode(self):
+        """str: Requested rhythm mode."""
+        return self.requested.rhythm_mode
+
+    @rhythm_mode.setter
+    def rhythm_mode(self, value):
+        # The control block stores the mode as an index into MODE_NAMES
+        if value not in PATTERNS:
+            raise ValueError(CURRENT_LANG["INVALID_MODE"])
+        self._swap_config(rhythm_mode=value, pattern=PATTERNS[value])
+
+    @property
+    def pattern(self):
+        """RhythmPattern: The compiled pattern of the requested rhythm mode."""
+        return self.requested.pattern
+
+
+def metronome_from_env(bpm, beats_per_measure=4):
+    """
+    Create the metronome the METRONOMNOM_ISOLATE environment variable asks for.
+
+    Args:
+        bpm (int): Beats per minute
+        beats_per_measure (int, optional): Number of beats per measure, defaults to 4
+
+    Returns:
+        Metronome or IsolatedMetronome: An isolated engine if the variable
+            is set to a non-empty value, else an in-process one (traced if
+            METRONOMNOM_TRACE is set)
+    """
+    if os.environ.get(ISOLATE_ENV):
+        return IsolatedMetronome(bpm, beats_per_measure=beats_per_measure)
+    return Metronome(bpm, beats_per_measure=beats_per_measure, tracer=tracer_from_env())
@@ -10,13 +10,27 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 # Import constants for BPM limits, commands, and language settings
 from constants import (
     MIN_BPM, MAX_BPM, QUIT_COMMAND, STOP_COMMAND,
-    EIGHTH_COMMAND, TRIPLET_COMMAND, SIXTEENTH_COMMAND, CURRENT_LANG
+    EIGHTH_COMMAND, TRIPLET_COMMAND, SIXTEENTH_COMMAND, QUINTUPLET_COMMAND,
+    SWING_COMMAND, DOTTED_COMMAND, SEPTUPLET_COMMAND, STATS_COMMAND, CURRENT_LANG
 )
 
-# Import the Metronome class and rhythm mode constants
+# Import the rhythm mode constants
 from metronome import (
-    Metronome, EIGHTH_MODE, TRIPLET_MODE, SIXTEENTH_MODE
+    EIGHTH_MODE, TRIPLET_MODE, SIXTEENTH_MODE, QUINTUPLET_MODE,
+    SWING_MODE, DOTTED_MODE, SEPTUPLET_MODE
 )
+from isolated import metronome_from_env
+
+# Map command characters to their rhythm modes
+MODE_COMMANDS = {
+    EIGHTH_COMMAND: EIGHTH_MODE,          # Two subdivisions per beat
+    TRIPLET_COMMAND: TRIPLET_MODE,        # Three subdivisions per beat
+    SIXTEENTH_COMMAND: SIXTEENTH_MODE,    # Four subdivisions per beat
+    QUINTUPLET_COMMAND: QUINTUPLET_MODE,  # Five subdivisions per beat
+    SWING_COMMAND: SWING_MODE,            # Swung eighths
+    DOTTED_COMMAND: DOTTED_MODE,          # Dotted eighth + sixteenth
+    SEPTUPLET_COMMAND: SEPTUPLET_MODE,    # Seven subdivisions grouped 2+2+3
+}
 
 #=======================================================
 # Input Validation Functions
@@ -90,7 +104,7 @@ def handle_quit_or_stop(user_input, metronome_instance):
 
 def handle_rhythm_mode(user_input, metronome_instance):
     """
-    Change the rhythm mode of the metronome (eighth notes, triplets, sixteenth notes).
+    Change the rhythm mode of the metronome (eighth notes, triplets, swing, ...).
     
     Args:
         user_input (str): The command entered by the user.
@@ -102,13 +116,8 @@ def handle_rhythm_mode(user_input, metronome_instance):
         return
     
     # Determine the rhythm mode based on user input
-    if user_input == EIGHTH_COMMAND:
-        mode = EIGHTH_MODE        # Two subdivisions per beat
-    elif user_input == TRIPLET_COMMAND:
-        mode = TRIPLET_MODE       # Three subdivisions per beat
-    elif user_input == SIXTEENTH_COMMAND:
-        mode = SIXTEENTH_MODE     # Four subdivisions per beat
-    else:
+    mode = MODE_COMMANDS.get(user_input)
+    if mode is None:
         return  # Unrecognized mode command
     
     # Apply the mode change and show feedback message
@@ -136,9 +145,8 @@ def handle_time_signature(user_input, metronome_instance):
     
     # Apply the time signature change
     if metronome_instance:
-        # Update running metronome
-        metronome_instance.beats_per_measure = beats
-        metronome_instance.current_beat = 1  # Reset to first beat
+        # Update running metronome; the new measure starts on beat 1
+        metronome_instance.set_time_signature(beats)
         print(CURRENT_LANG["TIME_SIG_CHANGE"].format(beats, beat_unit))
     else:
         # Just show message if metronome isn't running
@@ -146,6 +154,28 @@ def handle_time_signature(user_input, metronome_instance):
     
     return True  # Signal that we handled a time signature change
 
+def format_timing_stats(metronome_instance):
+    """
+    Describe the click timing of a metronome.
+    
+    Args:
+        metronome_instance (Metronome): The active metronome instance.
+    
+    Returns:
+        str: One line with jitter percentiles, drift and late clicks, and
+            the timer overruns if there were any.
+    """
+    if not metronome_instance:
+        return CURRENT_LANG["NOT_RUNNING"]
+    
+    summary = metronome_instance.timing_summary()
+    if summary is None:
+        return CURRENT_LANG["TIMING_EMPTY"]
+    line = CURRENT_LANG["TIMING_STATS"].format(**summary._asdict())
+    if summary.overruns:
+        line += CURRENT_LANG["TIMING_OVERRUNS"].format(summary.overruns)
+    return line
+
 def handle_bpm_update(user_input, metronome_instance):
     """
     Validate and update the BPM of the metronome.
@@ -162,8 +192,9 @@ def handle_bpm_update(user_input, metronome_instance):
     
     if is_valid:
         if metronome_instance is None:
-            # Create and start a new metronome
-            metronome_instance = Metronome(result)
+            # Create and start a new metronome (in an engine process if
+            # METRONOMNOM_ISOLATE is set, traced if METRONOMNOM_TRACE is set)
+            metronome_instance = metronome_from_env(result)
             metronome_instance.start()
             print(f"{CURRENT_LANG['METRONOME_STARTED_MSG']} {result} BPM")
         else:
@@ -207,20 +238,25 @@ def run_metronome():
                 continue
             
             # 2. Handle rhythm mode changes
-            elif user_input in {EIGHTH_COMMAND, TRIPLET_COMMAND, SIXTEENTH_COMMAND}:
+            elif user_input in MODE_COMMANDS:
                 handle_rhythm_mode(user_input, metronome_instance)
                 continue
             
-            # 3. Handle the special case for 0 BPM (easter egg)
+            # 3. Show timing statistics on demand
+            elif user_input == STATS_COMMAND:
+                print(format_timing_stats(metronome_instance))
+                continue
+            
+            # 4. Handle the special case for 0 BPM (easter egg)
             elif user_input == "0":
                 print(CURRENT_LANG["0_BPM"])
                 continue
             
-            # 4. Handle time signature changes
+            # 5. Handle time signature changes
             elif handle_time_signature(user_input, metronome_instance):
                 continue
             
-            # 5. Handle BPM updates (default if no other command matched)
+            # 6. Handle BPM updates (default if no other command matched)
             metronome_instance = handle_bpm_update(user_input, metronome_instance)
     
     # Handle graceful exit with Ctrl+C
@@ -241,11 +277,14 @@ def check_dependencies(check_textual=0):
     """
     # Check for pygame first
     try:
-        import pygame
-        # Test pygame.mixer initialization
-        pygame.mixer.init()
-        pygame.mixer.quit()
-    except (ImportError, pygame.error):
+        from audio import audio_session
+    except ImportError:
+        print(CURRENT_LANG["PYMIXER_ERROR"])
+        print(CURRENT_LANG["PYGAME_INSTALL_MSG"])
+        return False
+    
+    # Open the mixer for good: the metronomes started later reuse it
+    if not audio_session().open():
         print(CURRENT_LANG["PYMIXER_ERROR"])
         print(CURRENT_LANG["PYGAME_INSTALL_MSG"])
         return False
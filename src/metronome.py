@@ -1,27 +1,120 @@
 import os
-import time
 import threading
-import pygame.mixer
+from collections import deque, namedtuple, OrderedDict
 from pathlib import Path
 from constants import (
-    SOUND_FILE,
-    SOUND_FILE_UP,
-    SOUND_FILE_SUBDIVISION,
     CURRENT_LANG,
     MIN_BPM,
-    MAX_BPM
+    MAX_BPM,
+    MIN_BEATS,
+    MAX_BEATS,
+    LOOKAHEAD_MS,
+    SCHEDULE_AHEAD_TIME,
+    MEASURE_CACHE_SIZE,
+    EVENT_RING_SIZE
+)
+from patterns import PATTERNS, SOUND_BEAT, SOUND_GROUP
+from events import EventRing, DROP_OLDEST
+from clock import PrecisionClock
+from audio import PygameBackend, NullBackend, DEFAULT_SOUND_SET
+from timing import TimingStats
+from tracing import (
+    PHASE_CALLBACK, PHASE_MAIN_BEAT, PHASE_SUBDIVISION_WAIT, PHASE_SUBDIVISION,
+    PHASE_INCREMENT, PHASE_SLEEP
 )
 
 # Hide Pygame's startup message
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
 #-------------------------------------------------------
-# Rhythm mode constants
+# Rhythm mode constants (defined in patterns.json)
 #-------------------------------------------------------
 NORMAL_MODE = "normal"      # Regular beats only
 EIGHTH_MODE = "eighth"      # Two subdivisions per beat
 TRIPLET_MODE = "triplet"    # Three subdivisions per beat
 SIXTEENTH_MODE = "sixteenth"  # Four subdivisions per beat
+QUINTUPLET_MODE = "quintuplet"  # Five subdivisions per beat
+SWING_MODE = "swing"        # Swung eighths (2/3 + 1/3)
+DOTTED_MODE = "dotted"      # Dotted eighth + sixteenth
+SEPTUPLET_MODE = "septuplet"  # Seven subdivisions grouped 2+2+3
+
+#-------------------------------------------------------
+# Scheduling mode constants
+#-------------------------------------------------------
+SCHEDULE_RELATIVE = "relative"  # Wait relative to the start of each beat
+SCHEDULE_ABSOLUTE = "absolute"  # Absolute deadlines on a monotonic clock
+SCHEDULE_LOOKAHEAD = "lookahead"  # Queue rendered windows ahead of time
+SCHEDULE_LOOP = "loop"          # Loop one pre-rendered measure on the sound card
+SCHEDULING_MODES = {SCHEDULE_RELATIVE, SCHEDULE_ABSOLUTE, SCHEDULE_LOOKAHEAD, SCHEDULE_LOOP}
+
+# When setting changes take effect
+APPLY_ON_SUBDIVISION = "subdivision"  # At the next click, interrupting the current wait
+APPLY_ON_BEAT = "beat"                # At the next beat line
+APPLY_ON_BAR = "bar"                  # At the next bar line
+APPLY_MODES = {APPLY_ON_SUBDIVISION, APPLY_ON_BEAT, APPLY_ON_BAR}
+APPLY_RANK = {APPLY_ON_SUBDIVISION: 0, APPLY_ON_BEAT: 1, APPLY_ON_BAR: 2}
+
+# Immutable snapshot of the settings the audio thread plays with
+Config = namedtuple("Config", ["bpm", "interval", "beats_per_measure", "rhythm_mode", "pattern"])
+
+NS_PER_MINUTE = 60_000_000_000  # Nanoseconds in one minute
+
+
+def click_deadline_ns(anchor_ns, step, bpm, steps_per_beat):
+    """
+    Calculate the absolute deadline of a click on a fixed tempo grid.
+    
+    The deadline is computed from the grid anchor with integer arithmetic,
+    so the error never exceeds one nanosecond, no matter how many clicks
+    have passed since the anchor.
+    
+    Args:
+        anchor_ns (int): Monotonic time of step 0 in nanoseconds
+        step (int): Grid steps since the anchor (beat * steps_per_beat + position)
+        bpm (int): Beats per minute of the grid
+        steps_per_beat (int): Grid steps per beat (RhythmPattern.steps)
+        
+    Returns:
+        int: Monotonic deadline of the click in nanoseconds
+    """
+    return anchor_ns + (step * NS_PER_MINUTE) // (bpm * steps_per_beat)
+
+
+def render_channel_segment(clicks, segment_start, segment_frames, frame_size):
+    """
+    Render one window of a channel's click stream into raw PCM bytes.
+    
+    A click is cut off when the next click on the same channel starts,
+    exactly like a new Channel.play call would cut it off.
+    
+    Args:
+        clicks (list): (start_frame, raw_bytes) pairs sorted by start frame,
+            the first one may start before the window and spill into it
+        segment_start (int): First frame of the window
+        segment_frames (int): Length of the window in frames
+        frame_size (int): Bytes per frame in the mixer format
+        
+    Returns:
+        bytes: Raw PCM data for the window, silence where no click sounds
+    """
+    buffer = bytearray(segment_frames * frame_size)
+    segment_end = segment_start + segment_frames
+    
+    for index, (start, raw) in enumerate(clicks):
+        # A click lasts until its sound ends or the next click starts
+        end = start + len(raw) // frame_size
+        if index + 1 < len(clicks):
+            end = min(end, clicks[index + 1][0])
+        end = min(end, segment_end)
+        begin = max(start, segment_start)
+        if begin >= end:
+            continue
+        
+        # Copy the audible part of the click into the window
+        buffer[(begin - segment_start) * frame_size:(end - segment_start) * frame_size] = \
+            raw[(begin - start) * frame_size:(end - start) * frame_size]
+    
+    return bytes(buffer)
 
 
 class Metronome:
@@ -30,14 +123,17 @@ class Metronome:
     with support for different rhythm modes and time signatures.
     
     Features:
-    - Multiple rhythm modes (normal, eighth notes, triplets, sixteenth notes)
+    - Data-driven rhythm modes (see patterns.json), from quarter notes
+      to swing, dotted and grouped subdivisions
     - Customizable tempo (BPM)
     - Variable time signatures
     - Accent on first beat of measure
     - Beat callback for UI integration
     """
     
-    def __init__(self, bpm, on_beat=None, beats_per_measure=4):
+    def __init__(self, bpm, on_beat=None, beats_per_measure=4, scheduling=SCHEDULE_RELATIVE, scheduler=None,
+                 apply_changes=APPLY_ON_BEAT, tracer=None, clock=None, audio=None,
+                 event_ring_size=EVENT_RING_SIZE, event_policy=DROP_OLDEST):
         """
         Initialize a new metronome instance.
         
@@ -45,23 +141,62 @@ class Metronome:
             bpm (int): Beats per minute
             on_beat (function, optional): Callback function when a beat occurs
             beats_per_measure (int, optional): Number of beats per measure, defaults to 4
+            scheduling (str, optional): Scheduling mode, defaults to SCHEDULE_RELATIVE
+            scheduler (Scheduler, optional): Shared scheduler thread to run on instead
+                of a thread of its own (absolute scheduling only)
+            apply_changes (str, optional): APPLY_ON_SUBDIVISION, APPLY_ON_BEAT or
+                APPLY_ON_BAR, defaults to APPLY_ON_BEAT
+            tracer (BeatTracer, optional): Records the phases of the beat loop
+                and dumps them when the metronome stops, defaults to None
+            clock (SystemClock, PrecisionClock, TimerfdClock or VirtualClock, optional): Time
+                source of the engine, defaults to a PrecisionClock
+            audio (optional): Audio backend (see audio.py), defaults to a
+                PygameBackend, or a NullBackend if there is no audio device
+            event_ring_size (int, optional): Slots of the beat event ring,
+                defaults to EVENT_RING_SIZE
+            event_policy (str, optional): DROP_OLDEST or DROP_NEWEST when a
+                reader falls behind, defaults to DROP_OLDEST
             
         Raises:
-            ValueError: If BPM is outside valid range
+            ValueError: If BPM is outside valid range, the scheduling mode is
+                unknown, the audio backend cannot play it or the event ring
+                options are invalid
         """
         # Input validation
         if bpm is None or bpm < MIN_BPM or bpm > MAX_BPM:
             raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+        if scheduling not in SCHEDULING_MODES:
+            raise ValueError(CURRENT_LANG["INVALID_SCHEDULING"])
+        if scheduler is not None and scheduling != SCHEDULE_ABSOLUTE:
+            raise ValueError(CURRENT_LANG["INVALID_SCHEDULER"])
+        if apply_changes not in APPLY_MODES:
+            raise ValueError(CURRENT_LANG["INVALID_APPLY_MODE"])
+        # The sound card keeps real time, and so does a shared scheduler
+        clock = clock if clock is not None else PrecisionClock()
+        if not clock.realtime and (scheduler is not None or scheduling in (SCHEDULE_LOOKAHEAD, SCHEDULE_LOOP)):
+            raise ValueError(CURRENT_LANG["INVALID_CLOCK"])
         
         #----------------------------
         # State variables
         #----------------------------
         self.is_running = False
-        self.bpm = bpm
-        self.interval = 60 / self.bpm  # Beat interval in seconds
         self.current_beat = 1          # Start on first beat
-        self.beats_per_measure = beats_per_measure
-        self.rhythm_mode = NORMAL_MODE
+        self.scheduling = scheduling
+        self.apply_changes = apply_changes
+        self.origin_ns = None          # Session origin of the absolute grid
+        self.notes_in_queue = deque()  # (time_ns, beat) of queued, not yet audible beats
+        self.measure_cache = OrderedDict()  # (bpm, beats, mode) -> rendered measure loop
+        self.tempo_map = None          # TempoMap to follow instead of a fixed BPM
+        self.tempo_map_bar = 1         # Bar of the tempo map to start from
+        
+        #----------------------------
+        # Settings snapshots
+        #----------------------------
+        # The UI swaps in a new `requested` snapshot, and the audio thread
+        # takes it over as `config` at the next click, beat or bar line
+        self.config = Config(bpm, 60 / bpm, beats_per_measure, NORMAL_MODE, PATTERNS[NORMAL_MODE])
+        self.requested = self.config
+        self.config_lock = threading.Lock()  # Serializes writers, never taken by the audio thread
         
         #----------------------------
         # Audio variables
@@ -69,21 +204,43 @@ class Metronome:
         self.sound = None              # Main beat sound
         self.sound_up = None           # Upbeat sound
         self.sound_subdivision = None  # Subdivision sound
+        self.sound_set = None          # SoundSet the sounds were loaded from
+        
+        # Like the settings, a new sound set is published as a snapshot,
+        # (sound_set, sound, sound_up, sound_subdivision), and the audio
+        # thread takes it over at the next beat
+        self.requested_sounds = None
+        self.playing_sounds = None
+        self.held_sounds = []          # Sounds acquired from the backend and not released yet
         
         #----------------------------
         # Thread control
         #----------------------------
         self.beat_thread = None
+        self.scheduler = scheduler
+        self.clock = clock                   # Time source for deadlines and sleeps
+        self.wake_event = threading.Event()  # Interrupts waits on stop or changes
         
-        # Callback for UI updates or other notifications
+        # Callback for UI updates or other notifications. It runs on the
+        # audio thread, so slow consumers should read `events` instead.
         self.on_beat = on_beat
+        self.events = EventRing(event_ring_size, event_policy)
         
-        # Initialize audio system
-        try:
-            pygame.mixer.init()
-        except pygame.error:
-            print(CURRENT_LANG["PYMIXER_ERROR"])
-            return
+        # Per-click timing of the audio thread (see timing_summary)
+        self.timing = TimingStats()
+        self.overruns_at_start = 0     # Overrun total of the clock or scheduler at start()
+        self.tracer = tracer
+        
+        # Initialize audio system. Without an audio device the metronome
+        # still runs, silently, and records its clicks in a NullBackend.
+        self.audio = audio if audio is not None else PygameBackend()
+        self.audio_open = False        # Backend opened and not closed by a stop yet
+        self.run_pending = False       # Started, and not torn down by _finish_run() yet
+        self._open_audio()
+        
+        # The lookahead and loop modes queue rendered audio on the sound card
+        if scheduling in (SCHEDULE_LOOKAHEAD, SCHEDULE_LOOP) and not self.audio.streaming:
+            raise ValueError(CURRENT_LANG["INVALID_BACKEND"])
         
         # Load audio files
         self.load_sound()
@@ -92,75 +249,197 @@ class Metronome:
     # Sound Management Methods
     #=======================================================
     
+    def _open_audio(self):
+        """
+        Open the audio backend, falling back to a NullBackend without an audio device.
+        """
+        if not self.audio.open():
+            print(CURRENT_LANG["PYMIXER_ERROR"])
+            self.audio = NullBackend()
+            self.audio.open()
+        self.audio_open = True
+    
     def load_sound(self):
         """
-        Load sound files for metronome beats and subdivisions.
+        Load the default sound files for metronome beats and subdivisions.
         
         Raises:
             FileNotFoundError: If any required sound file is missing
         """
-        # Create Path objects for each sound file
-        path = Path(SOUND_FILE)
-        path_up = Path(SOUND_FILE_UP)
-        path_subdivision = Path(SOUND_FILE_SUBDIVISION)
-
+        self.set_sounds(DEFAULT_SOUND_SET)
+    
+    def set_sounds(self, sound_set):
+        """
+        Change the sound files of the clicks.
+        
+        The files are loaded here, on the caller's thread; the pygame
+        backend takes them from the audio session's cache, so only files
+        no metronome loaded before are decoded. A running metronome
+        switches at the next beat without stopping (at the next bar with
+        loop scheduling, whose measures are rendered with the sounds).
+        
+        Args:
+            sound_set (SoundSet): Accent, upbeat and subdivision WAV files
+            
+        Raises:
+            FileNotFoundError: If any of the sound files is missing
+        """
         # Verify all sound files exist before trying to load them
-        if not path.is_file():
-            raise FileNotFoundError(CURRENT_LANG["NOWAVE_FILE_DOWN"])
-        if not path_up.is_file():
-            raise FileNotFoundError(CURRENT_LANG["NOWAVE_FILE_UP"])
-        if not path_subdivision.is_file():
-            raise FileNotFoundError(CURRENT_LANG["NOWAVE_FILE_SUBDIVISION"])
+        for path, message in zip(sound_set, ("NOWAVE_FILE_DOWN", "NOWAVE_FILE_UP", "NOWAVE_FILE_SUBDIVISION")):
+            if not Path(path).is_file():
+                raise FileNotFoundError(CURRENT_LANG[message].format(path))
+        
+        # Load sounds into the audio backend
+        sounds = (sound_set,) + tuple(self._acquire_sound(path) for path in sound_set)
+        with self.config_lock:
+            replaced, self.requested_sounds = self.requested_sounds, sounds
+        
+        # The replaced set stays alive as long as it is playing, the
+        # backend may only drop it from its cache
+        if replaced is not None:
+            for sound in replaced[1:]:
+                self._release_sound(sound)
+        if not self.is_running:
+            self._take_sounds()
+    
+    def _acquire_sound(self, path):
+        """
+        Load a sound into the backend and hold it until _release_sound().
+        
+        Args:
+            path (str): WAV file of the sound
+            
+        Returns:
+            The backend's sound handle
+        """
+        sound = self.audio.load_sound(path)
+        with self.config_lock:
+            self.held_sounds.append(sound)
+        return sound
+    
+    def _release_sound(self, sound):
+        """
+        Give a sound back to the backend, unless it was released already
+        (by stop(), for a set that is still playing).
+        
+        Args:
+            sound: A sound handle from _acquire_sound()
+        """
+        with self.config_lock:
+            # Compared by identity: numpy sample arrays have no plain ==
+            index = next((i for i, held in enumerate(self.held_sounds) if held is sound), None)
+            if index is None:
+                return
+            del self.held_sounds[index]
+        self.audio.release_sound(sound)
+    
+    def release_sounds(self):
+        """
+        Give every held sound back to the backend, so its cache may drop
+        them. The metronome keeps the sound files it plays and takes them
+        again when it starts; called by stop().
+        """
+        with self.config_lock:
+            held, self.held_sounds = self.held_sounds, []
+        for sound in held:
+            self.audio.release_sound(sound)
+    
+    def _hold_sounds(self):
+        """
+        Take the sounds again after release_sounds(), so the backend's
+        cache keeps them while the metronome plays. Called by start().
+        """
+        # The old handles were all released, so none of them is given back
+        # here (the cache may hand out the very same objects again)
+        sound_set = self.requested_sounds[0]
+        sounds = (sound_set,) + tuple(self._acquire_sound(path) for path in sound_set)
+        with self.config_lock:
+            self.requested_sounds = sounds
+        self._take_sounds()
+    
+    def _take_sounds(self):
+        """
+        Take over the last requested sound set. Called by the audio thread
+        on beat lines.
         
-        # Load sounds into pygame mixer
-        self.sound = pygame.mixer.Sound(SOUND_FILE)
-        self.sound_up = pygame.mixer.Sound(SOUND_FILE_UP)
-        self.sound_subdivision = pygame.mixer.Sound(SOUND_FILE_SUBDIVISION)
+        Returns:
+            bool: True if the sounds changed
+        """
+        requested = self.requested_sounds
+        if requested is self.playing_sounds:
+            return False
+        self.sound_set, self.sound, self.sound_up, self.sound_subdivision = requested
+        self.playing_sounds = requested
+        return True
+
+    def _sounds_loaded(self):
+        """
+        Check that every sound was loaded (sound handles depend on the backend).
+        
+        Returns:
+            bool: True if the beat, upbeat and subdivision sounds are loaded
+        """
+        return all(sound is not None for sound in (self.sound, self.sound_up, self.sound_subdivision))
 
-    def _play_main_beat(self, channel, channel_up):
+    def _notify_beat(self, beat, deadline_ns):
+        """
+        Publish a beat event and call on_beat.
+        
+        Args:
+            beat (int): Beat number in the measure
+            deadline_ns (int): Scheduled monotonic time of the beat
+        """
+        self.events.publish(beat, SOUND_BEAT, deadline_ns)
+        if self.on_beat:
+            self.on_beat(beat)
+
+    def _play_main_beat(self, channel, channel_up, deadline_ns):
         """
         Play the main beat sound with appropriate accent.
         
         Args:
-            channel (pygame.mixer.Channel): Channel for regular beats
-            channel_up (pygame.mixer.Channel): Channel for accented beats
+            channel: Backend channel for regular beats
+            channel_up: Backend channel for accented beats
+            deadline_ns (int): Scheduled time of the beat
         """
+        # A new sound set starts on the beat
+        self._take_sounds()
+        
         # First beat gets accent (different sound and channel)
         if self.current_beat == 1:
-            channel_up.play(self.sound)
+            self.audio.play(channel_up, self.sound, deadline_ns)
         else:
-            channel.play(self.sound_up)
+            self.audio.play(channel, self.sound_up, deadline_ns)
     
-    def _play_subdivisions(self, channel_subdivision, subdivision_interval):
+    def _play_subdivisions(self, pattern, channel, channel_subdivision, interval):
         """
-        Play subdivision sounds based on current rhythm mode.
+        Play the clicks of a rhythm pattern that follow the main beat.
         
         Args:
-            channel_subdivision (pygame.mixer.Channel): Channel for subdivision sounds
-            subdivision_interval (float): Time interval for subdivisions
+            pattern (RhythmPattern): The compiled pattern of the current beat
+            channel: Backend channel for group accents
+            channel_subdivision: Backend channel for subdivision sounds
+            interval (float): Beat interval in seconds
         """
-        # Skip if in normal mode (no subdivisions)
-        if self.rhythm_mode == NORMAL_MODE:
-            return
-        
-        # Wait for first subdivision after main beat
-        pygame.time.wait(int(subdivision_interval * 1000))
-        
-        # Determine number of subdivisions based on rhythm mode
-        if self.rhythm_mode == EIGHTH_MODE:
-            subdivisions = 2      # Two sounds per beat
-        elif self.rhythm_mode == TRIPLET_MODE:
-            subdivisions = 3      # Three sounds per beat
-        elif self.rhythm_mode == SIXTEENTH_MODE:
-            subdivisions = 4      # Four sounds per beat
-        else:
-            subdivisions = 1      # Fallback, should never happen
-            
-        # Play remaining subdivision sounds after the main beat
-        # (-1 because we already played the main beat)
-        for _ in range(subdivisions - 1):
-            channel_subdivision.play(self.sound_subdivision)
-            pygame.time.wait(int(subdivision_interval * 1000))
+        # Walk the precompiled offsets (the main beat is already played)
+        tracer = self.tracer
+        previous = 0.0
+        for offset, sound_id in zip(pattern.offsets[1:], pattern.sound_ids[1:]):
+            gap_ns = int((offset - previous) * interval * 1_000_000_000)
+            wait_ns = self.clock.now_ns()
+            deadline_ns = wait_ns + gap_ns
+            if not self._wait_until_ns(deadline_ns):
+                return  # Stopped
+            play_ns = self.clock.now_ns()
+            if sound_id == SOUND_GROUP:
+                self.audio.play(channel, self.sound_up, deadline_ns)
+            else:
+                self.audio.play(channel_subdivision, self.sound_subdivision, deadline_ns)
+            self.timing.record(deadline_ns, play_ns, play_ns - deadline_ns)
+            if tracer is not None:
+                tracer.span(PHASE_SUBDIVISION_WAIT, wait_ns, play_ns, play_ns - deadline_ns)
+                tracer.span(PHASE_SUBDIVISION, play_ns, self.clock.now_ns())
+            previous = offset
     
     #=======================================================
     # Core Metronome Control Methods
@@ -169,25 +448,90 @@ class Metronome:
     def start(self):
         """
         Start the metronome if it's not already running and sounds are loaded.
-        Creates and launches a thread for the beat playback loop.
+        Creates and launches a thread for the beat playback loop, or
+        registers the click generator with the shared scheduler. A
+        metronome started again after stop() reopens its audio backend and
+        takes its sounds again.
         """
-        if not self.is_running and self.sound:
+        if self.is_running or self.sound is None:
+            return
+        if not self.audio_open:
+            self._open_audio()
+        if not self.held_sounds:
+            self._hold_sounds()
+        if self.sound is not None:
             self.is_running = True
-            self.beat_thread = threading.Thread(target=self.play_beats)
+            self.run_pending = True
+            self.timing.reset()
+            self.overruns_at_start = self._overrun_total()
+            if self.scheduler is not None:
+                clicks = self.tempo_map_clicks() if self.tempo_map else self.absolute_clicks()
+                self.scheduler.register(self, clicks)
+                return
+            targets = {
+                SCHEDULE_RELATIVE: self.play_beats,
+                SCHEDULE_ABSOLUTE: self.play_beats_absolute,
+                SCHEDULE_LOOKAHEAD: self.play_beats_lookahead,
+                SCHEDULE_LOOP: self.play_beats_loop,
+            }
+            target = self.play_beats_tempo_map if self.tempo_map else targets[self.scheduling]
+            self.beat_thread = threading.Thread(target=target)
+            self.clock.track(self.beat_thread)
             self.beat_thread.start()
     
+    def play_tempo_map(self, tempo_map, start_bar=1):
+        """
+        Start following a tempo map instead of the fixed BPM.
+        
+        Args:
+            tempo_map (TempoMap): The compiled tempo map to play
+            start_bar (int, optional): Bar to start from, defaults to 1
+            
+        Raises:
+            ValueError: If the start bar is not in the map
+        """
+        tempo_map.bar_beat(start_bar)  # Validate before touching any state
+        self.tempo_map = tempo_map
+        self.tempo_map_bar = start_bar
+        self.start()
+    
     def stop(self):
         """
         Stop the metronome if it's running and clean up resources.
-        Waits for the beat thread to finish and closes the audio system.
+        Waits for the beat thread to finish (on a shared scheduler it
+        unregisters instead) and closes the audio backend; the pygame
+        mixer itself stays open in the audio session, ready for the next
+        start. A tracer writes its trace file. The sounds are released to
+        the backend's cache, even if the metronome never started.
         """
         if self.is_running:
             self.is_running = False  # Signal thread to stop
-            if self.sound:
-                self.sound.stop()    # Stop any playing sounds
-            if self.beat_thread:
+            self.wake_event.set()    # Cut the current wait short
+            self.clock.interrupt()
+            if self.sound is not None:
+                self.audio.stop_sound(self.sound)  # Stop any playing sounds
+            if self.scheduler is not None:
+                self.scheduler.unregister(self)
+            elif self.beat_thread and self.beat_thread is not threading.current_thread():
                 self.beat_thread.join()  # Wait for thread to end
-            pygame.mixer.quit()      # Clean up audio system
+        self._finish_run()
+    
+    def _finish_run(self):
+        """
+        Tear down a run, from stop() or when a tempo map runs out. Closes
+        the audio backend, writes the tracer's trace and the run's
+        overruns, then releases the sounds. Safe to call twice: only the
+        first call after a start() closes and writes anything.
+        """
+        with self.config_lock:
+            finishing, self.run_pending = self.run_pending, False
+        if finishing:
+            self.audio.close()       # Release the audio backend (finishes a WAV sink's file)
+            self.audio_open = False
+            if self.tracer is not None:
+                self.tracer.dump()   # Write the trace of this run
+            self._count_overruns()   # Keep this run's overruns for timing_summary()
+        self.release_sounds()
     
     def update_bpm(self, new_bpm):
         """
@@ -204,20 +548,127 @@ class Metronome:
             raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
         
         self.bpm = new_bpm
-        self.interval = 60 / new_bpm  # Recalculate interval in seconds
+
+    def set_time_signature(self, beats_per_measure):
+        """
+        Change the number of beats per measure.
+        The new measure starts on its first beat when the change is applied.
+        
+        Args:
+            beats_per_measure (int): Number of beats per measure
+            
+        Raises:
+            ValueError: If the number of beats is outside the valid range
+        """
+        self.beats_per_measure = beats_per_measure
+
+    #-----------------------------------------------------
+    # Settings Snapshots
+    #-----------------------------------------------------
+
+    def _swap_config(self, **changes):
+        """
+        Publish a new requested snapshot with some settings changed.
+        
+        The snapshot is replaced in one assignment, so the audio thread
+        always sees a consistent set of settings. When the metronome is
+        stopped it takes effect at once.
+        
+        Args:
+            **changes: Config fields to change
+        """
+        with self.config_lock:
+            self.requested = self.requested._replace(**changes)
+            if not self.is_running:
+                self._apply_config(self.requested)
+        self.wake_event.set()  # Let a waiting loop pick it up
+        self.clock.interrupt()
+
+    def _apply_config(self, config):
+        """
+        Make a snapshot the one being played (audio thread, or while stopped).
+        
+        Args:
+            config (Config): The snapshot to play
+        """
+        if config.beats_per_measure != self.config.beats_per_measure:
+            self.current_beat = 1  # A new meter starts a new measure
+        self.config = config
+
+    def _take_config(self, boundary):
+        """
+        Take over the requested snapshot if changes may apply at this point.
+        
+        Args:
+            boundary (str): The point the audio thread is at: APPLY_ON_SUBDIVISION
+                (any click), APPLY_ON_BEAT or APPLY_ON_BAR
+            
+        Returns:
+            Config: The snapshot to play from here on
+        """
+        requested = self.requested
+        if requested is not self.config and APPLY_RANK[boundary] >= APPLY_RANK[self.apply_changes]:
+            self._apply_config(requested)
+        return self.config
+
+    @property
+    def bpm(self):
+        """int: Requested beats per minute."""
+        return self.requested.bpm
+
+    @bpm.setter
+    def bpm(self, value):
+        self._swap_config(bpm=value, interval=60 / value)
+
+    @property
+    def interval(self):
+        """float: Requested beat interval in seconds."""
+        return self.requested.interval
+
+    @interval.setter
+    def interval(self, value):
+        # Tempos are whole BPM, like everywhere else
+        self.update_bpm(round(60 / value))
+
+    @property
+    def beats_per_measure(self):
+        """int: Requested number of beats per measure."""
+        return self.requested.beats_per_measure
+
+    @beats_per_measure.setter
+    def beats_per_measure(self, value):
+        if value is None or value < MIN_BEATS or value > MAX_BEATS:
+            raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+        self._swap_config(beats_per_measure=value)
+
+    @property
+    def rhythm_mode(self):
+        """str: Requested rhythm mode."""
+        return self.requested.rhythm_mode
+
+    @rhythm_mode.setter
+    def rhythm_mode(self, value):
+        self._swap_config(rhythm_mode=value, pattern=PATTERNS.get(value, PATTERNS[NORMAL_MODE]))
 
     def increment_beat(self):
         """
         Increment the current beat counter, resetting at the end of a measure.
         """
-        if self.current_beat < self.beats_per_measure:
+        if self.current_beat < self.config.beats_per_measure:
             self.current_beat += 1   # Move to next beat in measure
         else:
             self.current_beat = 1    # Reset to first beat of new measure
 
+    @property
+    def pattern(self):
+        """
+        RhythmPattern: The compiled pattern of the requested rhythm mode.
+        """
+        return self.requested.pattern
+
     def set_rhythm_mode(self, mode):
         """
-        Set the rhythm mode (normal, eighth, triplet, or sixteenth).
+        Set the rhythm mode (any pattern defined in patterns.json).
         
         Args:
             mode (str): The rhythm mode to set
@@ -228,11 +679,8 @@ class Metronome:
         Raises:
             ValueError: If an invalid mode is provided
         """
-        # Define valid rhythm modes
-        valid_modes = {NORMAL_MODE, EIGHTH_MODE, TRIPLET_MODE, SIXTEENTH_MODE}
-        
-        # Validate the requested mode
-        if mode not in valid_modes:
+        # Validate the requested mode against the pattern table
+        if mode not in PATTERNS:
             raise ValueError(CURRENT_LANG["INVALID_MODE"])
         
         # Toggle behavior: if selecting current mode, switch to normal
@@ -243,24 +691,54 @@ class Metronome:
         
         return self.rhythm_mode
 
-    def get_subdivision_interval(self):
+    def timing_summary(self):
         """
-        Calculate interval time for subdivisions based on rhythm mode.
+        Summarize the click timing of the current or last run.
+        
+        Lookahead and loop scheduling leave click placement to the sound
+        card and record nothing.
         
         Returns:
-            float: Time interval in seconds for the current subdivision
+            TimingSummary: Jitter p50/p99/max, drift and late count in
+                milliseconds, and the overruns of a timerfd clock or
+                scheduler, or None if no click was timed yet
         """
-        base_interval = self.interval  # Current beat interval (60/bpm)
+        if self.is_running:
+            self._count_overruns()
+        return self.timing.summary()
+
+    def _overrun_total(self):
+        """
+        Returns:
+            int: Overruns counted so far by the timerfd scheduler or clock
+                this metronome waits on (0 for the other time sources)
+        """
+        source = self.scheduler if self.scheduler is not None else self.clock
+        return getattr(source, "overruns", 0)
+
+    def _count_overruns(self):
+        """
+        Store the overruns since start() in the timing record.
+        """
+        self.timing.overruns = self._overrun_total() - self.overruns_at_start
+
+    def get_subdivisions(self):
+        """
+        Get the number of clicks per beat for the current rhythm mode.
         
-        # Return smaller intervals for subdivision modes
-        if self.rhythm_mode == EIGHTH_MODE:
-            return base_interval / 2  # Two subdivisions per beat
-        elif self.rhythm_mode == TRIPLET_MODE:
-            return base_interval / 3  # Three subdivisions per beat
-        elif self.rhythm_mode == SIXTEENTH_MODE:
-            return base_interval / 4  # Four subdivisions per beat
+        Returns:
+            int: Clicks per beat (1 in normal mode)
+        """
+        return self.pattern.clicks
+
+    def get_subdivision_interval(self):
+        """
+        Calculate the average interval between clicks of the current rhythm mode.
         
-        return base_interval  # Normal mode, no subdivision
+        Returns:
+            float: Time interval in seconds (exact for evenly spaced modes)
+        """
+        return self.interval / self.pattern.clicks
     
     def play_beats(self):
         """
@@ -268,35 +746,492 @@ class Metronome:
         This runs in a separate thread to maintain timing accuracy.
         """
         # Set up audio channels for different sound types
-        channel = pygame.mixer.Channel(0)             # Regular beats
-        channel_up = pygame.mixer.Channel(1)          # First beat accent
-        channel_subdivision = pygame.mixer.Channel(2) # Subdivisions
+        channel = self.audio.channel(0)             # Regular beats
+        channel_up = self.audio.channel(1)          # First beat accent
+        channel_subdivision = self.audio.channel(2) # Subdivisions
+        
+        # The first beat is due now; the drift is measured against a
+        # perfect grid starting at the same time
+        deadline_ns = grid_ns = self.clock.now_ns()
+        tracer = self.tracer
         
         # Main beat playback loop
         while self.is_running:
-            start_time = time.time()  # Track when we start this beat cycle
-            subdivision_interval = self.get_subdivision_interval()
+            start_ns = self.clock.now_ns()  # Track when we start this beat cycle
+            config = self._take_config(APPLY_ON_BAR if self.current_beat == 1 else APPLY_ON_BEAT)
 
             # Safety check - verify sounds are loaded
-            if not all([self.sound, self.sound_up, self.sound_subdivision]):
+            if not self._sounds_loaded():
                 print(CURRENT_LANG["WAV_NOT_LOADED"])
                 break
 
             # Notify UI or other listeners about the beat
-            if self.on_beat:
-                self.on_beat(self.current_beat)
+            notify_ns = self.clock.now_ns()
+            self._notify_beat(self.current_beat, start_ns)
 
             # Play the main beat sound
-            self._play_main_beat(channel, channel_up)
+            play_ns = self.clock.now_ns()
+            self._play_main_beat(channel, channel_up, deadline_ns)
+            self.timing.record(deadline_ns, play_ns, start_ns - deadline_ns, play_ns - notify_ns, grid_ns)
+            if tracer is not None:
+                tracer.span(PHASE_CALLBACK, notify_ns, play_ns)
+                tracer.span(PHASE_MAIN_BEAT, play_ns, self.clock.now_ns())
 
             # Play any subdivision beats if needed
-            self._play_subdivisions(channel_subdivision, subdivision_interval)
+            self._play_subdivisions(config.pattern, channel, channel_subdivision, config.interval)
+
+            # Move to next beat in the measure
+            increment_ns = self.clock.now_ns()
+            self.increment_beat()
+            sleep_ns = self.clock.now_ns()
+
+            # Wait until the next beat, measured from the start of this one
+            # so processing time does not stretch the tempo. A tempo change
+            # applied on the next subdivision moves the pending beat.
+            on_change = self.apply_changes == APPLY_ON_SUBDIVISION
+            while self.is_running:
+                deadline_ns = start_ns + int(config.interval * 1_000_000_000)
+                if self._wait_until_ns(deadline_ns, on_change):
+                    break
+                config = self._take_config(APPLY_ON_SUBDIVISION)
+            grid_ns += int(config.interval * 1_000_000_000)
+            if tracer is not None:
+                woke_ns = self.clock.now_ns()
+                tracer.span(PHASE_INCREMENT, increment_ns, sleep_ns)
+                tracer.span(PHASE_SLEEP, sleep_ns, woke_ns, woke_ns - deadline_ns)
+
+    def _wait_until_ns(self, deadline_ns, on_change=False):
+        """
+        Sleep until an absolute deadline on the monotonic clock.
+        
+        The wait is on the instance's wake event, so stop() interrupts it
+        at once. With on_change, parameter changes (update_bpm) interrupt
+        it too, so the caller can re-time the pending click.
+        
+        Args:
+            deadline_ns (int): Monotonic deadline in nanoseconds
+            on_change (bool, optional): Also return early on changes, defaults to False
+            
+        Returns:
+            bool: True if the deadline was reached, False if interrupted
+        """
+        while True:
+            remaining_ns = deadline_ns - self.clock.now_ns()
+            if remaining_ns <= 0:
+                return True
+            if not self.is_running:
+                return False
+            if self.clock.wait_until(self.wake_event, deadline_ns):
+                self.wake_event.clear()
+                if on_change or not self.is_running:
+                    return self.clock.now_ns() >= deadline_ns
 
+    def _play_click(self, sound_id, deadline_ns, channel, channel_up, channel_subdivision):
+        """
+        Play one click of a rhythm pattern and notify listeners on beats.
+        Called by the driver as soon as its wait for the deadline is over.
+        
+        Args:
+            sound_id (int): SOUND_BEAT, SOUND_GROUP or SOUND_SUB
+            deadline_ns (int): Scheduled monotonic time of the click
+            channel: Backend channel for regular beats
+            channel_up: Backend channel for accented beats
+            channel_subdivision: Backend channel for subdivisions
+        """
+        wake_ns = self.clock.now_ns()
+        if sound_id == SOUND_BEAT:
+            # Notify listeners, then play the main beat
+            self._notify_beat(self.current_beat, deadline_ns)
+            play_ns = self.clock.now_ns()
+            self._play_main_beat(channel, channel_up, deadline_ns)
+            self.timing.record(deadline_ns, play_ns, wake_ns - deadline_ns, play_ns - wake_ns, deadline_ns)
+            if self.tracer is not None:
+                self.tracer.span(PHASE_CALLBACK, wake_ns, play_ns)
+                self.tracer.span(PHASE_MAIN_BEAT, play_ns, self.clock.now_ns())
+            return
+        
+        # Subdivision clicks are published too, for async consumers
+        if sound_id == SOUND_GROUP:
+            self.audio.play(channel, self.sound_up, deadline_ns)
+        else:
+            self.audio.play(channel_subdivision, self.sound_subdivision, deadline_ns)
+        self.timing.record(deadline_ns, wake_ns, wake_ns - deadline_ns)
+        if self.tracer is not None:
+            self.tracer.span(PHASE_SUBDIVISION, wake_ns, self.clock.now_ns())
+        self.events.publish(self.current_beat, sound_id, deadline_ns)
+
+    def absolute_clicks(self):
+        """
+        Click generator for an absolute, drift-free grid.
+        
+        Every click (beat or subdivision) has a deadline computed from a
+        fixed anchor on the monotonic nanosecond clock, so timing errors
+        never accumulate from one click to the next. Tempo and rhythm mode
+        changes re-anchor the grid at the next beat line instead of
+        restarting it.
+        
+        The generator does no waiting itself, so the same grid can be
+        driven by this metronome's own thread or by a shared Scheduler.
+        A driver may send False to report that its wait was interrupted
+        before the deadline; with APPLY_ON_SUBDIVISION a pending tempo
+        change is then applied to the very next click. Rhythm mode
+        changes always wait for a beat line.
+        
+        Yields:
+            int: Monotonic deadline of the next click in nanoseconds. The
+                click is played when the generator is resumed.
+        """
+        # Set up audio channels for different sound types
+        channel = self.audio.channel(0)             # Regular beats
+        channel_up = self.audio.channel(1)          # First beat accent
+        channel_subdivision = self.audio.channel(2) # Subdivisions
+        
+        # The session origin is the anchor of the very first grid
+        self.origin_ns = self.clock.now_ns()
+        anchor_ns = self.origin_ns
+        anchor_step = 0      # Grid step of the anchor
+        previous_ns = None   # Deadline of the last played click
+        beat_index = 0
+        config = self.config
+        bpm = config.bpm
+        pattern = config.pattern
+        
+        while self.is_running:
+            # Safety check - verify sounds are loaded
+            if not self._sounds_loaded():
+                print(CURRENT_LANG["WAV_NOT_LOADED"])
+                break
+            
+            # Walk the precompiled click positions of the beat
+            click = 0
+            while click < pattern.clicks:
+                step = beat_index * pattern.steps + pattern.positions[click]
+                deadline_ns = click_deadline_ns(anchor_ns, step - anchor_step, bpm, pattern.steps)
+                while True:
+                    # Tempo change quantized to the click: re-time this click by
+                    # stretching the gap since the last one, and re-anchor on it
+                    new_bpm = self._take_config(APPLY_ON_SUBDIVISION).bpm
+                    if new_bpm != bpm:
+                        if previous_ns is not None:
+                            deadline_ns = previous_ns + (deadline_ns - previous_ns) * bpm // new_bpm
+                        anchor_ns, anchor_step, bpm = deadline_ns, step, new_bpm
+                    if (yield deadline_ns) is not False:
+                        break
+                    # Woken early: stopped, or a change to look at
+                    if not self.is_running:
+                        return
+                if not self.is_running:
+                    return
+                
+                # Tempo or mode changed by the time the beat line is reached:
+                # the beat keeps its place and becomes the new anchor
+                if click == 0:
+                    config = self._take_config(APPLY_ON_BAR if self.current_beat == 1 else APPLY_ON_BEAT)
+                    if config.bpm != bpm or config.pattern is not pattern:
+                        anchor_ns, anchor_step, beat_index = deadline_ns, 0, 0
+                        bpm = config.bpm
+                        pattern = config.pattern
+                
+                self._play_click(pattern.sound_ids[click], deadline_ns, channel, channel_up, channel_subdivision)
+                previous_ns = deadline_ns
+                click += 1
+            
             # Move to next beat in the measure
+            increment_ns = self.clock.now_ns()
             self.increment_beat()
+            beat_index += 1
+            if self.tracer is not None:
+                self.tracer.span(PHASE_INCREMENT, increment_ns, self.clock.now_ns())
+
+    def tempo_map_clicks(self):
+        """
+        Click generator for a tempo map's precomputed onset table.
+        
+        Beat deadlines are read from the table, offset so that the start
+        bar plays now. Clicks inside a beat are placed at their pattern
+        offset of that beat's duration. Playback stops at the end of the map.
+        
+        Yields:
+            int: Monotonic deadline of the next click in nanoseconds
+        """
+        # Set up audio channels for different sound types
+        channel = self.audio.channel(0)             # Regular beats
+        channel_up = self.audio.channel(1)          # First beat accent
+        channel_subdivision = self.audio.channel(2) # Subdivisions
+        
+        tempo_map = self.tempo_map
+        onsets = tempo_map.onsets_ns
+        first_beat = tempo_map.bar_beat(self.tempo_map_bar)
+        
+        # Shift the map's timeline so the start bar begins now
+        self.origin_ns = self.clock.now_ns()
+        anchor_ns = self.origin_ns - onsets[first_beat]
+        
+        for beat_index in range(first_beat, tempo_map.beat_count):
+            beat_start = anchor_ns + onsets[beat_index]
+            beat_length = onsets[beat_index + 1] - onsets[beat_index]
+            self.current_beat = tempo_map.beat_numbers[beat_index]
+            pattern = self._take_config(APPLY_ON_BAR if self.current_beat == 1 else APPLY_ON_BEAT).pattern
+            
+            for position, sound_id in zip(pattern.positions, pattern.sound_ids):
+                deadline_ns = beat_start + position * beat_length // pattern.steps
+                yield deadline_ns
+                if not self.is_running:
+                    return
+                self._play_click(sound_id, deadline_ns, channel, channel_up, channel_subdivision)
+        
+        # End of the map: tear down like stop() does
+        self.is_running = False
+        self._finish_run()
+
+    def play_beats_absolute(self):
+        """
+        Main loop for playing beats on an absolute, drift-free grid.
+        Sleeps until each deadline yielded by absolute_clicks(), and
+        reports interrupted waits back to the generator.
+        """
+        clicks = self.absolute_clicks()
+        tracer = self.tracer
+        try:
+            deadline_ns = next(clicks)
+            while True:
+                on_change = self.apply_changes == APPLY_ON_SUBDIVISION
+                sleep_ns = self.clock.now_ns()
+                reached = self._wait_until_ns(deadline_ns, on_change)
+                if tracer is not None and reached:
+                    woke_ns = self.clock.now_ns()
+                    tracer.span(PHASE_SLEEP, sleep_ns, woke_ns, woke_ns - deadline_ns)
+                deadline_ns = clicks.send(reached)
+        except StopIteration:
+            pass
+
+    def play_beats_tempo_map(self):
+        """
+        Main loop for playing a tempo map.
+        Sleeps until each deadline yielded by tempo_map_clicks().
+        """
+        for deadline_ns in self.tempo_map_clicks():
+            self._wait_until_ns(deadline_ns)
+
+    def play_beats_lookahead(self):
+        """
+        Main loop for the lookahead scheduler, modelled on the web client.
+        
+        The thread wakes on a coarse LOOKAHEAD_MS timer and renders every
+        click due in the next SCHEDULE_AHEAD_TIME window into one PCM
+        segment per channel. The segments are chained with Channel.queue,
+        so the sound card clock places each click, not a Python sleep.
+        Queued beats wait in notes_in_queue until they are audible, and
+        only then is on_beat called.
+        """
+        # Set up audio channels for different sound types
+        channel = self.audio.channel(0)             # Regular beats
+        channel_up = self.audio.channel(1)          # First beat accent
+        channel_subdivision = self.audio.channel(2) # Subdivisions
+        channels = (channel, channel_up, channel_subdivision)
+        
+        # Safety check - verify sounds are loaded
+        if not self._sounds_loaded():
+            print(CURRENT_LANG["WAV_NOT_LOADED"])
+            return
+        
+        # Raw click data in the mixer's own sample format
+        frequency, size, channel_count = self.audio.mixer_format()
+        frame_size = abs(size) // 8 * channel_count
+        segment_frames = int(SCHEDULE_AHEAD_TIME * frequency)
+        raw_sounds = {
+            channel: self.sound_up.get_raw(),
+            channel_up: self.sound.get_raw(),
+            channel_subdivision: self.sound_subdivision.get_raw(),
+        }
+        
+        # The grid is relative to the start of the stream
+        last_click = {ch: None for ch in channels}
+        self.notes_in_queue.clear()
+        anchor_ns = 0
+        beat_index = 0
+        click = 0
+        bpm = self.config.bpm
+        pattern = self.config.pattern
+        segment_index = 0
+        
+        while self.is_running:
+            # Queue the next window once the previous one started playing
+            if segment_index == 0 or channel_up.get_queue() is None:
+                if segment_index == 0:
+                    self.origin_ns = self.clock.now_ns()
+                segment_start = segment_index * segment_frames
+                segment_end = segment_start + segment_frames
+                segment_clicks = {ch: [] for ch in channels}
+                
+                while True:
+                    # Tempo or mode changed: re-anchor at this beat line
+                    if click == 0:
+                        if self._take_sounds():
+                            raw_sounds = {
+                                channel: self.sound_up.get_raw(),
+                                channel_up: self.sound.get_raw(),
+                                channel_subdivision: self.sound_subdivision.get_raw(),
+                            }
+                        config = self._take_config(APPLY_ON_BAR if self.current_beat == 1 else APPLY_ON_BEAT)
+                        if config.bpm != bpm or config.pattern is not pattern:
+                            anchor_ns = click_deadline_ns(anchor_ns, beat_index * pattern.steps, bpm, pattern.steps)
+                            beat_index = 0
+                            bpm = config.bpm
+                            pattern = config.pattern
+                    
+                    step = beat_index * pattern.steps + pattern.positions[click]
+                    deadline_ns = click_deadline_ns(anchor_ns, step, bpm, pattern.steps)
+                    frame = deadline_ns * frequency // 1_000_000_000
+                    if frame >= segment_end:
+                        break
+                    
+                    # Pick the channel, and remember beats for on_beat
+                    sound_id = pattern.sound_ids[click]
+                    if sound_id == SOUND_BEAT:
+                        target = channel_up if self.current_beat == 1 else channel
+                        self.notes_in_queue.append((self.origin_ns + deadline_ns, self.current_beat))
+                    elif sound_id == SOUND_GROUP:
+                        target = channel
+                    else:
+                        target = channel_subdivision
+                    segment_clicks[target].append((frame, raw_sounds[target]))
+                    
+                    click += 1
+                    if click == pattern.clicks:
+                        click = 0
+                        beat_index += 1
+                        self.increment_beat()
+                
+                # Render and queue one segment per channel
+                for ch in channels:
+                    clicks = segment_clicks[ch]
+                    if last_click[ch]:
+                        clicks.insert(0, last_click[ch])
+                    if clicks:
+                        last_click[ch] = clicks[-1]
+                    data = render_channel_segment(clicks, segment_start, segment_frames, frame_size)
+                    segment = self.audio.buffer_sound(data)
+                    if segment_index == 0:
+                        ch.play(segment)
+                    else:
+                        ch.queue(segment)
+                segment_index += 1
+            
+            # Notify listeners about beats that are now audible
+            now_ns = self.clock.now_ns()
+            while self.notes_in_queue and self.notes_in_queue[0][0] <= now_ns:
+                beat_ns, beat = self.notes_in_queue.popleft()
+                self._notify_beat(beat, beat_ns)
+            
+            # Sleep until the next lookahead tick or the next audible beat
+            wake_ns = now_ns + int(LOOKAHEAD_MS * 1_000_000)
+            if self.notes_in_queue:
+                wake_ns = min(wake_ns, self.notes_in_queue[0][0])
+            self._wait_until_ns(wake_ns)
 
-            # Calculate how long to wait until next beat
-            # This accounts for processing time to keep accurate tempo
-            elapsed_time = time.time() - start_time
-            wait_time = max(0, int((self.interval - elapsed_time) * 1000))
-            pygame.time.wait(wait_time)
\ No newline at end of file
+    def get_measure_loop(self, bpm, beats_per_measure, rhythm_mode):
+        """
+        Get the pre-rendered measure loop for a tempo, meter and rhythm mode.
+        
+        Measures are rendered once and kept in a small LRU cache, so
+        switching back and forth between settings does not re-render.
+        
+        Args:
+            bpm (int): Beats per minute
+            beats_per_measure (int): Number of beats per measure
+            rhythm_mode (str): Rhythm mode of the measure
+            
+        Returns:
+            tuple: (backend sound of the measure, measure length in ns,
+                offsets of each beat in ns)
+        """
+        key = (bpm, beats_per_measure, rhythm_mode)
+        if key in self.measure_cache:
+            self.measure_cache.move_to_end(key)
+            return self.measure_cache[key]
+        
+        # Imported here so numpy is only needed for the loop mode
+        from render import render_measure
+        
+        frequency, size, channel_count = self.audio.mixer_format()
+        pcm, beat_frames = render_measure(
+            self.sound.get_raw(), self.sound_up.get_raw(), self.sound_subdivision.get_raw(),
+            bpm, beats_per_measure, PATTERNS.get(rhythm_mode, PATTERNS[NORMAL_MODE]),
+            frequency, size, channel_count
+        )
+        frame_size = abs(size) // 8 * channel_count
+        measure_ns = len(pcm) // frame_size * 1_000_000_000 // frequency
+        beat_offsets_ns = [frame * 1_000_000_000 // frequency for frame in beat_frames]
+        
+        # Keep the cache bounded, dropping the least recently used measure
+        self.measure_cache[key] = (self.audio.buffer_sound(pcm), measure_ns, beat_offsets_ns)
+        if len(self.measure_cache) > MEASURE_CACHE_SIZE:
+            self.measure_cache.popitem(last=False)
+        return self.measure_cache[key]
+
+    def play_beats_loop(self):
+        """
+        Main loop for playing a pre-rendered measure on repeat.
+        
+        The whole measure is one sound played with loops=-1, so the sound
+        card clock places every click. The thread only wakes to call
+        on_beat and to notice tempo, meter or rhythm mode changes, which
+        swap in a new measure at the next bar line.
+        """
+        channel = self.audio.channel(0)
+        
+        # Safety check - verify sounds are loaded
+        if not self._sounds_loaded():
+            print(CURRENT_LANG["WAV_NOT_LOADED"])
+            return
+        
+        playing_key = None
+        loop_start_ns = 0
+        measure_ns = 0
+        beat_offsets_ns = []
+        bar = 0
+        beat_in_bar = 0
+        new_sounds = False
+        
+        while self.is_running:
+            # A measure loop can only change at a bar line
+            if beat_in_bar == 0:
+                config = self._take_config(APPLY_ON_BAR)
+                key = (config.bpm, config.beats_per_measure, config.rhythm_mode)
+                if self._take_sounds():
+                    self.measure_cache.clear()  # Rendered with the old sounds
+                    new_sounds = True
+            
+            # Settings or sounds changed: swap in the new measure at the bar line
+            if (key != playing_key or new_sounds) and beat_in_bar == 0:
+                if playing_key is not None:
+                    self._wait_until_ns(loop_start_ns + bar * measure_ns)
+                    if not self.is_running:
+                        return
+                sound, measure_ns, beat_offsets_ns = self.get_measure_loop(*key)
+                channel.play(sound, loops=-1)
+                loop_start_ns = self.clock.now_ns()
+                playing_key = key
+                new_sounds = False
+                bar = 0
+                self.current_beat = 1
+            
+            # Wait for the next beat, waking up regularly to notice changes
+            beat_ns = loop_start_ns + bar * measure_ns + beat_offsets_ns[beat_in_bar]
+            wake_ns = self.clock.now_ns() + int(LOOKAHEAD_MS * 1_000_000)
+            if beat_ns > wake_ns:
+                self._wait_until_ns(wake_ns)
+                continue
+            self._wait_until_ns(beat_ns)
+            if not self.is_running:
+                return
+            
+            # Notify listeners, then move to the next beat
+            self._notify_beat(self.current_beat, beat_ns)
+            self.increment_beat()
+            beat_in_bar += 1
+            if beat_in_bar == len(beat_offsets_ns):
+                beat_in_bar = 0
+                bar += 1
+                self.current_beat = 1
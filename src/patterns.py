@@ -0,0 +1,86 @@
+import json
+import math
+from fractions import Fraction
+from constants import PATTERNS_FILE, CURRENT_LANG
+
+#-------------------------------------------------------
+# Sound ID constants
+#-------------------------------------------------------
+SOUND_BEAT = 0   # Main beat: accent on the first beat, upbeat sound otherwise
+SOUND_SUB = 1    # Subdivision
+SOUND_GROUP = 2  # Start of a group inside the beat (e.g. 2+2+3), upbeat sound
+
+# Sound names used in the pattern file, shared with the web client
+SOUND_NAMES = {
+    "beat": SOUND_BEAT,
+    "sub": SOUND_SUB,
+    "group": SOUND_GROUP,
+}
+
+
+class RhythmPattern:
+    """
+    A rhythm mode compiled into arrays of per-beat click offsets and sound IDs.
+
+    Offsets are fractions of a beat. They are stored as integer steps on
+    a grid of `steps` per beat (the common denominator of all offsets),
+    so click times can be computed exactly with integer arithmetic.
+    """
+
+    __slots__ = ("name", "title", "offsets", "steps", "positions", "sound_ids", "clicks")
+
+    def __init__(self, name, offsets, sounds, title=None):
+        """
+        Compile a rhythm pattern.
+
+        Args:
+            name (str): The rhythm mode name, e.g. "eighth"
+            offsets (list): Click offsets within the beat, as fractions like "2/3"
+            sounds (list): Sound name of each click ("beat", "sub" or "group")
+            title (str, optional): Display name, defaults to the mode name
+
+        Raises:
+            ValueError: If the offsets or sounds do not describe a valid beat
+        """
+        fractions = [Fraction(offset) for offset in offsets]
+
+        # A beat starts with its main click and offsets must stay inside the beat
+        if not fractions or fractions[0] != 0 or len(sounds) != len(fractions):
+            raise ValueError(CURRENT_LANG["INVALID_PATTERN"].format(name))
+        if any(not 0 <= a < b < 1 for a, b in zip(fractions, fractions[1:])):
+            raise ValueError(CURRENT_LANG["INVALID_PATTERN"].format(name))
+        if sounds[0] != "beat" or any(sound not in SOUND_NAMES for sound in sounds):
+            raise ValueError(CURRENT_LANG["INVALID_PATTERN"].format(name))
+
+        self.name = name
+        self.title = title or name
+        self.offsets = tuple(float(fraction) for fraction in fractions)
+        self.steps = math.lcm(*(fraction.denominator for fraction in fractions))
+        self.positions = tuple(int(fraction * self.steps) for fraction in fractions)
+        self.sound_ids = tuple(SOUND_NAMES[sound] for sound in sounds)
+        self.clicks = len(fractions)
+
+    def __repr__(self):
+        return f"RhythmPattern({self.name!r}, steps={self.steps}, positions={self.positions})"
+
+
+def load_patterns(path=PATTERNS_FILE):
+    """
+    Load and compile every rhythm pattern from the shared pattern file.
+
+    Args:
+        path (str, optional): Path of the JSON pattern file, defaults to PATTERNS_FILE
+
+    Returns:
+        dict: Rhythm mode name -> RhythmPattern
+    """
+    with open(path, encoding="utf-8") as pattern_file:
+        definitions = json.load(pattern_file)
+    return {
+        name: RhythmPattern(name, definition["offsets"], definition["sounds"], definition.get("name"))
+        for name, definition in definitions.items()
+    }
+
+
+# Compiled once at import, shared by every metronome and renderer
+PATTERNS = load_patterns()
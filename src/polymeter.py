@@ -0,0 +1,254 @@
+import math
+from fractions import Fraction
+from constants import SOUND_FILE, CURRENT_LANG
+from metronome import (Metronome, click_deadline_ns, NORMAL_MODE, SCHEDULE_ABSOLUTE,
+                       APPLY_ON_SUBDIVISION, APPLY_ON_BEAT, APPLY_ON_BAR)
+from patterns import PATTERNS, SOUND_BEAT, SOUND_GROUP
+
+
+class Layer:
+    """
+    One meter of a polymeter: a number of beats, their length and a rhythm mode.
+
+    Beat lengths are measured in beats of the shared tempo, so a layer
+    of 3 beats with beat_length 4/3 plays 3 against 4, and a layer of
+    7 beats with beat_length 1/2 plays 7/8 over 4/4.
+    """
+
+    def __init__(self, beats, beat_length=1, rhythm_mode=NORMAL_MODE, accent_file=SOUND_FILE, on_beat=None):
+        """
+        Initialize a layer.
+
+        Args:
+            beats (int): Beats per cycle of this layer
+            beat_length (int, Fraction or str, optional): Length of one beat in shared beats, defaults to 1
+            rhythm_mode (str, optional): Rhythm mode of each beat, defaults to NORMAL_MODE
+            accent_file (str, optional): Sound for the layer's first beat, defaults to SOUND_FILE
+            on_beat (function, optional): Callback with the layer's beat number
+
+        Raises:
+            ValueError: If the number of beats, beat length or rhythm mode is invalid
+        """
+        if beats < 1 or Fraction(beat_length) <= 0:
+            raise ValueError(CURRENT_LANG["INVALID_LAYER"])
+        if rhythm_mode not in PATTERNS:
+            raise ValueError(CURRENT_LANG["INVALID_MODE"])
+        self.beats = beats
+        self.beat_length = Fraction(beat_length)
+        self.pattern = PATTERNS[rhythm_mode]
+        self.accent_file = accent_file
+        self.on_beat = on_beat
+
+    @property
+    def cycle_length(self):
+        """Fraction: Length of one cycle of the layer in shared beats."""
+        return self.beats * self.beat_length
+
+
+def polyrhythm(against, beats=4, **layer_options):
+    """
+    Build the two layers of an "N against M" polyrhythm over one bar.
+
+    Args:
+        against (int): Beats of the second layer, e.g. 3 for 3-against-4
+        beats (int, optional): Beats of the main layer, defaults to 4
+        **layer_options: Extra Layer options for the second layer
+
+    Returns:
+        list: [main layer, cross layer]
+    """
+    return [Layer(beats), Layer(against, Fraction(beats, against), **layer_options)]
+
+
+class PolymeterTable:
+    """
+    The merged, sorted onset table of all layers over one common period.
+
+    The period is the least common multiple of the layer cycles, after
+    which every layer is back on its first beat. Each click is stored as
+    an integer step on a grid of `steps_per_beat` steps per shared beat,
+    so walking the table costs the same per click no matter how many
+    layers there are.
+    """
+
+    def __init__(self, layers):
+        """
+        Compile the onset table of a set of layers.
+
+        Args:
+            layers (list): Layer objects, the first one is the reference meter
+        """
+        # Common grid: every beat length and pattern offset lands on a whole step
+        denominators = [layer.beat_length.denominator * layer.pattern.steps for layer in layers]
+        self.steps_per_beat = math.lcm(*denominators)
+
+        # Period in shared beats: the LCM of the cycle lengths (as fractions)
+        cycles = [layer.cycle_length for layer in layers]
+        period = Fraction(math.lcm(*(c.numerator for c in cycles)),
+                          math.gcd(*(c.denominator for c in cycles)))
+        self.period_steps = int(period * self.steps_per_beat)
+
+        # Every click of every layer in the period, sorted by time then layer
+        onsets = []
+        for layer_index, layer in enumerate(layers):
+            beat_steps = int(layer.beat_length * self.steps_per_beat)
+            click_steps = beat_steps // layer.pattern.steps
+            for beat in range(int(period / layer.beat_length)):
+                for position, sound_id in zip(layer.pattern.positions, layer.pattern.sound_ids):
+                    step = beat * beat_steps + position * click_steps
+                    beat_number = beat % layer.beats + 1
+                    onsets.append((step, layer_index, beat_number, sound_id))
+        onsets.sort()
+
+        self.steps = tuple(onset[0] for onset in onsets)
+        self.layers = tuple(onset[1] for onset in onsets)
+        self.beats = tuple(onset[2] for onset in onsets)
+        self.sound_ids = tuple(onset[3] for onset in onsets)
+
+
+class PolymeterMetronome(Metronome):
+    """
+    A metronome playing several phase-locked layers on one shared clock.
+
+    All layers are merged into one PolymeterTable and played by a single
+    thread against absolute deadlines, so they can never drift apart.
+    Each layer has its own channel, accent sound and on_beat callback.
+    The layers replace beats_per_measure and the rhythm mode.
+    """
+
+    def __init__(self, bpm, layers, clock=None, audio=None):
+        """
+        Initialize a polymeter metronome.
+
+        Args:
+            bpm (int): Beats per minute of the shared beat
+            layers (list): Layer objects to play together
+            clock (SystemClock, PrecisionClock, TimerfdClock or VirtualClock, optional): Time
+                source, defaults to a PrecisionClock
+            audio (optional): Audio backend, defaults to a PygameBackend
+
+        Raises:
+            ValueError: If BPM is outside valid range or no layers are given
+        """
+        if not layers:
+            raise ValueError(CURRENT_LANG["INVALID_LAYER"])
+        self.layers = list(layers)
+        self.table = PolymeterTable(self.layers)
+        self.layer_sounds = []
+        super().__init__(bpm, beats_per_measure=self.layers[0].beats, scheduling=SCHEDULE_ABSOLUTE, clock=clock,
+                         audio=audio)
+
+    def load_sound(self):
+        """
+        Load the shared sounds and the accent sound of every layer.
+
+        Raises:
+            FileNotFoundError: If any required sound file is missing
+        """
+        super().load_sound()
+        for sound in self.layer_sounds:
+            self._release_sound(sound)
+        self.layer_sounds = [self._acquire_sound(layer.accent_file) for layer in self.layers]
+
+    def _hold_sounds(self):
+        """
+        Take the shared sounds and every layer's accent sound again after a stop.
+        """
+        super()._hold_sounds()
+        self.layer_sounds = [self._acquire_sound(layer.accent_file) for layer in self.layers]
+
+    def _click_sounds(self):
+        """
+        Precompute the sound of every click so the loop only indexes arrays.
+
+        Returns:
+            list: Sound of each click of the onset table
+        """
+        table = self.table
+        sounds = []
+        for layer_index, beat, sound_id in zip(table.layers, table.beats, table.sound_ids):
+            if sound_id == SOUND_BEAT and beat == 1:
+                sounds.append(self.layer_sounds[layer_index])
+            elif sound_id in (SOUND_BEAT, SOUND_GROUP):
+                sounds.append(self.sound_up)
+            else:
+                sounds.append(self.sound_subdivision)
+        return sounds
+
+    def absolute_clicks(self):
+        """
+        Click generator walking the merged onset table on an absolute grid.
+
+        The table repeats every period, so the step of a click is the
+        period count times period_steps plus its step in the table. Tempo
+        changes are taken like in Metronome.absolute_clicks: on the first
+        layer's bars and beats, on any layer's beat, or on any click,
+        depending on apply_changes, and re-anchor the grid on that click.
+        Every click is published to the event ring with its layer, and the
+        first layer's beats set current_beat.
+
+        Yields:
+            int: Monotonic deadline of the next click in nanoseconds
+        """
+        # One channel per layer so layers never cut each other off
+        self.audio.reserve_channels(len(self.layers))
+        channels = [self.audio.channel(index) for index in range(len(self.layers))]
+
+        table = self.table
+        sounds = self._click_sounds()
+        callbacks = [layer.on_beat for layer in self.layers]
+
+        self.origin_ns = self.clock.now_ns()
+        anchor_ns = self.origin_ns
+        anchor_step = 0
+        bpm = self.config.bpm
+        period = 0
+        index = 0
+
+        while self.is_running:
+            step = period * table.period_steps + table.steps[index]
+            layer_index = table.layers[index]
+            beat = table.beats[index]
+
+            # The first layer is the reference meter for bar lines
+            if table.sound_ids[index] != SOUND_BEAT:
+                boundary = APPLY_ON_SUBDIVISION
+            elif layer_index == 0 and beat == 1:
+                boundary = APPLY_ON_BAR
+            else:
+                boundary = APPLY_ON_BEAT
+
+            while True:
+                # Tempo changed: this click becomes the new anchor
+                new_bpm = self._take_config(boundary).bpm
+                if new_bpm != bpm:
+                    anchor_ns = click_deadline_ns(anchor_ns, step - anchor_step, bpm, table.steps_per_beat)
+                    anchor_step = step
+                    bpm = new_bpm
+                deadline_ns = click_deadline_ns(anchor_ns, step - anchor_step, bpm, table.steps_per_beat)
+                if (yield deadline_ns) is not False:
+                    break
+                if not self.is_running:
+                    return  # Woken early by stop()
+            if not self.is_running:
+                return
+
+            # A new sound set starts on the next beat of any layer
+            if table.sound_ids[index] == SOUND_BEAT and self._take_sounds():
+                sounds = self._click_sounds()
+
+            if layer_index == 0 and table.sound_ids[index] == SOUND_BEAT:
+                self.current_beat = beat
+
+            play_ns = self.clock.now_ns()
+            self.audio.play(channels[layer_index], sounds[index], deadline_ns)
+            self.timing.record(deadline_ns, play_ns, play_ns - deadline_ns, grid_ns=deadline_ns)
+            self.events.publish(beat, table.sound_ids[index], deadline_ns, layer_index)
+            if table.sound_ids[index] == SOUND_BEAT and callbacks[layer_index]:
+                callbacks[layer_index](beat)
+
+            # Walk the table, wrapping around at the end of the period
+            index += 1
+            if index == len(table.steps):
+                index = 0
+                period += 1
@@ -0,0 +1,349 @@
+import threading
+import wave
+import numpy as np
+from constants import (
+    CURRENT_LANG, MIN_BPM, MAX_BPM, MIN_BEATS, MAX_BEATS, RENDER_SAMPLE_RATE, PULL_BLOCK_FRAMES, EVENT_RING_SIZE
+)
+from metronome import (
+    Config, NORMAL_MODE, APPLY_ON_SUBDIVISION, APPLY_ON_BEAT, APPLY_ON_BAR,
+    APPLY_MODES, APPLY_RANK
+)
+from patterns import PATTERNS, SOUND_BEAT, SOUND_GROUP
+from events import EventRing, DROP_OLDEST
+from render import load_samples, to_pcm16, ACCENT, UPBEAT, SUBDIVISION
+
+
+class PullEngine:
+    """
+    Click engine driven by the audio device's sample clock.
+
+    There is no beat thread and no sleeping. The audio output asks for
+    the next block of samples with fill() (or iterates blocks()), and
+    the engine mixes every click that starts inside that block at its
+    exact sample offset, counted by a running frame counter. Timing then
+    depends only on the device's sample clock, never on the OS scheduler.
+
+    Onsets follow the offline renderer's grid, step * rate * 60 //
+    (bpm * steps) frames from the anchor, so a stream without changes
+    is the same as render_click_track() sample for sample, whatever the
+    block sizes. Clicks overlap and are mixed; the tails of clicks still
+    sounding at the end of a block are carried into the next one.
+
+    Settings changes use the snapshots of Metronome: the setters publish
+    a `requested` snapshot, and fill() takes it over at the next block
+    boundary. It applies from the next click, beat or bar line
+    (apply_changes), where the grid is re-anchored the way
+    Metronome.absolute_clicks does it. Taking it only at block
+    boundaries keeps the output of a block deterministic even when the
+    settings change on another thread while it is mixed.
+    """
+
+    def __init__(self, bpm, beats_per_measure=4, rhythm_mode=NORMAL_MODE, samples=None,
+                 rate=RENDER_SAMPLE_RATE, apply_changes=APPLY_ON_BEAT, on_beat=None,
+                 event_ring_size=EVENT_RING_SIZE, event_policy=DROP_OLDEST):
+        """
+        Initialize an engine at frame 0, with the first beat on the first sample.
+
+        Args:
+            bpm (int): Beats per minute
+            beats_per_measure (int, optional): Number of beats per measure, defaults to 4
+            rhythm_mode (str, optional): Rhythm mode, defaults to NORMAL_MODE
+            samples (tuple, optional): Decoded (accent, upbeat, subdivision) samples
+                at `rate`, like load_samples() or a WavSinkBackend's load_sound
+                return them. Decoded from the sound files if omitted.
+            rate (int, optional): Sample rate of the device, defaults to RENDER_SAMPLE_RATE
+            apply_changes (str, optional): APPLY_ON_SUBDIVISION, APPLY_ON_BEAT or
+                APPLY_ON_BAR, defaults to APPLY_ON_BEAT
+            on_beat (callable, optional): Called with the beat number of every
+                beat, from the thread calling fill()
+            event_ring_size (int, optional): Slots of the beat event ring,
+                defaults to EVENT_RING_SIZE
+            event_policy (str, optional): DROP_OLDEST or DROP_NEWEST when a
+                reader falls behind, defaults to DROP_OLDEST
+
+        Raises:
+            ValueError: If BPM or beats per measure is outside valid range, the
+                rhythm mode or apply_changes is unknown, or the event ring
+                options are invalid
+        """
+        if bpm is None or bpm < MIN_BPM or bpm > MAX_BPM:
+            raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+        if beats_per_measure is None or beats_per_measure < MIN_BEATS or beats_per_measure > MAX_BEATS:
+            raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+        if rhythm_mode not in PATTERNS:
+            raise ValueError(CURRENT_LANG["INVALID_MODE"])
+        if apply_changes not in APPLY_MODES:
+            raise ValueError(CURRENT_LANG["INVALID_APPLY_MODE"])
+
+        self.rate = rate
+        self.samples = samples if samples is not None else load_samples(rate)
+        self.apply_changes = apply_changes
+        self.on_beat = on_beat
+        self.events = EventRing(event_ring_size, event_policy)
+
+        # Settings snapshots: `requested` is written by the setters,
+        # `pending` is the one taken at the last block boundary and
+        # `config` the one being played
+        self.config = Config(bpm, 60 / bpm, beats_per_measure, rhythm_mode, PATTERNS[rhythm_mode])
+        self.requested = self.config
+        self.pending = self.config
+        self.config_lock = threading.Lock()
+
+        # Sample clock
+        self.frame = 0          # Frames produced so far
+        self.current_beat = 1
+        self.tail = np.zeros((0, 2), dtype=np.float32)  # Click tails past the last block
+        self.block = None       # Block being filled
+
+        # The click walk yields the frame of each click and mixes it when resumed
+        self.clicks = self._clicks()
+        self.next_frame = next(self.clicks)
+
+    #-----------------------------------------------------
+    # Settings
+    #-----------------------------------------------------
+
+    def _swap_config(self, **changes):
+        """
+        Publish a new requested snapshot, taken over at the next block.
+
+        Args:
+            **changes: Config fields to change
+        """
+        with self.config_lock:
+            self.requested = self.requested._replace(**changes)
+
+    def update_bpm(self, new_bpm):
+        """
+        Change the tempo.
+
+        Args:
+            new_bpm (int): New BPM value
+
+        Raises:
+            ValueError: If BPM is outside valid range
+        """
+        if new_bpm is None or new_bpm < MIN_BPM or new_bpm > MAX_BPM:
+            raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+        self._swap_config(bpm=new_bpm, interval=60 / new_bpm)
+
+    def set_rhythm_mode(self, mode):
+        """
+        Change the rhythm mode (any pattern defined in patterns.json).
+
+        Args:
+            mode (str): The rhythm mode to play
+
+        Raises:
+            ValueError: If an invalid mode is provided
+        """
+        if mode not in PATTERNS:
+            raise ValueError(CURRENT_LANG["INVALID_MODE"])
+        self._swap_config(rhythm_mode=mode, pattern=PATTERNS[mode])
+
+    def set_time_signature(self, beats_per_measure):
+        """
+        Change the number of beats per measure.
+        The new measure starts on its first beat when the change is applied.
+
+        Args:
+            beats_per_measure (int): Number of beats per measure
+
+        Raises:
+            ValueError: If the number of beats is outside the valid range
+        """
+        if beats_per_measure is None or beats_per_measure < MIN_BEATS or beats_per_measure > MAX_BEATS:
+            raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+        self._swap_config(beats_per_measure=beats_per_measure)
+
+    def _take_config(self, boundary):
+        """
+        Take over the snapshot of the last block boundary if changes may
+        apply at this point.
+
+        Args:
+            boundary (str): APPLY_ON_SUBDIVISION (any click), APPLY_ON_BEAT or APPLY_ON_BAR
+
+        Returns:
+            Config: The snapshot to play from here on
+        """
+        pending = self.pending
+        if pending is not self.config and APPLY_RANK[boundary] >= APPLY_RANK[self.apply_changes]:
+            if pending.beats_per_measure != self.config.beats_per_measure:
+                self.current_beat = 1  # A new meter starts a new measure
+            self.config = pending
+        return self.config
+
+    #-----------------------------------------------------
+    # Sample Clock
+    #-----------------------------------------------------
+
+    def frame_ns(self, frame):
+        """
+        Args:
+            frame (int): Frame of the stream
+
+        Returns:
+            int: Its time on the sample clock in nanoseconds since frame 0
+        """
+        return frame * 1_000_000_000 // self.rate
+
+    def _clicks(self):
+        """
+        Click walk on the sample grid (see Metronome.absolute_clicks).
+
+        Sending False re-times the pending click after a tempo change
+        that applies on the next subdivision.
+
+        Yields:
+            int: Frame of the next click. The click is mixed when the
+                generator is resumed.
+        """
+        frames_per_minute = self.rate * 60
+        anchor = 0           # Frame of the grid anchor
+        anchor_step = 0      # Grid step of the anchor
+        previous = None      # Frame of the last mixed click
+        beat_index = 0
+        config = self.config
+        bpm = config.bpm
+        pattern = config.pattern
+
+        while True:
+            click = 0
+            while click < pattern.clicks:
+                step = beat_index * pattern.steps + pattern.positions[click]
+                frame = anchor + (step - anchor_step) * frames_per_minute // (bpm * pattern.steps)
+                while True:
+                    # Tempo change quantized to the click: stretch the gap
+                    # since the last click and re-anchor on this one
+                    new_bpm = self._take_config(APPLY_ON_SUBDIVISION).bpm
+                    if new_bpm != bpm:
+                        if previous is not None:
+                            frame = previous + (frame - previous) * bpm // new_bpm
+                        anchor, anchor_step, bpm = frame, step, new_bpm
+                    if (yield frame) is not False:
+                        break
+
+                # Changes reaching the beat line re-anchor the grid on the beat
+                if click == 0:
+                    config = self._take_config(APPLY_ON_BAR if self.current_beat == 1 else APPLY_ON_BEAT)
+                    if config.bpm != bpm or config.pattern is not pattern:
+                        anchor, anchor_step, beat_index = frame, 0, 0
+                        bpm = config.bpm
+                        pattern = config.pattern
+
+                self._mix_click(pattern.sound_ids[click], frame)
+                previous = frame
+                click += 1
+
+            # Move to next beat in the measure
+            if self.current_beat < self.config.beats_per_measure:
+                self.current_beat += 1
+            else:
+                self.current_beat = 1
+            beat_index += 1
+
+    def _mix_click(self, sound_id, frame):
+        """
+        Mix one click into the block being filled, and its tail into the carry.
+
+        Args:
+            sound_id (int): SOUND_BEAT, SOUND_GROUP or SOUND_SUB
+            frame (int): Onset frame of the click
+        """
+        if sound_id == SOUND_BEAT:
+            kind = ACCENT if self.current_beat == 1 else UPBEAT
+        else:
+            kind = UPBEAT if sound_id == SOUND_GROUP else SUBDIVISION
+        sample = self.samples[kind]
+
+        # A click re-timed before the block (tempo change) plays at its start
+        offset = max(frame - self.frame, 0)
+        head = sample[:max(len(self.block) - offset, 0)]
+        self.block[offset:offset + len(head)] += head
+        rest = sample[len(head):]
+        if len(self.tail) < len(rest):
+            self.tail = np.concatenate([self.tail, np.zeros((len(rest) - len(self.tail), 2), dtype=np.float32)])
+        self.tail[:len(rest)] += rest
+
+        # Listeners hear about every click, with its time on the sample clock
+        deadline_ns = self.frame_ns(frame)
+        self.events.publish(self.current_beat, sound_id, deadline_ns)
+        if sound_id == SOUND_BEAT and self.on_beat:
+            self.on_beat(self.current_beat)
+
+    #-----------------------------------------------------
+    # Pulling Blocks
+    #-----------------------------------------------------
+
+    def fill(self, buffer):
+        """
+        Produce the next block of the click stream.
+
+        Suitable as the body of a callback-style audio output: the
+        buffer is overwritten, and the sample clock moves on by its length.
+
+        Args:
+            buffer (numpy.ndarray): (frames, 2) float32 array to fill
+
+        Returns:
+            numpy.ndarray: The buffer
+        """
+        end = self.frame + len(buffer)
+
+        # Tails of the clicks of earlier blocks first
+        buffer[:] = 0
+        carried = min(len(buffer), len(self.tail))
+        buffer[:carried] = self.tail[:carried]
+        self.tail = self.tail[carried:]
+
+        # Settings changes are taken over at the block boundary
+        requested = self.requested
+        if requested is not self.pending:
+            self.pending = requested
+            if self.apply_changes == APPLY_ON_SUBDIVISION:
+                self.next_frame = self.clicks.send(False)  # Re-time the pending click
+
+        # Mix every click starting in this block
+        self.block = buffer
+        while self.next_frame < end:
+            self.next_frame = self.clicks.send(True)
+        self.block = None
+        self.frame = end
+        return buffer
+
+    def blocks(self, frames=PULL_BLOCK_FRAMES):
+        """
+        Generate consecutive blocks of the click stream.
+
+        Args:
+            frames (int, optional): Frames per block, defaults to PULL_BLOCK_FRAMES
+
+        Yields:
+            numpy.ndarray: (frames, 2) float32 blocks, endlessly
+        """
+        while True:
+            yield self.fill(np.empty((frames, 2), dtype=np.float32))
+
+
+def stream_to_wav(engine, path, duration, frames=PULL_BLOCK_FRAMES):
+    """
+    Write the next `duration` seconds of an engine's stream to a WAV file,
+    one block at a time.
+
+    Args:
+        engine (PullEngine): The engine to pull from
+        path (str): Output WAV file
+        duration (float): Length in seconds
+        frames (int, optional): Frames per block, defaults to PULL_BLOCK_FRAMES
+    """
+    remaining = int(duration * engine.rate)
+    buffer = np.empty((frames, 2), dtype=np.float32)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(engine.rate)
+        while remaining > 0:
+            block = engine.fill(buffer[:min(frames, remaining)])
+            wav.writeframes(to_pcm16(block))
+            remaining -= len(block)
@@ -0,0 +1,642 @@
+import argparse
+import functools
+import math
+import os
+import struct
+import threading
+import time
+import wave
+from collections import OrderedDict
+import numpy as np
+from constants import (
+    SOUND_FILE,
+    SOUND_FILE_UP,
+    SOUND_FILE_SUBDIVISION,
+    RENDER_SAMPLE_RATE,
+    STREAM_BLOCK_FRAMES,
+    CURRENT_LANG,
+    MIN_BPM,
+    MAX_BPM,
+    MIN_BEATS,
+    MAX_BEATS
+)
+from metronome import (
+    click_deadline_ns,
+    render_channel_segment,
+    NORMAL_MODE
+)
+from patterns import PATTERNS, SOUND_BEAT, SOUND_GROUP
+from tempomap import TempoMap, CURVES, LINEAR, NS_PER_SECOND
+
+#-------------------------------------------------------
+# Sample format constants
+#-------------------------------------------------------
+
+# Click kinds, used to index the (accent, upbeat, subdivision) sample tuple
+ACCENT = 0
+UPBEAT = 1
+SUBDIVISION = 2
+
+# WAV sample widths in bytes and their numpy types
+WAV_SAMPLE_TYPES = {
+    1: np.uint8,
+    2: np.int16,
+    4: np.int32,
+}
+
+# Mixer sample sizes (as reported by pygame.mixer.get_init) and their numpy types
+SAMPLE_TYPES = {
+    -8: np.int8,
+    -16: np.int16,
+    -32: np.int32,
+    32: np.float32,
+}
+
+
+def mix_pcm(buffers, size):
+    """
+    Mix raw PCM buffers of equal length into one buffer, with clipping.
+
+    Args:
+        buffers (list): Raw PCM byte strings in the same mixer format
+        size (int): Sample size as reported by pygame.mixer.get_init()
+
+    Returns:
+        bytes: The mixed PCM data
+
+    Raises:
+        ValueError: If the sample format is not supported
+    """
+    if size not in SAMPLE_TYPES:
+        raise ValueError(f"Unsupported sample size: {size}")
+    sample_type = SAMPLE_TYPES[size]
+
+    # Sum in a wider type so loud overlaps clip instead of wrapping around
+    mixed = np.zeros(len(buffers[0]) // np.dtype(sample_type).itemsize, dtype=np.float64)
+    for buffer in buffers:
+        mixed += np.frombuffer(buffer, dtype=sample_type)
+
+    if np.issubdtype(sample_type, np.integer):
+        limits = np.iinfo(sample_type)
+        mixed = np.clip(mixed, limits.min, limits.max)
+    else:
+        mixed = np.clip(mixed, -1.0, 1.0)
+    return mixed.astype(sample_type).tobytes()
+
+
+def render_measure(raw_accent, raw_up, raw_subdivision, bpm, beats_per_measure,
+                   pattern, frequency, size, channels):
+    """
+    Render one whole measure into a single loopable PCM buffer.
+
+    Accents, upbeats and subdivisions are rendered as three separate
+    streams (a click cuts off the previous click of the same kind, just
+    like a pygame channel does) and then mixed together. Clicks whose
+    tail runs past the bar line wrap around to the start of the buffer,
+    so the measure loops seamlessly.
+
+    Args:
+        raw_accent (bytes): Raw mixer data for the first beat
+        raw_up (bytes): Raw mixer data for the other beats
+        raw_subdivision (bytes): Raw mixer data for subdivisions
+        bpm (int): Beats per minute
+        beats_per_measure (int): Number of beats per measure
+        pattern (RhythmPattern): Compiled rhythm pattern of each beat
+        frequency (int): Mixer sample rate
+        size (int): Mixer sample size as reported by pygame.mixer.get_init()
+        channels (int): Number of mixer channels
+
+    Returns:
+        tuple: (pcm_bytes, frame offsets of each beat in the measure)
+    """
+    frame_size = abs(size) // 8 * channels
+
+    def to_frame(step):
+        return click_deadline_ns(0, step, bpm, pattern.steps) * frequency // 1_000_000_000
+
+    measure_frames = to_frame(beats_per_measure * pattern.steps)
+
+    # Sort every click of the measure into its stream
+    streams = ([], [], [])  # Accent, upbeat, subdivision
+    raws = (raw_accent, raw_up, raw_subdivision)
+    beat_frames = []
+    for beat in range(beats_per_measure):
+        for position, sound_id in zip(pattern.positions, pattern.sound_ids):
+            frame = to_frame(beat * pattern.steps + position)
+            if sound_id == SOUND_BEAT:
+                kind = ACCENT if beat == 0 else UPBEAT
+                beat_frames.append(frame)
+            elif sound_id == SOUND_GROUP:
+                kind = UPBEAT
+            else:
+                kind = SUBDIVISION
+            streams[kind].append((frame, raws[kind]))
+
+    # Render each stream with the last click wrapped in front of the bar line
+    buffers = []
+    for clicks in streams:
+        if clicks:
+            last_frame, last_raw = clicks[-1]
+            clicks = [(last_frame - measure_frames, last_raw)] + clicks
+        buffers.append(render_channel_segment(clicks, 0, measure_frames, frame_size))
+
+    return mix_pcm(buffers, size), beat_frames
+
+#=======================================================
+# Offline Click Track Rendering
+#=======================================================
+
+def decode_wav(path, rate=RENDER_SAMPLE_RATE):
+    """
+    Decode a WAV file into float stereo samples at the given rate.
+    
+    Args:
+        path (str): Path of the WAV file
+        rate (int, optional): Target sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        numpy.ndarray: float32 array of shape (frames, 2) in the range -1..1
+        
+    Raises:
+        ValueError: If the sample width is not supported
+    """
+    with wave.open(path, "rb") as wav:
+        width = wav.getsampwidth()
+        if width not in WAV_SAMPLE_TYPES:
+            raise ValueError(f"Unsupported sample width: {width}")
+        channels = wav.getnchannels()
+        source_rate = wav.getframerate()
+        data = np.frombuffer(wav.readframes(wav.getnframes()), dtype=WAV_SAMPLE_TYPES[width])
+    
+    # Normalize to -1..1 (8-bit WAV data is unsigned)
+    samples = data.astype(np.float32).reshape(-1, channels)
+    if width == 1:
+        samples = (samples - 128) / 128
+    else:
+        samples /= float(2 ** (8 * width - 1))
+    
+    # Mono files are played on both sides, extra channels are dropped
+    if channels == 1:
+        samples = np.repeat(samples, 2, axis=1)
+    samples = samples[:, :2]
+    
+    # Linear resampling if the file does not match the target rate
+    if source_rate != rate:
+        frames = int(len(samples) * rate / source_rate)
+        positions = np.arange(frames) * source_rate / rate
+        source = np.arange(len(samples))
+        samples = np.stack([np.interp(positions, source, samples[:, c]) for c in range(2)], axis=1)
+    
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+def sample_files_version():
+    """
+    Get the version of the sound files, which changes whenever one is replaced.
+    
+    Returns:
+        tuple: st_mtime_ns of the accent, upbeat and subdivision sound files
+    """
+    return tuple(os.stat(path).st_mtime_ns for path in (SOUND_FILE, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION))
+
+
+def load_samples(rate=RENDER_SAMPLE_RATE):
+    """
+    Decode the accent, upbeat and subdivision sounds once per sample rate
+    and version of the sound files.
+    
+    Args:
+        rate (int, optional): Target sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        tuple: Read-only (accent, upbeat, subdivision) sample arrays
+    """
+    return decode_samples(rate, sample_files_version())
+
+
+@functools.lru_cache(maxsize=8)
+def decode_samples(rate, version):
+    """
+    Decode the sound files (cached per rate and version, see load_samples).
+    
+    Args:
+        rate (int): Target sample rate
+        version (tuple): sample_files_version() of the files
+        
+    Returns:
+        tuple: Read-only (accent, upbeat, subdivision) sample arrays
+    """
+    samples = tuple(decode_wav(path, rate) for path in (SOUND_FILE, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION))
+    for sample in samples:
+        sample.flags.writeable = False
+    return samples
+
+
+def pattern_kinds(pattern, beats):
+    """
+    Get the click kind of every click in a number of beats of a pattern.
+    
+    Args:
+        pattern (RhythmPattern): Compiled rhythm pattern
+        beats (numpy.ndarray): Beat index in the measure of each beat
+        
+    Returns:
+        numpy.ndarray: (beats, clicks) array of ACCENT, UPBEAT or SUBDIVISION
+    """
+    sound_ids = np.array(pattern.sound_ids)
+    kinds = np.where(sound_ids == SOUND_BEAT, UPBEAT,
+                     np.where(sound_ids == SOUND_GROUP, UPBEAT, SUBDIVISION)).astype(np.int8)
+    kinds = np.tile(kinds, (len(beats), 1))
+    
+    # Main click of the first beat of each measure is the accent
+    kinds[(beats == 0) & (sound_ids[0] == SOUND_BEAT), 0] = ACCENT
+    return kinds
+
+
+def click_onsets(bpm, beats_per_measure, pattern, n_frames, rate=RENDER_SAMPLE_RATE):
+    """
+    Compute the onset frame and kind of every click in a track.
+    
+    Args:
+        bpm (int): Beats per minute
+        beats_per_measure (int): Number of beats per measure
+        pattern (RhythmPattern): Compiled rhythm pattern of each beat
+        n_frames (int): Length of the track in frames
+        rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        tuple: (onset frames, click kinds) as numpy arrays
+    """
+    frames_per_minute = rate * 60
+    steps_per_minute = bpm * pattern.steps
+    beat_count = -(-n_frames * bpm // frames_per_minute)
+    beats = np.arange(beat_count, dtype=np.int64)
+    
+    # Grid step of every click: beat * steps + position within the beat
+    steps = beats[:, None] * pattern.steps + np.array(pattern.positions, dtype=np.int64)
+    onsets = (steps * frames_per_minute // steps_per_minute).ravel()
+    kinds = pattern_kinds(pattern, beats % beats_per_measure).ravel()
+    
+    in_track = onsets < n_frames
+    return onsets[in_track], kinds[in_track]
+
+
+def _add_periodic(buffer, sample, first, spacing, count):
+    """
+    Overlap-add evenly spaced copies of a sample into a buffer.
+    
+    The buffer is viewed as rows of `spacing` frames, so each copy is a
+    row and the whole series is added with a few strided numpy operations
+    instead of one operation per click.
+    
+    Args:
+        buffer (numpy.ndarray): (frames, 2) buffer to add into
+        sample (numpy.ndarray): (frames, 2) sample to add
+        first (int): Buffer frame of the first copy
+        spacing (int): Frames between consecutive copies
+        count (int): Number of copies
+    """
+    # Samples longer than the spacing are added chunk by chunk
+    for offset in range(0, len(sample), spacing):
+        chunk = sample[offset:offset + spacing]
+        start = first + offset
+        full_rows = count - 1
+        if full_rows > 0:
+            rows = buffer[start:start + full_rows * spacing].reshape(full_rows, spacing, -1)
+            rows[:, :len(chunk)] += chunk
+        last = start + full_rows * spacing
+        buffer[last:last + len(chunk)] += chunk
+
+
+def render_range(samples, bpm, beats_per_measure, pattern, start, n_frames, rate=RENDER_SAMPLE_RATE):
+    """
+    Render any window of an endless click track with vectorized overlap-add.
+    
+    Click onsets follow the exact grid step * rate * 60 // (bpm * pattern.steps).
+    That grid repeats with a whole number of frames every `period` beats,
+    so the clicks split into a few evenly spaced series. Each series has a
+    single sound and is mixed in with _add_periodic.
+    
+    Args:
+        samples (tuple): (accent, upbeat, subdivision) sample arrays
+        bpm (int): Beats per minute
+        beats_per_measure (int): Number of beats per measure
+        pattern (RhythmPattern): Compiled rhythm pattern of each beat
+        start (int): First frame of the window
+        n_frames (int): Length of the window in frames
+        rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        numpy.ndarray: float32 array of shape (n_frames, 2)
+    """
+    frames_per_minute = rate * 60
+    steps_per_minute = bpm * pattern.steps
+    longest = max(len(sample) for sample in samples)
+    
+    # Period (in beats) after which onsets and click kinds repeat exactly
+    grid_period = bpm // math.gcd(frames_per_minute, bpm)
+    period = math.lcm(grid_period, beats_per_measure)
+    spacing = period * pattern.steps * frames_per_minute // steps_per_minute
+    
+    # Local buffer also covers tails of clicks that started before the window
+    low = start - longest
+    high = start + n_frames
+    buffer = np.zeros((high - low + longest, 2), dtype=np.float32)
+    
+    # One series per click of the period, with its first onset and sound
+    beats = np.arange(period, dtype=np.int64)
+    steps = beats[:, None] * pattern.steps + np.array(pattern.positions, dtype=np.int64)
+    firsts = (steps * frames_per_minute // steps_per_minute).ravel()
+    kinds = pattern_kinds(pattern, beats % beats_per_measure).ravel()
+    
+    # Range of copies of each series that can be heard in the window
+    k_start = np.maximum(0, -((firsts - low) // spacing))
+    k_end = np.maximum(0, -((firsts - high) // spacing))
+    
+    for index in np.nonzero(k_end > k_start)[0]:
+        sample = samples[kinds[index]]
+        first = int(firsts[index] + k_start[index] * spacing - low)
+        _add_periodic(buffer, sample, first, spacing, int(k_end[index] - k_start[index]))
+    
+    return buffer[start - low:start - low + n_frames]
+
+
+def validate_click_track(bpm, beats_per_measure, rhythm_mode, duration):
+    """
+    Check the settings of a click track before rendering it.
+    
+    Args:
+        bpm (int): Beats per minute
+        beats_per_measure (int): Number of beats per measure
+        rhythm_mode (str): Rhythm mode (any pattern in patterns.json)
+        duration (float): Length of the track in seconds
+        
+    Raises:
+        ValueError: If BPM, beats per measure, rhythm mode or duration is invalid
+    """
+    if bpm is None or bpm < MIN_BPM or bpm > MAX_BPM:
+        raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+    if beats_per_measure is None or beats_per_measure < MIN_BEATS or beats_per_measure > MAX_BEATS:
+        raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+    if rhythm_mode not in PATTERNS:
+        raise ValueError(CURRENT_LANG["INVALID_MODE"])
+    if duration is None or duration <= 0:
+        raise ValueError(CURRENT_LANG["INVALID_DURATION"])
+
+
+def render_click_track(bpm, beats_per_measure, rhythm_mode, duration, samples=None, rate=RENDER_SAMPLE_RATE):
+    """
+    Render a complete click track without real-time playback.
+    
+    Args:
+        bpm (int): Beats per minute
+        beats_per_measure (int): Number of beats per measure
+        rhythm_mode (str): Rhythm mode (any pattern in patterns.json)
+        duration (float): Length of the track in seconds
+        samples (tuple, optional): Decoded samples, loaded from the sound files if omitted
+        rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        numpy.ndarray: float32 array of shape (frames, 2)
+        
+    Raises:
+        ValueError: If BPM, beats per measure, rhythm mode or duration is invalid
+    """
+    validate_click_track(bpm, beats_per_measure, rhythm_mode, duration)
+    if samples is None:
+        samples = load_samples(rate)
+    
+    return render_range(samples, bpm, beats_per_measure, PATTERNS[rhythm_mode],
+                        0, int(duration * rate), rate)
+
+
+def render_tempo_map(tempo_map, rhythm_mode=NORMAL_MODE, samples=None, rate=RENDER_SAMPLE_RATE):
+    """
+    Render a whole tempo map (ramps and meter changes) without playback.
+    
+    Onsets come straight from the map's precomputed table, with clicks
+    inside a beat placed at their pattern offset of the beat's duration,
+    the same as in Metronome.play_beats_tempo_map. Since onsets are not
+    evenly spaced, clicks are mixed in one slice at a time.
+    
+    Args:
+        tempo_map (TempoMap): The compiled tempo map
+        rhythm_mode (str, optional): Rhythm mode, defaults to NORMAL_MODE
+        samples (tuple, optional): Decoded samples, loaded from the sound files if omitted
+        rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        numpy.ndarray: float32 array of shape (frames, 2)
+        
+    Raises:
+        ValueError: If the rhythm mode is invalid
+    """
+    if rhythm_mode not in PATTERNS:
+        raise ValueError(CURRENT_LANG["INVALID_MODE"])
+    if samples is None:
+        samples = load_samples(rate)
+    pattern = PATTERNS[rhythm_mode]
+    
+    # Onset of every click, from the beat table and the pattern positions
+    onsets_ns = np.frombuffer(tempo_map.onsets_ns, dtype=np.int64)
+    starts = onsets_ns[:-1, None]
+    lengths = np.diff(onsets_ns)[:, None]
+    click_ns = starts + lengths * np.array(pattern.positions, dtype=np.int64) // pattern.steps
+    onsets = (click_ns * rate // NS_PER_SECOND).ravel()
+    beat_numbers = np.frombuffer(tempo_map.beat_numbers, dtype=np.int16)
+    kinds = pattern_kinds(pattern, beat_numbers - 1).ravel()
+    
+    n_frames = int(onsets_ns[-1] * rate // NS_PER_SECOND)
+    longest = max(len(sample) for sample in samples)
+    buffer = np.zeros((n_frames + longest, 2), dtype=np.float32)
+    for onset, kind in zip(onsets.tolist(), kinds.tolist()):
+        sample = samples[kind]
+        buffer[onset:onset + len(sample)] += sample
+    
+    return buffer[:n_frames]
+
+
+def to_pcm16(track):
+    """
+    Convert float samples to interleaved 16-bit PCM bytes, with clipping.
+    
+    Args:
+        track (numpy.ndarray): float samples in the range -1..1
+        
+    Returns:
+        bytes: Little-endian 16-bit PCM data
+    """
+    return (np.clip(track, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def write_wav(path, track, rate=RENDER_SAMPLE_RATE):
+    """
+    Write a rendered track to disk as a 16-bit stereo WAV file.
+    
+    Args:
+        path (str): Output file path
+        track (numpy.ndarray): (frames, 2) float samples
+        rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+    """
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(to_pcm16(track))
+
+
+#=======================================================
+# Streaming Click Track Rendering
+#=======================================================
+
+WAV_HEADER_SIZE = 44  # Bytes in a canonical RIFF/WAVE header
+FRAME_SIZE = 4        # Bytes per frame of 16-bit stereo PCM
+
+
+def wav_header(n_frames, rate=RENDER_SAMPLE_RATE):
+    """
+    Build the RIFF header of a 16-bit stereo WAV file.
+    
+    Args:
+        n_frames (int): Number of frames in the file
+        rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        
+    Returns:
+        bytes: The 44-byte header
+    """
+    data_size = n_frames * FRAME_SIZE
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 2, rate, rate * FRAME_SIZE, FRAME_SIZE, 16,
+        b"data", data_size
+    )
+
+
+class BlockCache:
+    """
+    A thread-safe, bounded LRU cache of rendered PCM blocks.
+    
+    Blocks are fixed-size slices of an endless click track, keyed by
+    their settings and block index, so every track with the same bpm,
+    meter and mode shares them whatever its length. Without samples of
+    its own the key also holds the version of the sound files, so a
+    replaced sound is never served from old blocks.
+    """
+    
+    def __init__(self, max_blocks, samples=None, rate=RENDER_SAMPLE_RATE):
+        """
+        Initialize an empty block cache.
+        
+        Args:
+            max_blocks (int): Maximum number of blocks kept in memory
+            samples (tuple, optional): Decoded samples, loaded from the sound files if omitted
+            rate (int, optional): Sample rate, defaults to RENDER_SAMPLE_RATE
+        """
+        self.max_blocks = max_blocks
+        self.samples = samples
+        self.rate = rate
+        self.blocks = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_block(self, bpm, beats_per_measure, rhythm_mode, index):
+        """
+        Get one block of 16-bit PCM data, rendering it on a cache miss.
+        
+        Args:
+            bpm (int): Beats per minute
+            beats_per_measure (int): Number of beats per measure
+            rhythm_mode (str): Rhythm mode
+            index (int): Block index from the start of the track
+            
+        Returns:
+            bytes: STREAM_BLOCK_FRAMES frames of PCM data
+        """
+        version = sample_files_version() if self.samples is None else None
+        key = (bpm, beats_per_measure, rhythm_mode, index, version)
+        with self.lock:
+            if key in self.blocks:
+                self.hits += 1
+                self.blocks.move_to_end(key)
+                return self.blocks[key]
+            self.misses += 1
+        
+        # Render outside the lock so other requests are not held up
+        samples = self.samples if self.samples is not None else decode_samples(self.rate, version)
+        block = to_pcm16(render_range(samples, bpm, beats_per_measure, PATTERNS[rhythm_mode],
+                                      index * STREAM_BLOCK_FRAMES, STREAM_BLOCK_FRAMES, self.rate))
+        
+        with self.lock:
+            self.blocks[key] = block
+            while len(self.blocks) > self.max_blocks:
+                self.blocks.popitem(last=False)
+        return block
+
+
+def iter_click_track(cache, bpm, beats_per_measure, rhythm_mode, duration, start=0, end=None):
+    """
+    Generate the bytes of a click track WAV file, block by block.
+    
+    The RIFF header comes first, then PCM blocks as they are rendered, so
+    memory use stays flat however long the track is. `start` and `end`
+    select a byte range of the file, for HTTP Range requests.
+    
+    Args:
+        cache (BlockCache): Cache to take rendered blocks from
+        bpm (int): Beats per minute
+        beats_per_measure (int): Number of beats per measure
+        rhythm_mode (str): Rhythm mode
+        duration (float): Length of the track in seconds
+        start (int, optional): First byte to send, defaults to 0
+        end (int, optional): Byte after the last one to send, defaults to the file size
+        
+    Yields:
+        bytes: Consecutive pieces of the WAV file
+    """
+    n_frames = int(duration * cache.rate)
+    data_size = n_frames * FRAME_SIZE
+    if end is None:
+        end = WAV_HEADER_SIZE + data_size
+    
+    # Header first
+    if start < WAV_HEADER_SIZE:
+        yield wav_header(n_frames, cache.rate)[start:end]
+    
+    # Then the PCM blocks overlapping the requested range
+    block_size = STREAM_BLOCK_FRAMES * FRAME_SIZE
+    data_start = max(start - WAV_HEADER_SIZE, 0)
+    data_end = end - WAV_HEADER_SIZE
+    for index in range(data_start // block_size, -(-data_end // block_size)):
+        block_start = index * block_size
+        block = cache.get_block(bpm, beats_per_measure, rhythm_mode, index)
+        yield block[max(data_start - block_start, 0):data_end - block_start]
+
+
+# Entry point - render a click track to a WAV file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a Metronomnom click track to a WAV file.")
+    parser.add_argument("bpm", type=int, help=f"beats per minute ({MIN_BPM}-{MAX_BPM})")
+    parser.add_argument("--beats", type=int, default=4, help="beats per measure (default: 4)")
+    parser.add_argument("--mode", default=NORMAL_MODE, choices=sorted(PATTERNS), help="rhythm mode")
+    parser.add_argument("--duration", type=float, default=60.0, help="length in seconds (default: 60)")
+    parser.add_argument("--output", default="click.wav", help="output WAV file (default: click.wav)")
+    parser.add_argument("--ramp-to", type=float, help="render a tempo ramp ending at this BPM instead")
+    parser.add_argument("--bars", type=int, default=16, help="length of the ramp in bars (default: 16)")
+    parser.add_argument("--curve", default=LINEAR, choices=sorted(CURVES), help="ramp curve (default: linear)")
+    args = parser.parse_args()
+    
+    try:
+        started = time.perf_counter()
+        if args.ramp_to is not None:
+            tempo_map = TempoMap.ramp(args.bpm, args.ramp_to, args.bars, args.beats, args.curve)
+            track = render_tempo_map(tempo_map, args.mode)
+            duration = tempo_map.duration_ns / NS_PER_SECOND
+        else:
+            track = render_click_track(args.bpm, args.beats, args.mode, args.duration)
+            duration = args.duration
+        write_wav(args.output, track)
+        print(CURRENT_LANG["RENDER_DONE"].format(round(duration, 1), args.output, time.perf_counter() - started))
+    except ValueError as error:
+        print(error)
@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+
+class Scheduler:
+    """
+    One timer thread servicing any number of metronomes.
+
+    Each registered task is a click generator (see Metronome.absolute_clicks)
+    that yields the monotonic deadline of its next click and plays that click
+    when resumed. The scheduler keeps every task's next deadline in a heap,
+    sleeps until the earliest one and resumes that task, so hundreds of
+    metronomes share one mostly sleeping thread instead of one thread each.
+    """
+
+    def __init__(self, name="metronome-scheduler"):
+        """
+        Initialize an idle scheduler. The thread starts with the first task.
+
+        Args:
+            name (str, optional): Name of the scheduler thread
+        """
+        self.name = name
+        self._heap = []                   # (deadline_ns, sequence, key, clicks)
+        self._tasks = {}                  # key -> clicks generator
+        self._sequence = itertools.count()  # Tie-breaker for equal deadlines
+        self._condition = threading.Condition()
+        self._current = None              # Key of the task being resumed right now
+        self._thread = None
+        self._running = False
+
+    def __len__(self):
+        """int: Number of registered tasks."""
+        return len(self._tasks)
+
+    #-----------------------------------------------------
+    # Task Registration
+    #-----------------------------------------------------
+
+    def register(self, key, clicks):
+        """
+        Add a click generator to the scheduler.
+
+        Args:
+            key (object): Identifies the task (usually its Metronome)
+            clicks (generator): Yields the deadline of each click in nanoseconds
+        """
+        deadline_ns = next(clicks, None)
+        if deadline_ns is None:
+            return
+
+        with self._condition:
+            self._tasks[key] = clicks
+            heapq.heappush(self._heap, (deadline_ns, next(self._sequence), key, clicks))
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def unregister(self, key):
+        """
+        Remove a task. Once this returns, the task will not play again.
+
+        Its heap entry is dropped lazily when it reaches the top. If the
+        task is being resumed right now, this waits for that click to
+        finish (unless called from the scheduler thread itself).
+
+        Args:
+            key (object): The key the task was registered with
+        """
+        with self._condition:
+            self._tasks.pop(key, None)
+            if threading.current_thread() is not self._thread:
+                while self._current is key:
+                    self._condition.wait()
+            self._condition.notify_all()
+
+    def shutdown(self):
+        """
+        Remove every task and stop the scheduler thread.
+        """
+        with self._condition:
+            self._tasks.clear()
+            self._heap.clear()
+            self._running = False
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    #-----------------------------------------------------
+    # Scheduler Thread
+    #-----------------------------------------------------
+
+    def _run(self):
+        """
+        Scheduler loop: sleep until the earliest deadline, then resume its task.
+        """
+        while True:
+            with self._condition:
+                # Wait for the earliest live task to become due
+                while True:
+                    if not self._running:
+                        return
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    deadline_ns, _, key, clicks = self._heap[0]
+                    if self._tasks.get(key) is not clicks:
+                        heapq.heappop(self._heap)  # Unregistered task
+                        continue
+                    remaining_ns = deadline_ns - time.monotonic_ns()
+                    if remaining_ns <= 0:
+                        break
+                    # Woken early when tasks are added or removed
+                    self._condition.wait(remaining_ns / 1_000_000_000)
+                heapq.heappop(self._heap)
+                self._current = key
+
+            # Play the click outside the lock and get the task's next deadline.
+            # A failing task is dropped without taking the others down.
+            try:
+                deadline_ns = next(clicks, None)
+            except Exception:
+                traceback.print_exc()
+                deadline_ns = None
+
+            with self._condition:
+                self._current = None
+                if deadline_ns is not None and self._tasks.get(key) is clicks:
+                    heapq.heappush(self._heap, (deadline_ns, next(self._sequence), key, clicks))
+                elif self._tasks.get(key) is clicks:
+                    del self._tasks[key]  # Task finished by itself
+                self._condition.notify_all()
@@ -0,0 +1,253 @@
+# setlist.py
+import os
+# Suppress Pygame's welcome message
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import argparse
+import csv
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from constants import CURRENT_LANG
+from metronome import NORMAL_MODE
+from render import load_samples, render_click_track, validate_click_track, write_wav
+
+# One song of a setlist: title, tempo, meter, rhythm mode and length in seconds
+Song = namedtuple("Song", ["title", "bpm", "beats", "mode", "length"])
+
+# Decoded samples attached from shared memory in each worker process
+_shared_memory = None
+_worker_samples = None
+
+#=======================================================
+# Setlist Parsing
+#=======================================================
+
+def read_setlist(path):
+    """
+    Read a setlist CSV file with one song per row.
+
+    The file needs a header row with the columns title, bpm, beats, mode
+    and length (in seconds). beats and mode are optional and default to
+    4 and normal.
+
+    Args:
+        path (str): Path of the setlist file
+
+    Returns:
+        list: Song tuples in setlist order
+
+    Raises:
+        ValueError: If a row has missing or non-numeric values, or settings
+            no click track can be rendered with (the message names its line)
+    """
+    songs = []
+    with open(path, newline="", encoding="utf-8") as setlist_file:
+        for line, row in enumerate(csv.DictReader(setlist_file), start=2):
+            try:
+                song = Song(
+                    title=row["title"].strip(),
+                    bpm=int(row["bpm"]),
+                    beats=int(row.get("beats") or 4),
+                    mode=(row.get("mode") or NORMAL_MODE).strip().lower(),
+                    length=float(row["length"]),
+                )
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(CURRENT_LANG["SETLIST_ROW_ERROR"].format(line))
+            
+            # Refuse rows that would render silence or fail in a worker
+            try:
+                validate_click_track(song.bpm, song.beats, song.mode, song.length)
+            except ValueError as error:
+                raise ValueError(CURRENT_LANG["SETLIST_ROW_INVALID"].format(line, error))
+            songs.append(song)
+    return songs
+
+def song_filename(number, song):
+    """
+    Build a safe WAV file name for a song.
+
+    Args:
+        number (int): Position of the song in the setlist
+        song (Song): The song
+
+    Returns:
+        str: File name like "01 - Song Title.wav"
+    """
+    title = re.sub(r'[^\w\- ]', "_", song.title).strip() or "song"
+    return f"{number:02d} - {title}.wav"
+
+#=======================================================
+# Shared Sample Data
+#=======================================================
+
+def share_samples(samples):
+    """
+    Copy decoded samples into one shared memory block.
+
+    Args:
+        samples (tuple): (accent, upbeat, subdivision) sample arrays
+
+    Returns:
+        tuple: (SharedMemory block, layout of (offset, shape) per sample)
+    """
+    size = sum(sample.nbytes for sample in samples)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    layout = []
+    offset = 0
+    for sample in samples:
+        view = np.ndarray(sample.shape, dtype=np.float32, buffer=block.buf, offset=offset)
+        view[:] = sample
+        layout.append((offset, sample.shape))
+        offset += sample.nbytes
+    return block, layout
+
+def _attach_samples(name, layout):
+    """
+    Worker initializer: map the shared samples as read-only arrays.
+
+    Args:
+        name (str): Name of the shared memory block
+        layout (list): (offset, shape) of each sample in the block
+    """
+    global _shared_memory, _worker_samples
+    _shared_memory = shared_memory.SharedMemory(name=name)
+    samples = []
+    for offset, shape in layout:
+        sample = np.ndarray(shape, dtype=np.float32, buffer=_shared_memory.buf, offset=offset)
+        sample.flags.writeable = False
+        samples.append(sample)
+    _worker_samples = tuple(samples)
+
+#=======================================================
+# Rendering
+#=======================================================
+
+def render_song(song, path):
+    """
+    Render one song's click track to a WAV file (runs in a worker).
+
+    Args:
+        song (Song): The song to render
+        path (str): Output file path
+
+    Returns:
+        float: Render time in seconds
+    """
+    started = time.perf_counter()
+    track = render_click_track(song.bpm, song.beats, song.mode, song.length, samples=_worker_samples)
+    write_wav(path, track)
+    return time.perf_counter() - started
+
+def render_setlist(songs, output_dir, workers=None, on_done=None):
+    """
+    Render every song of a setlist in parallel.
+
+    Samples are decoded once here and shared read-only with the worker
+    processes, which only render and write their own songs.
+
+    Args:
+        songs (list): Song tuples to render
+        output_dir (str): Folder for the WAV files, created if missing
+        workers (int, optional): Number of worker processes, defaults to one per CPU
+        on_done (function, optional): Called with (number, song, path, seconds or error)
+            as each song finishes
+
+    Returns:
+        dict: Song number -> render time in seconds, or the error message
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    block, layout = share_samples(load_samples())
+    results = {}
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_samples,
+                                 initargs=(block.name, layout)) as pool:
+            futures = {}
+            for number, song in enumerate(songs, start=1):
+                path = os.path.join(output_dir, song_filename(number, song))
+                futures[pool.submit(render_song, song, path)] = (number, song, path)
+
+            for future in as_completed(futures):
+                number, song, path = futures[future]
+                try:
+                    results[number] = future.result()
+                except (OSError, ValueError) as error:
+                    results[number] = str(error)
+                if on_done:
+                    on_done(number, song, path, results[number])
+    finally:
+        block.close()
+        block.unlink()
+
+    return results
+
+#=======================================================
+# Main Program Function
+#=======================================================
+
+def setlist_throughput(songs, results, elapsed):
+    """
+    Sum up the songs that were rendered; failed songs are left out.
+
+    Args:
+        songs (list): Song tuples of the setlist
+        results (dict): Song number -> render time in seconds, or the error message
+        elapsed (float): Wall time of the whole render in seconds
+
+    Returns:
+        tuple: (rendered songs, seconds of audio, seconds of audio per second of wall time)
+    """
+    rendered = [song for number, song in enumerate(songs, start=1) if not isinstance(results.get(number), str)]
+    audio_seconds = sum(song.length for song in rendered)
+    return len(rendered), audio_seconds, audio_seconds / elapsed if elapsed else 0
+
+def print_song_result(number, song, path, result):
+    """
+    Print the outcome of one rendered song.
+
+    Args:
+        number (int): Position of the song in the setlist
+        song (Song): The song
+        path (str): Output file path
+        result (float or str): Render time in seconds, or an error message
+    """
+    if isinstance(result, str):
+        print(CURRENT_LANG["SETLIST_SONG_FAILED"].format(number, song.title, result))
+    else:
+        print(CURRENT_LANG["SETLIST_SONG_DONE"].format(
+            number, song.title, song.bpm, song.beats, song.mode, path, result))
+
+def run_setlist():
+    """
+    Render a folder of click tracks from a setlist file.
+    This is the main function of the setlist command-line tool.
+    """
+    parser = argparse.ArgumentParser(description="Render a click track for every song of a setlist.")
+    parser.add_argument("setlist", help="CSV file with title,bpm,beats,mode,length columns")
+    parser.add_argument("--output", default="clicks", help="output folder (default: clicks)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    try:
+        songs = read_setlist(args.setlist)
+    except (OSError, ValueError) as error:
+        print(error)
+        return
+
+    started = time.perf_counter()
+    results = render_setlist(songs, args.output, args.workers, on_done=print_song_result)
+    elapsed = time.perf_counter() - started
+
+    # Throughput: seconds of audio rendered per second of wall time
+    count, audio_seconds, speed = setlist_throughput(songs, results, elapsed)
+    print(CURRENT_LANG["SETLIST_SUMMARY"].format(count, audio_seconds, elapsed, speed))
+
+# Program entry point
+if __name__ == "__main__":
+    run_setlist()
@@ -0,0 +1,207 @@
+import math
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from constants import CURRENT_LANG, MIN_BPM, MAX_BPM, MIN_BEATS, MAX_BEATS
+
+#-------------------------------------------------------
+# Tempo curve constants
+#-------------------------------------------------------
+CONSTANT = "constant"        # Same tempo for the whole section
+LINEAR = "linear"            # Tempo changes by the same BPM every beat
+EXPONENTIAL = "exponential"  # Tempo changes by the same ratio every beat
+CURVES = {CONSTANT, LINEAR, EXPONENTIAL}
+
+NS_PER_SECOND = 1_000_000_000
+
+# A run of bars in one meter, with a tempo ramp from bpm to end_bpm
+Section = namedtuple("Section", ["bars", "beats", "bpm", "end_bpm", "curve"])
+
+
+def section(bars, bpm, end_bpm=None, beats=4, curve=None):
+    """
+    Build a validated tempo map section.
+
+    Args:
+        bars (int): Number of bars in the section
+        bpm (float): Tempo at the start of the section
+        end_bpm (float, optional): Tempo reached at the end of the section, defaults to bpm
+        beats (int, optional): Beats per bar, defaults to 4
+        curve (str, optional): LINEAR or EXPONENTIAL ramp, defaults to LINEAR
+            (CONSTANT when end_bpm is omitted)
+
+    Returns:
+        Section: The section
+
+    Raises:
+        ValueError: If a value is out of range (beats outside MIN_BEATS..MAX_BEATS)
+            or the curve is unknown
+    """
+    if end_bpm is None:
+        end_bpm = bpm
+    if curve is None:
+        curve = CONSTANT if end_bpm == bpm else LINEAR
+    if beats is None or beats < MIN_BEATS or beats > MAX_BEATS:
+        raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+    if bars < 1 or curve not in CURVES:
+        raise ValueError(CURRENT_LANG["INVALID_TEMPO_MAP"])
+    if not (MIN_BPM <= bpm <= MAX_BPM and MIN_BPM <= end_bpm <= MAX_BPM):
+        raise ValueError(CURRENT_LANG["INVALID_BPM_INIT"])
+    if curve == CONSTANT and end_bpm != bpm:
+        raise ValueError(CURRENT_LANG["INVALID_TEMPO_MAP"])
+    return Section(bars, beats, bpm, end_bpm, curve)
+
+
+def section_time(sec, position):
+    """
+    Time from the start of a section to a position, in seconds.
+
+    This is the closed-form integral of 60 / bpm(x) over the first
+    `position` beats, with bpm(x) the tempo curve of the section.
+
+    Args:
+        sec (Section): The section
+        position (float): Position in beats from the start of the section
+
+    Returns:
+        float: Elapsed time in seconds
+    """
+    length = sec.bars * sec.beats
+    start, end = sec.bpm, sec.end_bpm
+    if sec.curve == CONSTANT or start == end:
+        return 60 * position / start
+    if sec.curve == LINEAR:
+        # bpm(x) = start + slope * x
+        slope = (end - start) / length
+        return 60 / slope * math.log1p(slope * position / start)
+    # bpm(x) = start * ratio ** (x / length)
+    log_ratio = math.log(end / start)
+    return 60 * length / (start * log_ratio) * -math.expm1(-log_ratio * position / length)
+
+
+def section_bpm(sec, position):
+    """
+    Tempo of a section at a position.
+
+    Args:
+        sec (Section): The section
+        position (float): Position in beats from the start of the section
+
+    Returns:
+        float: Tempo in beats per minute
+    """
+    fraction = position / (sec.bars * sec.beats)
+    if sec.curve == EXPONENTIAL:
+        return sec.bpm * (sec.end_bpm / sec.bpm) ** fraction
+    return sec.bpm + (sec.end_bpm - sec.bpm) * fraction
+
+
+class TempoMap:
+    """
+    A sequence of sections with tempo ramps and meter changes,
+    compiled into a table of absolute beat onset times.
+
+    The tempo curve of every section is integrated in closed form once,
+    when the map is built. Playback and rendering only read the table:
+    beat i starts onsets_ns[i] nanoseconds after the start of the map and
+    lasts until onsets_ns[i + 1]. Bars are found by index, and any point
+    in time with a binary search.
+    """
+
+    def __init__(self, sections):
+        """
+        Compile a tempo map.
+
+        Args:
+            sections (list): Section tuples, in playing order
+
+        Raises:
+            ValueError: If there are no sections
+        """
+        if not sections:
+            raise ValueError(CURRENT_LANG["INVALID_TEMPO_MAP"])
+        self.sections = tuple(sections)
+
+        #----------------------------
+        # Onset table
+        #----------------------------
+        self.onsets_ns = array("q")   # Start of every beat, plus the end of the map
+        self.bpms = array("d")        # Tempo at the start of every beat
+        self.beat_numbers = array("h")  # Beat number in its bar (1 = downbeat)
+        self.bar_starts = array("q")  # Beat index of the first beat of every bar
+
+        section_start = 0.0
+        for sec in self.sections:
+            for bar in range(sec.bars):
+                self.bar_starts.append(len(self.beat_numbers))
+                for beat in range(sec.beats):
+                    position = bar * sec.beats + beat
+                    seconds = section_start + section_time(sec, position)
+                    self.onsets_ns.append(round(seconds * NS_PER_SECOND))
+                    self.bpms.append(section_bpm(sec, position))
+                    self.beat_numbers.append(beat + 1)
+            section_start += section_time(sec, sec.bars * sec.beats)
+        self.onsets_ns.append(round(section_start * NS_PER_SECOND))
+
+    @classmethod
+    def ramp(cls, bpm, end_bpm, bars, beats=4, curve=LINEAR):
+        """
+        Build a tempo trainer map: one ramp from bpm to end_bpm.
+
+        Args:
+            bpm (float): Starting tempo
+            end_bpm (float): Final tempo
+            bars (int): Length of the ramp in bars
+            beats (int, optional): Beats per bar, defaults to 4
+            curve (str, optional): LINEAR or EXPONENTIAL, defaults to LINEAR
+
+        Returns:
+            TempoMap: The compiled map
+        """
+        return cls([section(bars, bpm, end_bpm, beats, curve)])
+
+    @property
+    def beat_count(self):
+        """int: Total number of beats in the map."""
+        return len(self.beat_numbers)
+
+    @property
+    def bar_count(self):
+        """int: Total number of bars in the map."""
+        return len(self.bar_starts)
+
+    @property
+    def duration_ns(self):
+        """int: Length of the whole map in nanoseconds."""
+        return self.onsets_ns[-1]
+
+    def bar_beat(self, bar):
+        """
+        Get the index of the first beat of a bar.
+
+        Args:
+            bar (int): Bar number, starting at 1
+
+        Returns:
+            int: Beat index into the onset table
+
+        Raises:
+            ValueError: If the bar is not in the map
+        """
+        if not 1 <= bar <= self.bar_count:
+            raise ValueError(CURRENT_LANG["INVALID_BAR"].format(self.bar_count))
+        return self.bar_starts[bar - 1]
+
+    def seek(self, time_ns):
+        """
+        Find the beat and bar playing at a time, with a binary search.
+
+        Args:
+            time_ns (int): Time from the start of the map in nanoseconds
+
+        Returns:
+            tuple: (beat index, bar number), clamped to the map
+        """
+        beat = min(max(bisect_right(self.onsets_ns, time_ns) - 1, 0), self.beat_count - 1)
+        bar = bisect_right(self.bar_starts, beat)
+        return beat, bar
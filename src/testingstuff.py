@@ -1,16 +1,49 @@
 import os
 import sys
 import time
+import threading
 import pytest
+import pygame
+import numpy as np
 from unittest.mock import patch, MagicMock, call
 
 # Add the src directory to the path so we can import the modules
 sys.path.append('src')
 
 # Import modules to test
-from constants import MIN_BPM, MAX_BPM, CURRENT_LANG
+from constants import MIN_BPM, MAX_BPM, MAX_BEATS, RENDER_SAMPLE_RATE, CURRENT_LANG
+from constants import SOUND_FILE, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION
 from metronome import Metronome, NORMAL_MODE, EIGHTH_MODE, TRIPLET_MODE, SIXTEENTH_MODE
+from metronome import SCHEDULE_ABSOLUTE, NS_PER_MINUTE, click_deadline_ns
+from metronome import SCHEDULE_LOOKAHEAD, render_channel_segment
+from metronome import SWING_MODE, SEPTUPLET_MODE
+from metronome import APPLY_ON_SUBDIVISION, APPLY_ON_BAR, Config
+from patterns import PATTERNS, RhythmPattern, SOUND_BEAT, SOUND_SUB, SOUND_GROUP
+from render import mix_pcm, render_measure
+from render import click_onsets, render_range, render_click_track, load_samples, write_wav, decode_wav
+from render import BlockCache, iter_click_track, wav_header
+from setlist import read_setlist, render_setlist, setlist_throughput, Song
+from polymeter import Layer, PolymeterTable, PolymeterMetronome, polyrhythm
+from tempomap import TempoMap, section, EXPONENTIAL
+from render import render_tempo_map
+from scheduler import Scheduler
+from events import EventRing, EventDispatcher, iter_events, DROP_NEWEST
+from async_metronome import AsyncMetronome, LoopScheduler
+from timing import TimingStats
+from benchmark import sweep_cases, run_timing_sweep, simulate_session
+from clock import VirtualClock, PrecisionClock, calibrate_spin_ns
+from timerfd import Timerfd, TimerfdClock, TimerfdScheduler, timerfd_available
+from audio import NullBackend, WavSinkBackend, PygameBackend, AudioSession, audio_session
+from audio import SoundCache, SoundSet, DEFAULT_SOUND_SET
+from pull import PullEngine, stream_to_wav
+from isolated import IsolatedMetronome, ControlBlock, SharedEventRing, metronome_from_env
+from tracing import BeatTracer, tracer_from_env, PHASE_SLEEP, PHASE_CALLBACK, PHASE_SUBDIVISION_WAIT, PHASES
+
+# The web app imports the engine from src/, so it can be tested from here
+sys.path.append('web')
+from app import app as web_app, block_cache
 from main import validate_bpm, handle_quit_or_stop, handle_rhythm_mode, handle_time_signature, handle_bpm_update
+from main import format_timing_stats, check_dependencies
 
 #===============================================================
 # Fixtures
@@ -28,7 +61,11 @@ def mock_pygame():
         mock_channel = MagicMock()
         mock_mixer.Channel.return_value = mock_channel
         
+        # A fresh audio session, so no real sounds are reused and no mock
+        # sounds leak into later tests
+        audio_session.cache_clear()
         yield mock_mixer
+        audio_session.cache_clear()
 
 @pytest.fixture
 def mock_path():
@@ -125,6 +162,17 @@ class TestMetronome:
         with pytest.raises(ValueError):
             metronome.set_rhythm_mode("invalid_mode")
     
+    def test_interval_setter(self, metronome):
+        """Test that setting the interval stores a validated, whole BPM"""
+        metronome.interval = 0.7
+        assert metronome.bpm == 86 and isinstance(metronome.bpm, int)
+        assert metronome.interval == 60 / 86
+        with pytest.raises(ValueError):
+            metronome.interval = 60 / (MAX_BPM + 10)
+        with pytest.raises(ValueError):
+            metronome.interval = 60 / (MIN_BPM - 5)
+        assert metronome.bpm == 86
+    
     def test_get_subdivision_interval(self, metronome):
         """Test calculation of subdivision intervals"""
         metronome.bpm = 60
@@ -157,8 +205,9 @@ class TestMetronome:
         metronome.stop()
         assert metronome.is_running == False
         
-        # Verify pygame.mixer.quit was called
-        mock_pygame.quit.assert_called_once()
+        # The mixer stays open for the next start
+        mock_pygame.quit.assert_not_called()
+        assert metronome.audio.session.is_open
     
     def test_on_beat_callback(self, mock_pygame, mock_path):
         """Test that the beat callback is called correctly"""
@@ -186,6 +235,1541 @@ class TestMetronome:
         assert mock_callback.call_count == 2
         mock_callback.assert_called_with(2)
 
+#===============================================================
+# Absolute Scheduling Tests
+#===============================================================
+
+class TestAbsoluteScheduling:
+    """Tests for the drift-free absolute deadline grid"""
+    
+    def test_hour_at_max_bpm_sixteenths_has_no_drift(self):
+        """Test that one hour of sixteenths at MAX_BPM lands exactly on the hour"""
+        clicks = MAX_BPM * 4 * 60  # Four clicks per beat for 60 minutes
+        deadline = click_deadline_ns(0, clicks, MAX_BPM, 4)
+        assert deadline == 3600 * 1_000_000_000
+    
+    def test_error_stays_bounded_on_uneven_grid(self):
+        """Test that an uneven grid (130 BPM triplets) never drifts past 1 ns"""
+        for click in (1, 1000, 10**6, 10**8):
+            exact = click * NS_PER_MINUTE / (130 * 3)
+            assert abs(click_deadline_ns(0, click, 130, 3) - exact) < 1
+    
+    def test_invalid_scheduling(self, mock_pygame, mock_path):
+        """Test that an unknown scheduling mode raises ValueError"""
+        with pytest.raises(ValueError):
+            Metronome(120, scheduling="invalid")
+    
+    def test_absolute_loop_plays_clicks(self, mock_pygame, mock_path):
+        """Test that the absolute loop plays beats and subdivisions"""
+        mock_channel = mock_pygame.Channel.return_value
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE)
+        metronome.set_rhythm_mode(SIXTEENTH_MODE)
+        
+        metronome.start()
+        time.sleep(0.1)
+        metronome.stop()
+        
+        # 100 ms of sixteenths at 400 BPM is at least two clicks
+        assert metronome.origin_ns is not None
+        assert mock_channel.play.call_count >= 2
+
+#===============================================================
+# Lookahead Scheduling Tests
+#===============================================================
+
+class TestLookaheadScheduling:
+    """Tests for the lookahead scheduler and its segment renderer"""
+    
+    def test_render_segment_places_clicks(self):
+        """Test that clicks land at their frame offsets, cut by the next click"""
+        clicks = [(1, b"aaaa"), (3, b"bbbb")]
+        data = render_channel_segment(clicks, 0, 6, 1)
+        assert data == b"\x00aabbb"
+    
+    def test_render_segment_spills_previous_tail(self):
+        """Test that a click from an earlier window continues into this one"""
+        clicks = [(-2, b"abcdef")]
+        data = render_channel_segment(clicks, 0, 6, 2)
+        assert data == b"ef" + b"\x00" * 10
+    
+    def test_lookahead_loop_queues_beats(self, mock_pygame, mock_path):
+        """Test that queued beats reach on_beat once they become audible"""
+        mock_pygame.get_init.return_value = (44100, -16, 2)
+        mock_pygame.Sound.return_value.get_raw.return_value = b"\x01" * 400
+        mock_callback = MagicMock()
+        metronome = Metronome(MAX_BPM, on_beat=mock_callback, scheduling=SCHEDULE_LOOKAHEAD)
+        
+        metronome.start()
+        time.sleep(0.1)
+        metronome.stop()
+        
+        # The first beat is audible right away and starts on beat 1
+        mock_callback.assert_any_call(1)
+        assert mock_pygame.Channel.return_value.play.call_count >= 1
+
+#===============================================================
+# Measure Loop Tests
+#===============================================================
+
+class TestMeasureLoop:
+    """Tests for the pre-rendered measure loop mode"""
+    
+    def test_mix_pcm_clips(self):
+        """Test that mixing loud 16-bit samples clips instead of wrapping"""
+        loud = (30000).to_bytes(2, "little", signed=True)
+        mixed = mix_pcm([loud, loud], -16)
+        assert int.from_bytes(mixed, "little", signed=True) == 32767
+    
+    def test_render_measure_offsets(self):
+        """Test sample-accurate beat offsets and measure length"""
+        # 60 BPM, 2 beats of eighths at 100 Hz mono 8-bit: 200 frames per measure
+        pcm, beat_frames = render_measure(b"\x01", b"\x02", b"\x03", 60, 2, PATTERNS[EIGHTH_MODE], 100, -8, 1)
+        assert len(pcm) == 200
+        assert beat_frames == [0, 100]
+        assert (pcm[0], pcm[50], pcm[100], pcm[150]) == (1, 3, 2, 3)
+    
+    def test_measure_loop_is_cached(self, metronome, mock_pygame):
+        """Test that a measure is rendered once per bpm, meter and mode"""
+        mock_pygame.get_init.return_value = (100, -8, 1)
+        mock_pygame.Sound.return_value.get_raw.return_value = b"\x01"
+        sound_calls = mock_pygame.Sound.call_count
+        
+        first = metronome.get_measure_loop(120, 4, EIGHTH_MODE)
+        second = metronome.get_measure_loop(120, 4, EIGHTH_MODE)
+        assert first is second
+        assert mock_pygame.Sound.call_count == sound_calls + 1
+    
+    def test_measure_loop_through_backend(self, mock_pygame, mock_path):
+        """Test that the loop mode asks its backend for the format and the measure sound"""
+        audio = MagicMock(streaming=True)
+        audio.mixer_format.return_value = (100, -8, 1)
+        audio.load_sound.return_value.get_raw.return_value = b"\x01"
+        metronome = Metronome(120, scheduling="loop", audio=audio)
+        metronome.load_sound()
+        sound_calls = mock_pygame.Sound.call_count
+        
+        measure, measure_ns, beat_offsets_ns = metronome.get_measure_loop(60, 2, NORMAL_MODE)
+        assert measure is audio.buffer_sound.return_value
+        assert len(audio.buffer_sound.call_args.args[0]) == 200
+        assert (measure_ns, beat_offsets_ns) == (2_000_000_000, [0, 1_000_000_000])
+        assert mock_pygame.Sound.call_count == sound_calls
+
+#===============================================================
+# Offline Rendering Tests
+#===============================================================
+
+class TestOfflineRendering:
+    """Tests for the vectorized offline click track renderer"""
+    
+    def test_click_onsets(self):
+        """Test onset frames and kinds for one measure of 3/4 eighths"""
+        onsets, kinds = click_onsets(60, 3, PATTERNS[EIGHTH_MODE], 6 * 100, rate=100)
+        assert list(onsets) == [0, 50, 100, 150, 200, 250, 300, 350, 400, 450, 500, 550]
+        assert list(kinds[:6]) == [0, 2, 1, 2, 1, 2]
+    
+    def test_render_matches_naive_mix(self):
+        """Test that vectorized overlap-add equals mixing click by click"""
+        samples = load_samples()
+        n_frames = 48000 * 5
+        onsets, kinds = click_onsets(137, 3, PATTERNS[TRIPLET_MODE], n_frames)
+        expected = np.zeros((n_frames + 48000, 2), dtype=np.float32)
+        for onset, kind in zip(onsets, kinds):
+            expected[onset:onset + len(samples[kind])] += samples[kind]
+        
+        # Render in uneven windows to cover tails crossing window edges
+        windows = [render_range(samples, 137, 3, PATTERNS[TRIPLET_MODE], start, min(7777, n_frames - start))
+                   for start in range(0, n_frames, 7777)]
+        assert np.allclose(np.concatenate(windows), expected[:n_frames])
+    
+    def test_ten_minutes_render_fast(self):
+        """Test that a 10-minute track renders in well under a second"""
+        load_samples()
+        started = time.perf_counter()
+        track = render_click_track(MAX_BPM, 4, SIXTEENTH_MODE, 600)
+        assert time.perf_counter() - started < 1.0
+        assert track.shape == (48000 * 600, 2)
+    
+    @pytest.mark.parametrize("beats", [0, -3, 13])
+    def test_invalid_beats_per_measure(self, beats):
+        """Test that a meter outside 1-12 is refused instead of rendering silence"""
+        with pytest.raises(ValueError, match=CURRENT_LANG["INVALID_TIME_SIG"]):
+            render_click_track(120, beats, NORMAL_MODE, 1.0)
+    
+    @pytest.mark.parametrize("duration", [0, -5.0])
+    def test_invalid_duration(self, duration):
+        """Test that an empty or negative duration is refused with a clear message"""
+        with pytest.raises(ValueError, match=CURRENT_LANG["INVALID_DURATION"]):
+            render_click_track(120, 4, NORMAL_MODE, duration)
+    
+    def test_write_wav_round_trip(self, tmp_path):
+        """Test that a written track decodes back to the same length"""
+        track = render_click_track(120, 4, EIGHTH_MODE, 2)
+        path = str(tmp_path / "click.wav")
+        write_wav(path, track)
+        assert decode_wav(path).shape == track.shape
+
+#===============================================================
+# Click Track Streaming Tests
+#===============================================================
+
+class TestClickTrackStreaming:
+    """Tests for block-wise WAV streaming and the Flask endpoint"""
+    
+    @pytest.fixture
+    def client(self):
+        """Flask test client for the web app"""
+        web_app.config["TESTING"] = True
+        return web_app.test_client()
+    
+    def test_stream_matches_full_render(self):
+        """Test that streamed blocks equal one full render"""
+        cache = BlockCache(8)
+        streamed = b"".join(iter_click_track(cache, 120, 3, TRIPLET_MODE, 3))
+        track = render_click_track(120, 3, TRIPLET_MODE, 3)
+        assert streamed[:44] == wav_header(len(track))
+        assert np.array_equal(np.frombuffer(streamed[44:], dtype="<i2").reshape(-1, 2),
+                              (np.clip(track, -1, 1) * 32767).astype("<i2"))
+    
+    def test_cache_is_bounded_and_reused(self):
+        """Test that blocks are reused and the cache never exceeds its size"""
+        cache = BlockCache(2)
+        b"".join(iter_click_track(cache, 120, 4, NORMAL_MODE, 2))
+        b"".join(iter_click_track(cache, 120, 4, NORMAL_MODE, 2))
+        assert cache.hits == 2
+        
+        b"".join(iter_click_track(cache, 120, 4, NORMAL_MODE, 5))
+        assert len(cache.blocks) == 2
+    
+    def test_endpoint_streams_wav(self, client):
+        """Test the full download, its headers and ETag revalidation"""
+        response = client.get("/click-track.wav?bpm=120&beats=4&mode=eighth&length=2")
+        assert response.status_code == 200
+        assert response.data[:4] == b"RIFF"
+        assert int(response.headers["Content-Length"]) == len(response.data)
+        
+        etag = response.headers["ETag"]
+        cached = client.get("/click-track.wav?bpm=120&beats=4&mode=eighth&length=2",
+                            headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+    
+    def test_etag_follows_sound_files(self, client):
+        """Test that replacing a sound file changes the ETag and bypasses cached blocks"""
+        url = "/click-track.wav?bpm=120&beats=4&mode=normal&length=1"
+        etag = client.get(url).headers["ETag"]
+        stat = os.stat(SOUND_FILE_UP)
+        os.utime(SOUND_FILE_UP, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        try:
+            misses = block_cache.misses
+            response = client.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            assert response.data[:4] == b"RIFF"
+            assert block_cache.misses == misses + 1
+        finally:
+            os.utime(SOUND_FILE_UP, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert client.get(url).headers["ETag"] == etag
+    
+    def test_endpoint_range(self, client):
+        """Test that a byte range returns exactly that part of the file"""
+        url = "/click-track.wav?bpm=90&beats=3&mode=triplet&length=3"
+        full = client.get(url).data
+        partial = client.get(url, headers={"Range": "bytes=40-199999"})
+        assert partial.status_code == 206
+        assert partial.data == full[40:200000]
+        assert partial.headers["Content-Range"] == f"bytes 40-199999/{len(full)}"
+    
+    def test_endpoint_rejects_invalid_settings(self, client):
+        """Test validation of query parameters"""
+        assert client.get(f"/click-track.wav?bpm={MAX_BPM + 1}").status_code == 400
+        assert client.get("/click-track.wav?mode=waltz").status_code == 400
+
+#===============================================================
+# Setlist Batch Rendering Tests
+#===============================================================
+
+class TestSetlist:
+    """Tests for the parallel setlist renderer"""
+    
+    def test_read_setlist(self, tmp_path):
+        """Test parsing a setlist with optional columns left empty"""
+        path = tmp_path / "gig.csv"
+        path.write_text("title,bpm,beats,mode,length\nOpener,120,4,eighth,180\nBallad,60,,,240\n")
+        songs = read_setlist(str(path))
+        assert songs == [Song("Opener", 120, 4, EIGHTH_MODE, 180.0), Song("Ballad", 60, 4, NORMAL_MODE, 240.0)]
+    
+    def test_read_setlist_bad_row(self, tmp_path):
+        """Test that a row with a missing BPM reports its line"""
+        path = tmp_path / "gig.csv"
+        path.write_text("title,bpm,beats,mode,length\nOpener,,4,eighth,180\n")
+        with pytest.raises(ValueError):
+            read_setlist(str(path))
+    
+    @pytest.mark.parametrize("row, message", [
+        ("Silent,120,0,normal,180", "INVALID_TIME_SIG"),
+        ("Backwards,120,4,normal,-5", "INVALID_DURATION"),
+    ])
+    def test_read_setlist_invalid_settings(self, tmp_path, row, message):
+        """Test that rows that would render silence or fail are refused with their line"""
+        path = tmp_path / "gig.csv"
+        path.write_text(f"title,bpm,beats,mode,length\nOpener,120,4,eighth,180\n{row}\n")
+        with pytest.raises(ValueError) as error:
+            read_setlist(str(path))
+        assert str(error.value) == CURRENT_LANG["SETLIST_ROW_INVALID"].format(3, CURRENT_LANG[message])
+    
+    def test_throughput_leaves_out_failed_songs(self):
+        """Test that failed songs count neither as songs nor as audio"""
+        songs = [Song("One", 120, 4, NORMAL_MODE, 120), Song("Bad", 120, 0, NORMAL_MODE, 60)]
+        results = {1: 0.5, 2: CURRENT_LANG["INVALID_TIME_SIG"]}
+        assert setlist_throughput(songs, results, 2.0) == (1, 120, 60.0)
+    
+    def test_render_setlist(self, tmp_path):
+        """Test that every song is rendered and bad songs are reported"""
+        songs = [Song("One", 120, 4, EIGHTH_MODE, 2), Song("Two/Three", 90, 3, TRIPLET_MODE, 1),
+                 Song("Bad", MAX_BPM + 1, 4, NORMAL_MODE, 1)]
+        results = render_setlist(songs, str(tmp_path), workers=2)
+        
+        assert decode_wav(str(tmp_path / "01 - One.wav")).shape == (96000, 2)
+        assert decode_wav(str(tmp_path / "02 - Two_Three.wav")).shape == (48000, 2)
+        assert results[3] == CURRENT_LANG["INVALID_BPM_INIT"]
+    
+    def test_render_setlist_write_error(self, tmp_path):
+        """Test that a song whose file cannot be written fails alone"""
+        songs = [Song("One", 120, 4, NORMAL_MODE, 1), Song("Two", 90, 3, NORMAL_MODE, 1)]
+        (tmp_path / "01 - One.wav").mkdir()  # A folder in the way of the WAV file
+        results = render_setlist(songs, str(tmp_path), workers=2)
+        
+        assert isinstance(results[1], str)
+        assert decode_wav(str(tmp_path / "02 - Two.wav")).shape == (48000, 2)
+
+#===============================================================
+# Rhythm Pattern Tests
+#===============================================================
+
+class TestRhythmPatterns:
+    """Tests for the data-driven rhythm pattern table"""
+    
+    def test_compiled_positions(self):
+        """Test that offsets compile to integer steps on a common grid"""
+        swing = PATTERNS[SWING_MODE]
+        assert (swing.steps, swing.positions) == (3, (0, 2))
+        
+        grouped = PATTERNS[SEPTUPLET_MODE]
+        assert grouped.steps == 7
+        assert grouped.sound_ids[:3] == (SOUND_BEAT, SOUND_SUB, SOUND_GROUP)
+    
+    def test_mixed_denominators(self):
+        """Test a pattern whose offsets have different denominators"""
+        pattern = RhythmPattern("mixed", ["0", "1/3", "1/2"], ["beat", "sub", "sub"])
+        assert (pattern.steps, pattern.positions) == (6, (0, 2, 3))
+    
+    def test_invalid_pattern(self):
+        """Test that patterns not starting on the beat are rejected"""
+        with pytest.raises(ValueError):
+            RhythmPattern("late", ["1/2"], ["beat"])
+        with pytest.raises(ValueError):
+            RhythmPattern("backwards", ["0", "2/3", "1/3"], ["beat", "sub", "sub"])
+    
+    def test_set_any_pattern_mode(self, metronome):
+        """Test that every mode in the table can be selected"""
+        for mode in PATTERNS:
+            if mode != metronome.rhythm_mode:
+                assert metronome.set_rhythm_mode(mode) == mode
+                assert metronome.pattern is PATTERNS[mode]
+    
+    def test_swing_clicks_land_on_grid(self):
+        """Test swung onsets at 60 BPM: beat, then two thirds later"""
+        onsets, kinds = click_onsets(60, 4, PATTERNS[SWING_MODE], 200, rate=100)
+        assert list(onsets) == [0, 66, 100, 166]
+        assert list(kinds) == [0, 2, 1, 2]
+
+#===============================================================
+# Polymeter Tests
+#===============================================================
+
+class TestPolymeter:
+    """Tests for the layered polymeter engine"""
+    
+    def test_three_against_four(self):
+        """Test that 3-against-4 merges into one sorted onset table"""
+        table = PolymeterTable(polyrhythm(3))
+        assert table.steps_per_beat == 3
+        assert table.period_steps == 12
+        assert list(zip(table.steps, table.layers)) == [
+            (0, 0), (0, 1), (3, 0), (4, 1), (6, 0), (8, 1), (9, 0)]
+        assert table.beats == (1, 1, 2, 2, 3, 3, 4)
+    
+    def test_seven_eight_over_four_four(self):
+        """Test that 7/8 over 4/4 realigns after the LCM of both cycles"""
+        table = PolymeterTable([Layer(4), Layer(7, "1/2")])
+        assert table.period_steps == 28 * table.steps_per_beat
+        assert table.layers.count(0) == 28
+        assert table.layers.count(1) == 56
+        assert list(table.steps) == sorted(table.steps)
+    
+    def test_layers_with_subdivisions(self):
+        """Test that layer rhythm modes add their clicks to the table"""
+        table = PolymeterTable([Layer(2, rhythm_mode=EIGHTH_MODE), Layer(3, "2/3")])
+        assert table.layers.count(0) == 4
+        assert table.layers.count(1) == 3
+    
+    def test_invalid_layer(self):
+        """Test that empty layers are rejected"""
+        with pytest.raises(ValueError):
+            Layer(0)
+    
+    def test_each_layer_gets_its_callback(self, mock_pygame, mock_path):
+        """Test that both layers report beats while phase-locked on one thread"""
+        main_beats = MagicMock()
+        cross_beats = MagicMock()
+        layers = polyrhythm(3, on_beat=cross_beats)
+        layers[0].on_beat = main_beats
+        mock_pygame.get_num_channels.return_value = 8
+        
+        metronome = PolymeterMetronome(MAX_BPM, layers)
+        metronome.start()
+        time.sleep(0.1)
+        metronome.stop()
+        
+        main_beats.assert_any_call(1)
+        cross_beats.assert_any_call(1)
+    
+    def test_events_for_every_layer(self, mock_pygame, mock_path):
+        """Test that every layer's clicks reach the event ring and tempo changes apply on a beat"""
+        mock_pygame.get_num_channels.return_value = 8
+        clock = VirtualClock()
+        metronome = PolymeterMetronome(60, polyrhythm(3), clock=clock)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        clock.run_until(3_500_000_000)
+        assert metronome.current_beat == 4
+        metronome.update_bpm(120)  # Applies at the next beat
+        clock.run_until(5_900_000_000)
+        metronome.stop()
+        
+        events = [(event.layer, event.beat, event.deadline_ns) for event in reader.poll()]
+        assert [event for event in events if event[0] == 0] == [
+            (0, 1, 0), (0, 2, 1_000_000_000), (0, 3, 2_000_000_000), (0, 4, 3_000_000_000),
+            (0, 1, 4_000_000_000), (0, 2, 4_500_000_000), (0, 3, 5_000_000_000), (0, 4, 5_500_000_000)]
+        assert [event for event in events if event[0] == 1] == [
+            (1, 1, 0), (1, 2, 1_333_333_333), (1, 3, 2_666_666_666),
+            (1, 1, 4_000_000_000), (1, 2, 4_666_666_666), (1, 3, 5_333_333_333)]
+
+#===============================================================
+# Tempo Map Tests
+#===============================================================
+
+class TestTempoMap:
+    """Tests for tempo ramps and tempo maps"""
+    
+    def test_constant_section_matches_fixed_tempo(self):
+        """Test that a constant section has the same grid as a fixed BPM"""
+        tempo_map = TempoMap([section(2, 120, beats=3)])
+        assert list(tempo_map.onsets_ns) == [step * 500_000_000 for step in range(7)]
+        assert list(tempo_map.beat_numbers) == [1, 2, 3, 1, 2, 3]
+    
+    def test_ramps_speed_up_every_beat(self):
+        """Test that linear and exponential ramps shorten every beat"""
+        for curve in ("linear", EXPONENTIAL):
+            tempo_map = TempoMap.ramp(60, 120, 4, curve=curve)
+            lengths = np.diff(np.frombuffer(tempo_map.onsets_ns, dtype=np.int64))
+            assert np.all(np.diff(lengths) < 0)
+            assert lengths[0] < 1_000_000_000 and lengths[-1] > 500_000_000
+    
+    def test_linear_ramp_duration(self):
+        """Test the integrated duration of a linear ramp: 60 / slope * ln(end / start)"""
+        tempo_map = TempoMap.ramp(60, 120, 2)
+        expected = 60 / (60 / 8) * np.log(2)
+        assert tempo_map.duration_ns == pytest.approx(expected * 1e9, abs=1)
+    
+    def test_seek_by_bar_and_time(self):
+        """Test that bars and times map to the right beat"""
+        tempo_map = TempoMap([section(2, 60, 90), section(3, 90, beats=3)])
+        assert tempo_map.bar_beat(3) == 8
+        assert tempo_map.seek(tempo_map.onsets_ns[9] + 1) == (9, 3)
+        assert tempo_map.seek(tempo_map.duration_ns * 2) == (tempo_map.beat_count - 1, 5)
+        with pytest.raises(ValueError):
+            tempo_map.bar_beat(6)
+    
+    @pytest.mark.parametrize("beats", [0, MAX_BEATS + 1, 50])
+    def test_section_meter_range(self, beats):
+        """Test that a section refuses meters the engines cannot play"""
+        with pytest.raises(ValueError, match=CURRENT_LANG["INVALID_TIME_SIG"]):
+            section(1, 120, beats=beats)
+    
+    def test_render_tempo_map(self):
+        """Test that rendered clicks start at the table's onsets"""
+        tempo_map = TempoMap.ramp(100, 200, 1)
+        track = render_tempo_map(tempo_map)
+        accent = load_samples()[0]
+        assert len(track) == tempo_map.duration_ns * 48000 // 1_000_000_000
+        np.testing.assert_allclose(track[:100], accent[:100])
+    
+    def test_metronome_plays_tempo_map(self, mock_pygame, mock_path):
+        """Test that the metronome follows a tempo map and stops at its end"""
+        beats = []
+        metronome = Metronome(120, on_beat=beats.append)
+        metronome.play_tempo_map(TempoMap([section(1, MAX_BPM, beats=3)]))
+        metronome.beat_thread.join(timeout=2)
+        assert beats == [1, 2, 3]
+        assert not metronome.is_running
+    
+    def test_tempo_map_end_tears_down(self, tmp_path, mock_path):
+        """Test that a tempo map running out finishes the WAV file and trace, and releases the sounds"""
+        wav_path, trace_path = str(tmp_path / "map.wav"), tmp_path / "trace.json"
+        metronome = Metronome(120, audio=WavSinkBackend(wav_path), tracer=BeatTracer(str(trace_path)))
+        metronome.play_tempo_map(TempoMap([section(1, MAX_BPM, beats=3)]))
+        metronome.beat_thread.join(timeout=2)
+        assert not metronome.is_running
+        assert len(decode_wav(wav_path)) > 0
+        assert trace_path.exists()
+        assert metronome.held_sounds == [] and not metronome.audio_open
+        metronome.stop()  # Nothing left to tear down
+
+#===============================================================
+# Shared Scheduler Tests
+#===============================================================
+
+class TestScheduler:
+    """Tests for the shared scheduler thread"""
+    
+    def test_tasks_run_in_deadline_order(self):
+        """Test that clicks of different tasks are interleaved by deadline"""
+        scheduler = Scheduler()
+        order = []
+        start_ns = time.monotonic_ns()
+        
+        def clicks(name, offsets_ms):
+            for offset in offsets_ms:
+                yield start_ns + offset * 1_000_000
+                order.append(name)
+        
+        scheduler.register("a", clicks("a", [20, 40]))
+        scheduler.register("b", clicks("b", [10, 30]))
+        time.sleep(0.1)
+        scheduler.shutdown()
+        assert order == ["b", "a", "b", "a"]
+        assert len(scheduler) == 0
+    
+    def test_metronomes_share_one_thread(self, mock_pygame, mock_path):
+        """Test that many metronomes play on the scheduler without threads of their own"""
+        scheduler = Scheduler()
+        beats = [[] for _ in range(3)]
+        metronomes = [Metronome(MAX_BPM, on_beat=beats[i].append, scheduling=SCHEDULE_ABSOLUTE,
+                                scheduler=scheduler) for i in range(3)]
+        for metronome in metronomes:
+            metronome.start()
+        time.sleep(0.2)
+        
+        assert all(metronome.beat_thread is None for metronome in metronomes)
+        assert all(beat_list[:2] == [1, 2] for beat_list in beats)
+        
+        for metronome in metronomes:
+            metronome.stop()
+        count = sum(len(beat_list) for beat_list in beats)
+        time.sleep(0.2)
+        assert sum(len(beat_list) for beat_list in beats) == count
+        assert len(scheduler) == 0
+        scheduler.shutdown()
+    
+    def test_scheduler_needs_absolute_scheduling(self, mock_pygame, mock_path):
+        """Test that relative scheduling cannot run on a shared scheduler"""
+        with pytest.raises(ValueError):
+            Metronome(120, scheduler=Scheduler())
+
+#===============================================================
+# Beat Event Ring Tests
+#===============================================================
+
+class TestEventRing:
+    """Tests for the bounded beat event ring"""
+    
+    def test_events_in_order(self):
+        """Test that a reader gets every event with sequence numbers and timestamps"""
+        ring = EventRing(8)
+        reader = ring.subscribe()
+        for beat in (1, 2, 3):
+            ring.publish(beat, SOUND_BEAT, 1000 * beat)
+        events = reader.poll()
+        assert [(event.seq, event.beat, event.deadline_ns) for event in events] == [(0, 1, 1000), (1, 2, 2000), (2, 3, 3000)]
+        assert all(event.time_ns > 0 for event in events)
+        assert reader.poll() == []
+    
+    def test_drop_oldest_counts_overwritten_events(self):
+        """Test that a stalled reader loses the oldest events, never the producer"""
+        ring = EventRing(4)
+        reader = ring.subscribe()
+        for beat in range(10):
+            assert ring.publish(beat, SOUND_BEAT, 0)
+        assert [event.beat for event in reader.poll()] == [6, 7, 8, 9]
+        assert reader.dropped == 6
+    
+    def test_drop_newest_keeps_unread_events(self):
+        """Test that the drop-newest policy discards new events while the ring is full"""
+        ring = EventRing(4, policy=DROP_NEWEST)
+        reader = ring.subscribe()
+        results = [ring.publish(beat, SOUND_BEAT, 0) for beat in range(6)]
+        assert results == [True] * 4 + [False] * 2
+        assert [event.beat for event in reader.poll()] == [0, 1, 2, 3]
+        assert ring.dropped == 2
+    
+    def test_metronome_drop_newest(self, mock_pygame, mock_path):
+        """Test that a metronome's ring options keep the oldest unread beats"""
+        clock = VirtualClock()
+        metronome = Metronome(60, beats_per_measure=3, scheduling=SCHEDULE_ABSOLUTE, clock=clock,
+                              event_ring_size=4, event_policy=DROP_NEWEST)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        clock.run_until(5_500_000_000)
+        metronome.stop()
+        
+        assert [event.deadline_ns for event in reader.poll()] == [0, 1_000_000_000, 2_000_000_000, 3_000_000_000]
+        assert metronome.events.dropped == 2
+        with pytest.raises(ValueError):
+            Metronome(60, event_ring_size=0)
+        with pytest.raises(ValueError):
+            PullEngine(60, samples=(None, None, None), event_policy="drop_everything")
+    
+    def test_slow_consumer_does_not_delay_beats(self, mock_pygame, mock_path):
+        """Test that a stalled dispatcher callback never blocks the audio thread"""
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE)
+        dispatcher = EventDispatcher(metronome.events, lambda events: time.sleep(1))
+        metronome.start()
+        time.sleep(0.3)
+        metronome.stop()
+        dispatcher.stop(wait=False)
+        # 400 BPM plays a beat every 150 ms whatever the consumer does
+        assert metronome.events.head >= 2
+    
+    def test_asyncio_consumer(self):
+        """Test that events reach an asyncio loop from another thread"""
+        import asyncio
+        ring = EventRing()
+        
+        async def consume():
+            events = iter_events(ring)
+            first = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0)
+            threading.Thread(target=ring.publish, args=(1, SOUND_BEAT, 0)).start()
+            return await asyncio.wait_for(first, 1)
+        
+        assert asyncio.run(consume()).beat == 1
+
+#===============================================================
+# Async API Tests
+#===============================================================
+
+class TestAsyncMetronome:
+    """Tests for the asyncio metronome API"""
+    
+    def test_beats_iterator(self, mock_pygame, mock_path):
+        """Test that beats() yields beats on time without starting a thread"""
+        import asyncio
+        
+        async def run():
+            metronome = AsyncMetronome(MAX_BPM, beats_per_measure=3)
+            threads = threading.active_count()
+            await metronome.start()
+            assert threading.active_count() == threads
+            events = []
+            async for event in metronome.beats():
+                events.append(event)
+                if len(events) == 4:
+                    await metronome.stop()
+            return events
+        
+        events = asyncio.run(asyncio.wait_for(run(), 2))
+        assert [event.beat for event in events] == [1, 2, 3, 1]
+        assert all(event.time_ns >= event.deadline_ns for event in events)
+        assert events[1].deadline_ns - events[0].deadline_ns == NS_PER_MINUTE // MAX_BPM
+    
+    def test_subdivision_events_and_tempo_change(self, mock_pygame, mock_path):
+        """Test that subdivisions are reported and update_bpm applies at the beat line"""
+        import asyncio
+        
+        async def run():
+            metronome = AsyncMetronome(300)
+            await metronome.set_rhythm_mode(EIGHTH_MODE)
+            await metronome.start()
+            events = []
+            async for event in metronome.beats():
+                events.append(event)
+                if len(events) == 2:
+                    await metronome.update_bpm(MAX_BPM)
+                if len(events) == 6:
+                    await metronome.stop()
+            return events
+        
+        events = asyncio.run(asyncio.wait_for(run(), 2))
+        assert [event.sound_id for event in events] == [SOUND_BEAT, SOUND_SUB] * 3
+        gaps = [b.deadline_ns - a.deadline_ns for a, b in zip(events, events[1:])]
+        assert gaps[0] == NS_PER_MINUTE // 600
+        assert gaps[-1] == NS_PER_MINUTE // 800
+    
+    def test_many_metronomes_on_one_loop(self, mock_pygame, mock_path):
+        """Test that one loop scheduler runs several metronomes"""
+        import asyncio
+        
+        async def run():
+            scheduler = LoopScheduler()
+            metronomes = [AsyncMetronome(MAX_BPM, scheduler=scheduler) for _ in range(3)]
+            for metronome in metronomes:
+                await metronome.start()
+            assert len(scheduler) == 3
+            await asyncio.sleep(0.2)
+            for metronome in metronomes:
+                await metronome.stop()
+            return scheduler, metronomes
+        
+        scheduler, metronomes = asyncio.run(run())
+        assert len(scheduler) == 0
+        assert all(metronome.metronome.events.head >= 2 for metronome in metronomes)
+
+#===============================================================
+# Interruptible Wait Tests
+#===============================================================
+
+class TestInterruptibleWaits:
+    """Tests for stop() and tempo changes cutting waits short"""
+    
+    @pytest.mark.parametrize("scheduling", ["relative", SCHEDULE_ABSOLUTE])
+    def test_stop_latency_at_min_bpm(self, mock_pygame, mock_path, scheduling):
+        """Test that stop() returns at once even in the middle of a 6 second beat"""
+        metronome = Metronome(MIN_BPM, scheduling=scheduling)
+        metronome.start()
+        time.sleep(0.1)
+        
+        # The wait itself ends at once; the 5 ms budget covers waking and
+        # joining the beat thread plus the mocked backend's teardown, whose
+        # scheduling jitter reaches a few ms on a busy test host
+        started = time.perf_counter()
+        metronome.stop()
+        assert time.perf_counter() - started < 0.005
+        assert not metronome.beat_thread.is_alive()
+    
+    def test_tempo_change_on_next_subdivision(self, mock_pygame, mock_path):
+        """Test that a tempo change can re-time the pending click"""
+        metronome = Metronome(MIN_BPM, scheduling=SCHEDULE_ABSOLUTE, apply_changes=APPLY_ON_SUBDIVISION)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        time.sleep(0.05)
+        metronome.update_bpm(MAX_BPM)
+        time.sleep(0.3)
+        metronome.stop()
+        
+        events = reader.poll()
+        assert len(events) >= 2
+        # The 6 s gap is stretched to the new tempo: 6 s * 10 / 400 = 150 ms
+        assert events[1].deadline_ns - events[0].deadline_ns == NS_PER_MINUTE // MIN_BPM * MIN_BPM // MAX_BPM
+    
+    def test_invalid_apply_mode(self, mock_pygame, mock_path):
+        """Test that unknown apply modes are rejected"""
+        with pytest.raises(ValueError):
+            Metronome(120, apply_changes="measure")
+
+#===============================================================
+# Settings Snapshot Tests
+#===============================================================
+
+class TestConfigSnapshots:
+    """Tests for quantized, atomic settings changes"""
+    
+    def test_changes_swap_one_snapshot(self, metronome):
+        """Test that each change publishes a new consistent snapshot"""
+        before = metronome.requested
+        metronome.update_bpm(90)
+        assert metronome.requested is not before
+        assert (metronome.requested.bpm, metronome.requested.interval) == (90, 60 / 90)
+        assert before.bpm == 120  # Old snapshots are never modified
+    
+    @pytest.mark.parametrize("beats", [0, -2, MAX_BEATS + 1, None])
+    def test_invalid_time_signature(self, metronome, beats):
+        """Test that meters outside 1..12 are refused and leave the snapshot alone"""
+        before = metronome.requested
+        with pytest.raises(ValueError, match="Time signature"):
+            metronome.set_time_signature(beats)
+        with pytest.raises(ValueError, match="Time signature"):
+            metronome.beats_per_measure = beats
+        assert metronome.requested is before
+    
+    def test_stopped_metronome_applies_at_once(self, metronome):
+        """Test that changes apply immediately while nothing is playing"""
+        metronome.current_beat = 3
+        metronome.set_time_signature(5)
+        metronome.set_rhythm_mode(TRIPLET_MODE)
+        assert metronome.config is metronome.requested
+        assert metronome.config.pattern is PATTERNS[TRIPLET_MODE]
+        assert metronome.current_beat == 1
+    
+    def test_change_at_the_bar_line(self, mock_pygame, mock_path):
+        """Test that APPLY_ON_BAR keeps the tempo until the measure ends"""
+        metronome = Metronome(MAX_BPM, beats_per_measure=2, scheduling=SCHEDULE_ABSOLUTE,
+                              apply_changes=APPLY_ON_BAR)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        time.sleep(0.05)
+        metronome.update_bpm(300)
+        time.sleep(0.6)
+        metronome.stop()
+        
+        events = reader.poll()
+        gaps = [b.deadline_ns - a.deadline_ns for a, b in zip(events, events[1:])]
+        # Beat 2 keeps 400 BPM, the next bar starts at 300 BPM
+        assert [event.beat for event in events[:3]] == [1, 2, 1]
+        assert gaps[:3] == [NS_PER_MINUTE // MAX_BPM, NS_PER_MINUTE // MAX_BPM, NS_PER_MINUTE // 300]
+
+#===============================================================
+# Timing Statistics Tests
+#===============================================================
+
+class TestTimingStats:
+    """Tests for per-click timing instrumentation"""
+    
+    def test_ring_keeps_the_last_clicks(self):
+        """Test that the ring wraps while drift and late count cover every click"""
+        stats = TimingStats(size=4, late_ms=1.0)
+        for jitter_ms in [5, 0, 0, 0, 0, 0]:
+            stats.record(0, jitter_ms * 1_000_000, grid_ns=0)
+        summary = stats.summary()
+        assert summary.clicks == 6
+        assert summary.max_ms == 0.0  # The late click was overwritten
+        assert summary.late == 1
+    
+    def test_percentiles_and_drift(self):
+        """Test jitter percentiles and the drift of the latest beat"""
+        stats = TimingStats(size=100)
+        for index in range(100):
+            stats.record(index, index + (index + 1) * 1_000_000)
+        stats.record(0, 3_000_000, grid_ns=1_000_000)
+        summary = stats.summary()
+        assert summary.p50_ms == 50.0
+        assert summary.p99_ms == 99.0
+        assert summary.max_ms == 100.0
+        assert summary.drift_ms == 2.0
+    
+    @pytest.mark.parametrize("scheduling", ["relative", SCHEDULE_ABSOLUTE])
+    def test_engine_records_every_click(self, mock_pygame, mock_path, scheduling):
+        """Test that both engines record beats and subdivisions"""
+        metronome = Metronome(MAX_BPM, scheduling=scheduling)
+        assert metronome.timing_summary() is None
+        metronome.set_rhythm_mode(EIGHTH_MODE)
+        metronome.start()
+        time.sleep(0.4)
+        metronome.stop()
+        
+        summary = metronome.timing_summary()
+        assert summary.clicks >= 4
+        assert summary.max_ms < 50
+        assert abs(summary.drift_ms) < 50
+    
+    def test_drift_rate_ignores_constant_offset(self):
+        """Test that only a growing offset counts as drift per hour"""
+        stats = TimingStats()
+        for beat in range(3):
+            stats.record(0, beat * 1_000_000_000 + 500_000, grid_ns=beat * 1_000_000_000)
+        assert stats.drift_per_hour_ms() == 0.0
+        stats.record(0, 3_000_000_000 + 1_500_000, grid_ns=3_000_000_000)
+        assert stats.drift_per_hour_ms() == pytest.approx(1200.0)  # 1 ms in 3 s
+    
+    def test_stats_command(self, metronome):
+        """Test the CLI output of the timing statistics"""
+        assert format_timing_stats(None) == CURRENT_LANG["NOT_RUNNING"]
+        assert format_timing_stats(metronome) == CURRENT_LANG["TIMING_EMPTY"]
+        metronome.timing.record(0, 1_500_000, grid_ns=0)
+        assert "p99 1.500 ms" in format_timing_stats(metronome)
+        assert "overruns" not in format_timing_stats(metronome)
+
+#===============================================================
+# Timing Sweep Tests
+#===============================================================
+
+class TestTimingSweep:
+    """Tests for the headless timing benchmark sweep"""
+    
+    def test_default_cases(self):
+        """Test that the sweep covers every tempo, mode and meter once"""
+        cases = sweep_cases()
+        assert {bpm for bpm, _, _ in cases} >= {MIN_BPM, MAX_BPM}
+        assert {mode for _, mode, _ in cases} == set(PATTERNS)
+        assert {meter for _, _, meter in cases} == set(range(1, 13))
+        assert len(cases) == len(set(cases))
+        assert len(sweep_cases(bpms=(60, 120), modes=(NORMAL_MODE,), meters=(3, 4), full=True)) == 4
+    
+    def test_sweep_results_are_json(self, mock_pygame, mock_path):
+        """Test that a small sweep reports every metric in JSON-ready form"""
+        import json
+        sweep = run_timing_sweep([(MAX_BPM, EIGHTH_MODE, 3)], seconds=0.3)
+        results = json.loads(json.dumps(sweep))["results"]
+        assert [result["scheduling"] for result in results] == ["relative", SCHEDULE_ABSOLUTE]
+        for result in results:
+            assert result["clicks"] >= 2
+            assert result["cpu_us_per_click"] > 0
+            assert {"p50_ms", "p99_ms", "max_ms", "drift_ms_per_hour", "wakeups_per_second"} <= set(result)
+
+#===============================================================
+# Virtual Clock Tests
+#===============================================================
+
+class TestVirtualClock:
+    """Tests for deterministic simulation on a virtual clock"""
+    
+    SECOND = 1_000_000_000
+    
+    @pytest.mark.parametrize("scheduling", ["relative", SCHEDULE_ABSOLUTE])
+    def test_exact_onsets_with_tempo_change(self, mock_pygame, mock_path, scheduling):
+        """Test that every click lands on its simulated deadline"""
+        clock = VirtualClock()
+        metronome = Metronome(120, beats_per_measure=3, scheduling=scheduling, clock=clock)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        clock.run_until(2 * self.SECOND)
+        metronome.update_bpm(60)  # Applies at the next beat line
+        clock.run_until(5 * self.SECOND)
+        metronome.stop()
+        
+        onsets = [(event.deadline_ns, event.beat) for event in reader.poll()]
+        assert onsets == [(0, 1), (500_000_000, 2), (1_000_000_000, 3), (1_500_000_000, 1),
+                          (2_000_000_000, 2), (2_500_000_000, 3), (3_500_000_000, 1), (4_500_000_000, 2)]
+    
+    def test_hours_in_milliseconds(self, mock_pygame, mock_path):
+        """Test that an hour of beats is simulated without waiting an hour"""
+        clock = VirtualClock()
+        beats = []
+        metronome = Metronome(MAX_BPM, clock=clock, on_beat=beats.append)
+        started = time.perf_counter()
+        metronome.start()
+        clock.advance(3600 * self.SECOND)
+        metronome.stop()
+        assert len(beats) == 3600 * MAX_BPM // 60 + 1
+        assert time.perf_counter() - started < 30
+    
+    def test_stop_and_restart(self, mock_pygame, mock_path):
+        """Test that a stop/start sequence continues from the simulated time"""
+        clock = VirtualClock()
+        metronome = Metronome(60, scheduling=SCHEDULE_ABSOLUTE, clock=clock)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        clock.run_until(1 * self.SECOND)
+        metronome.stop()
+        clock.advance(10 * self.SECOND)
+        metronome.start()
+        clock.advance(1 * self.SECOND)
+        metronome.stop()
+        assert [event.deadline_ns for event in reader.poll()] == [0, 1 * self.SECOND, 11 * self.SECOND, 12 * self.SECOND]
+    
+    def test_wake_latency_drift(self, mock_pygame, mock_path):
+        """Test that late wake-ups add up on the relative engine only"""
+        relative = simulate_session(120, 0.5, "relative", wake_latency_us=100)
+        absolute = simulate_session(120, 0.5, SCHEDULE_ABSOLUTE, wake_latency_us=100)
+        assert relative["drift_ms"] == pytest.approx(0.1 * 3599)  # Every beat after the first
+        assert absolute["drift_ms"] == pytest.approx(0.1)
+    
+    def test_real_time_modes_rejected(self, mock_pygame, mock_path):
+        """Test that sound card driven modes refuse a virtual clock"""
+        with pytest.raises(ValueError):
+            Metronome(120, scheduling=SCHEDULE_LOOKAHEAD, clock=VirtualClock())
+        with pytest.raises(ValueError):
+            Metronome(120, scheduling=SCHEDULE_ABSOLUTE, scheduler=Scheduler(), clock=VirtualClock())
+
+#===============================================================
+# Precision Wait Tests
+#===============================================================
+
+class TestPrecisionClock:
+    """Tests for the hybrid sleep/spin wait"""
+    
+    def test_waits_end_on_deadline(self):
+        """Test that waits return at their deadline and record the overshoot"""
+        clock = PrecisionClock(spin_us=2000, cpu_budget=1.0)
+        event = threading.Event()
+        for _ in range(20):
+            start_ns = time.monotonic_ns()
+            assert clock.wait(event, 3_000_000) is False
+            assert time.monotonic_ns() - start_ns >= 3_000_000
+        summary = clock.wait_summary()
+        assert summary.waits == 20
+        assert 0 <= summary.p50_us <= summary.max_us
+        assert summary.spin_ms > 0
+    
+    def test_cpu_budget_zero_never_spins(self):
+        """Test that a zero CPU budget falls back to plain sleeps"""
+        clock = PrecisionClock(spin_us=2000, cpu_budget=0.0)
+        clock.wait(threading.Event(), 1_000_000)
+        assert clock.wait_summary().spin_ms < 0.5  # Only the final time check
+    
+    def test_event_cuts_spin_short(self):
+        """Test that a set event ends the wait during the spin"""
+        clock = PrecisionClock(spin_us=200_000, cpu_budget=1.0)  # Spin the whole wait
+        event = threading.Event()
+        threading.Timer(0.02, event.set).start()
+        start = time.perf_counter()
+        assert clock.wait(event, 2_000_000_000) is True
+        assert time.perf_counter() - start < 1.0
+        assert clock.wait_summary() is None  # Interrupted waits are not timed
+    
+    def test_calibrated_default(self, mock_pygame, mock_path):
+        """Test that metronomes wait on a calibrated precision clock by default"""
+        spin_ns = calibrate_spin_ns()
+        assert 100_000 <= spin_ns <= 3_000_000
+        metronome = Metronome(120)
+        assert isinstance(metronome.clock, PrecisionClock)
+        assert metronome.clock.spin_ns == spin_ns
+
+#===============================================================
+# Timerfd Tests
+#===============================================================
+
+@pytest.mark.skipif(not timerfd_available(), reason="timerfd is Linux only")
+class TestTimerfd:
+    """Tests for the Linux timerfd clock and scheduler"""
+    
+    def test_missed_expirations_count_overruns(self):
+        """Test that a deadline 5.5 periods in the past reads as 6 expirations"""
+        timer = Timerfd()
+        assert timer.expirations() == 0  # Disarmed
+        timer.arm(time.monotonic_ns() - 5_500_000, 1_000_000)
+        assert timer.expirations() == 6
+        timer.close()
+    
+    def test_clock_waits_for_absolute_deadline(self):
+        """Test that waits end at their deadline, and interrupts end them early"""
+        clock = TimerfdClock()
+        event = threading.Event()
+        deadline_ns = time.monotonic_ns() + 5_000_000
+        assert clock.wait_until(event, deadline_ns) is False
+        assert time.monotonic_ns() >= deadline_ns
+        assert clock.waits == 1
+        
+        def interrupt():
+            event.set()
+            clock.interrupt()
+        threading.Timer(0.02, interrupt).start()
+        start = time.perf_counter()
+        assert clock.wait(event, 2_000_000_000) is True
+        assert time.perf_counter() - start < 1.0
+    
+    def test_metronome_on_timerfd_clock(self, mock_pygame, mock_path):
+        """Test that the beat loop plays on the timerfd clock"""
+        beats = []
+        metronome = Metronome(MAX_BPM, on_beat=beats.append, scheduling=SCHEDULE_ABSOLUTE, clock=TimerfdClock())
+        metronome.start()
+        time.sleep(0.2)
+        metronome.stop()
+        assert beats[:2] == [1, 2]
+    
+    def test_overruns_in_timing_stats(self, mock_pygame, mock_path):
+        """Test that a run's timer overruns reach timing_summary() and the stats command"""
+        clock = TimerfdClock()
+        clock.overruns = 10  # From an earlier run on the same clock
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE, clock=clock)
+        metronome.start()
+        time.sleep(0.05)
+        clock.overruns += 3
+        assert metronome.timing_summary().overruns >= 3
+        assert CURRENT_LANG["TIMING_OVERRUNS"].format(metronome.timing_summary().overruns) in \
+            format_timing_stats(metronome)
+        metronome.stop()
+        overruns = metronome.timing_summary().overruns
+        clock.overruns += 5  # After the run: not counted
+        assert metronome.timing_summary().overruns == overruns
+    
+    def test_scheduler_multiplexes_metronomes(self, mock_pygame, mock_path):
+        """Test that metronomes share one epoll thread, and stop playing once stopped"""
+        scheduler = TimerfdScheduler()
+        beats = [[] for _ in range(3)]
+        metronomes = [Metronome(MAX_BPM, on_beat=beats[i].append, scheduling=SCHEDULE_ABSOLUTE,
+                                scheduler=scheduler) for i in range(3)]
+        for metronome in metronomes:
+            metronome.start()
+        time.sleep(0.2)
+        assert all(metronome.beat_thread is None for metronome in metronomes)
+        assert all(beat_list[:2] == [1, 2] for beat_list in beats)
+        
+        for metronome in metronomes:
+            metronome.stop()
+        count = sum(len(beat_list) for beat_list in beats)
+        time.sleep(0.2)
+        assert sum(len(beat_list) for beat_list in beats) == count
+        assert len(scheduler) == 0
+        scheduler.shutdown()
+
+#===============================================================
+# Audio Backend Tests
+#===============================================================
+
+class TestAudioBackends:
+    """Tests for the pluggable audio backends"""
+    
+    SECOND = 1_000_000_000
+    
+    def test_null_backend_records_onsets(self, mock_path):
+        """Test that the null backend records each click with its channel and sound"""
+        clock = VirtualClock()
+        audio = NullBackend()
+        metronome = Metronome(120, beats_per_measure=2, clock=clock, audio=audio)
+        metronome.set_rhythm_mode(EIGHTH_MODE)
+        metronome.start()
+        clock.run_until(self.SECOND)
+        metronome.stop()
+        
+        assert audio.onsets == [
+            (0, 1, SOUND_FILE), (250_000_000, 2, SOUND_FILE_SUBDIVISION),
+            (500_000_000, 0, SOUND_FILE_UP), (750_000_000, 2, SOUND_FILE_SUBDIVISION),
+            (1_000_000_000, 1, SOUND_FILE),
+        ]
+    
+    @pytest.mark.parametrize("bpm", [120, 137])
+    def test_wav_sink_matches_offline_render(self, tmp_path, bpm):
+        """Test that the WAV sink writes every click on its exact sample"""
+        clock = VirtualClock()
+        path = str(tmp_path / "sink.wav")
+        metronome = Metronome(bpm, scheduling=SCHEDULE_ABSOLUTE, clock=clock, audio=WavSinkBackend(path))
+        metronome.set_rhythm_mode(TRIPLET_MODE)
+        metronome.start()
+        clock.run_until(4 * self.SECOND - 1)
+        metronome.stop()
+        
+        written = decode_wav(path)
+        expected = render_click_track(bpm, 4, TRIPLET_MODE, 4)
+        assert len(written) >= len(expected)
+        assert np.abs(written[:len(expected)] - expected).max() < 1e-3  # 16-bit rounding only
+    
+    def test_wav_sink_stop_and_start(self, tmp_path):
+        """Test that a restarted metronome reopens its WAV sink, which each stop finishes"""
+        clock = VirtualClock()
+        path = str(tmp_path / "sink.wav")
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE, clock=clock, audio=WavSinkBackend(path))
+        for _ in range(2):
+            metronome.start()
+            clock.advance(self.SECOND)
+            metronome.stop()
+            assert len(decode_wav(path)) >= RENDER_SAMPLE_RATE * 0.9
+    
+    def test_wav_sink_on_shared_scheduler(self, tmp_path, mock_path):
+        """Test that stopping a metronome on a shared scheduler finishes its WAV file"""
+        scheduler = Scheduler()
+        path = str(tmp_path / "shared.wav")
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE, scheduler=scheduler, audio=WavSinkBackend(path))
+        try:
+            metronome.start()
+            time.sleep(0.2)
+            metronome.stop()
+        finally:
+            scheduler.shutdown()
+        assert len(decode_wav(path)) > 0
+    
+    def test_fallback_without_audio_device(self, mock_pygame, mock_path, capsys):
+        """Test that a missing sound card leaves a working, silent metronome"""
+        mock_pygame.init.side_effect = pygame.error("no device")
+        metronome = Metronome(120)
+        assert CURRENT_LANG["PYMIXER_ERROR"] in capsys.readouterr().out
+        assert isinstance(metronome.audio, NullBackend)
+        assert metronome.sound is not None
+    
+    def test_streaming_modes_need_sound_card(self, mock_path):
+        """Test that lookahead scheduling refuses a backend without a sound card"""
+        with pytest.raises(ValueError, match=CURRENT_LANG["INVALID_BACKEND"]):
+            Metronome(120, scheduling=SCHEDULE_LOOKAHEAD, audio=NullBackend())
+
+#===============================================================
+# Audio Session Tests
+#===============================================================
+
+class TestAudioSession:
+    """Tests for the process-wide mixer session"""
+    
+    def test_mixer_opened_and_sounds_decoded_once(self, mock_pygame, mock_path):
+        """Test that metronomes after the first reuse the open mixer and decoded sounds"""
+        assert check_dependencies()
+        for bpm in (100, 120, 140):
+            metronome = Metronome(bpm)
+            metronome.start()
+            metronome.stop()
+        mock_pygame.init.assert_called_once()
+        mock_pygame.quit.assert_not_called()
+        assert mock_pygame.Sound.call_count == 3  # Accent, upbeat and subdivision
+    
+    def test_reopens_after_mixer_quit(self, mock_pygame):
+        """Test that a mixer shut down behind the session's back is opened again"""
+        session = AudioSession()
+        assert session.open()
+        first = session.acquire(SOUND_FILE)
+        mock_pygame.get_init.return_value = None  # Someone called pygame.mixer.quit()
+        assert session.open()
+        assert mock_pygame.init.call_count == 2
+        mock_pygame.Sound.return_value = MagicMock()
+        assert session.acquire(SOUND_FILE) is not first
+    
+    def test_restart_to_first_click(self):
+        """Test that a metronome started on an open session clicks almost at once"""
+        metronome = Metronome(120)  # Opens the session (headless dummy driver)
+        metronome.start()
+        metronome.stop()
+        
+        first_click = threading.Event()
+        restarted = time.perf_counter()
+        metronome = Metronome(140, on_beat=lambda beat: first_click.set(), scheduling=SCHEDULE_ABSOLUTE)
+        metronome.start()
+        assert first_click.wait(1.0)
+        restart_ms = (time.perf_counter() - restarted) * 1000
+        metronome.stop()
+        
+        assert isinstance(metronome.audio, PygameBackend)
+        assert restart_ms < 20  # No device open or WAV decoding on the way
+
+#===============================================================
+# Sound Cache Tests
+#===============================================================
+
+class TestSoundCache:
+    """Tests for the shared decoded sound cache and sound set swaps"""
+    
+    OLD_ACCENT = os.path.join(os.path.dirname(SOUND_FILE), "old_4c.wav")
+    
+    @pytest.fixture
+    def sized_sounds(self, mock_pygame):
+        """Decode every file into a distinct 100-byte mock sound"""
+        def decode(path):
+            sound = MagicMock()
+            sound.get_raw.return_value = bytes(100)
+            return sound
+        mock_pygame.Sound.side_effect = decode
+        return mock_pygame
+    
+    def test_shared_until_file_changes(self, sized_sounds, tmp_path):
+        """Test that a sound is decoded once, and again after the file changed"""
+        path = tmp_path / "click.wav"
+        path.write_bytes(b"RIFF")
+        cache = SoundCache()
+        first = cache.acquire(str(path))
+        assert cache.acquire(str(path)) is first
+        os.utime(path, ns=(0, 1_000_000_000))
+        assert cache.acquire(str(path)) is not first
+        assert sized_sounds.Sound.call_count == 2
+        with pytest.raises(FileNotFoundError):
+            cache.acquire(str(tmp_path / "missing.wav"))
+    
+    def test_lru_eviction_spares_held_sounds(self, sized_sounds):
+        """Test that only unheld sounds are evicted, least recently used first"""
+        cache = SoundCache(max_bytes=200)
+        accent = cache.acquire(SOUND_FILE)
+        upbeat = cache.acquire(SOUND_FILE_UP)
+        cache.release(upbeat)
+        cache.acquire(SOUND_FILE_SUBDIVISION)   # Over the cap: the unheld upbeat goes
+        assert len(cache) == 2 and cache.bytes == 200
+        assert cache.acquire(SOUND_FILE) is accent
+        
+        cache.acquire(self.OLD_ACCENT)          # Everything held: over the cap
+        assert len(cache) == 3 and cache.bytes == 300
+        cache.release(accent)
+        assert len(cache) == 3                  # Acquired twice, still held once
+        cache.release(accent)
+        assert len(cache) == 2 and cache.bytes == 200
+    
+    def test_sound_sets_share_the_cache(self, sized_sounds, mock_path):
+        """Test that metronomes reuse decoded sounds and release replaced sets"""
+        first = Metronome(120)
+        second = Metronome(90)
+        assert second.sound is first.sound
+        first.set_sounds(SoundSet(self.OLD_ACCENT, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION))
+        assert first.sound is not second.sound and first.sound_up is second.sound_up
+        assert sized_sounds.Sound.call_count == 4
+        cache = first.audio.session.sounds
+        held = [entry[2] for entry in cache.entries.values()]
+        assert sorted(held) == [1, 1, 2, 2]     # Default accent and old accent held once
+    
+    def test_stop_releases_sounds(self, sized_sounds, mock_path):
+        """Test that the holders go back to 0 after start and stop, restarts included"""
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE)
+        cache = metronome.audio.session.sounds
+        for _ in range(3):
+            metronome.start()
+            time.sleep(0.05)
+            metronome.stop()
+            assert [entry[2] for entry in cache.entries.values()] == [0, 0, 0]
+        assert metronome.sound is not None  # Still playable
+        
+        # A replaced set released by stop() is not released twice
+        other = Metronome(120)
+        metronome.set_sounds(SoundSet(self.OLD_ACCENT, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION))
+        metronome.stop()
+        assert sorted(entry[2] for entry in cache.entries.values()) == [0, 1, 1, 1]
+        other.stop()
+        assert sum(entry[2] for entry in cache.entries.values()) == 0
+    
+    def test_restart_holds_sounds_again(self, sized_sounds, mock_path):
+        """Test that a restarted metronome holds its sounds, so eviction cannot drop them"""
+        metronome = Metronome(MAX_BPM, scheduling=SCHEDULE_ABSOLUTE)
+        metronome.set_sounds(SoundSet(self.OLD_ACCENT, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION))
+        cache = metronome.audio.session.sounds
+        metronome.start()
+        metronome.stop()
+        metronome.start()
+        try:
+            assert sorted(entry[2] for entry in cache.entries.values()) == [0, 1, 1, 1]
+            cache.max_bytes = 0
+            with cache.lock:
+                cache._evict()
+            assert [entry[2] for entry in cache.entries.values()] == [1, 1, 1]
+            assert metronome.sound is cache.entries[cache.keys[id(metronome.sound)]][0]
+            assert metronome.sound_set.accent == self.OLD_ACCENT
+        finally:
+            metronome.stop()
+        assert sum(entry[2] for entry in cache.entries.values()) == 0
+    
+    def test_polymeter_releases_layer_sounds(self, sized_sounds, mock_path):
+        """Test that layer accents are released on stop and when reloaded"""
+        sized_sounds.get_num_channels.return_value = 8
+        metronome = PolymeterMetronome(120, [Layer(3, accent_file=self.OLD_ACCENT), Layer(4)])
+        cache = metronome.audio.session.sounds
+        metronome.load_sound()
+        assert sum(entry[2] for entry in cache.entries.values()) == 5  # 3 shared sounds and 2 accents
+        metronome.start()
+        time.sleep(0.05)
+        metronome.stop()
+        assert sum(entry[2] for entry in cache.entries.values()) == 0
+        metronome.start()
+        assert sum(entry[2] for entry in cache.entries.values()) == 5
+        metronome.stop()
+        assert sum(entry[2] for entry in cache.entries.values()) == 0
+    
+    def test_swap_at_next_beat(self, mock_path):
+        """Test that a running metronome switches sounds on the next beat"""
+        clock = VirtualClock()
+        audio = NullBackend()
+        metronome = Metronome(120, beats_per_measure=2, scheduling=SCHEDULE_ABSOLUTE, clock=clock, audio=audio)
+        metronome.set_rhythm_mode(EIGHTH_MODE)
+        metronome.start()
+        clock.run_until(600_000_000)
+        new_set = SoundSet(self.OLD_ACCENT, self.OLD_ACCENT, SOUND_FILE)
+        metronome.set_sounds(new_set)
+        assert metronome.sound_set == DEFAULT_SOUND_SET   # Not on a subdivision
+        clock.run_until(1_300_000_000)
+        metronome.stop()
+        
+        assert [sound for _, _, sound in audio.onsets] == [
+            SOUND_FILE, SOUND_FILE_SUBDIVISION, SOUND_FILE_UP, SOUND_FILE_SUBDIVISION,
+            self.OLD_ACCENT, SOUND_FILE,
+        ]
+        assert metronome.sound_set == new_set
+    
+    def test_missing_file_names_the_sound(self):
+        """Test that a missing file keeps the playing set and names the file"""
+        metronome = Metronome(120, audio=NullBackend())
+        with pytest.raises(FileNotFoundError, match="missing.wav"):
+            metronome.set_sounds(SoundSet(SOUND_FILE, "missing.wav", SOUND_FILE_SUBDIVISION))
+        assert metronome.sound_set == DEFAULT_SOUND_SET
+
+#===============================================================
+# Pull Engine Tests
+#===============================================================
+
+class TestPullEngine:
+    """Tests for the sample-clock engine that renders blocks on demand"""
+    
+    RATE = 48000
+    
+    def pull(self, engine, seconds, frames=1000):
+        """Pull blocks until `seconds` of stream are produced"""
+        while engine.frame < seconds * self.RATE:
+            engine.fill(np.empty((frames, 2), dtype=np.float32))
+    
+    @pytest.mark.parametrize("bpm,mode", [(120, TRIPLET_MODE), (137, SEPTUPLET_MODE), (333, SWING_MODE)])
+    def test_matches_offline_render(self, bpm, mode):
+        """Test that blocks of any size add up to the offline render"""
+        engine = PullEngine(bpm, rhythm_mode=mode)
+        sizes = [1000, 37, 4096, 1, 12345] * 10
+        stream = np.concatenate([engine.fill(np.empty((size, 2), dtype=np.float32)) for size in sizes])
+        assert np.array_equal(stream, render_click_track(bpm, 4, mode, len(stream) / self.RATE))
+    
+    def test_tempo_change_on_next_beat(self):
+        """Test that a change taken at a block boundary re-anchors the grid on the next beat"""
+        engine = PullEngine(120)
+        reader = engine.events.subscribe()
+        self.pull(engine, 0.25, frames=12000)
+        engine.update_bpm(60)
+        self.pull(engine, 3)
+        assert [event.deadline_ns for event in reader.poll()] == [0, 500_000_000, 1_500_000_000, 2_500_000_000]
+    
+    def test_tempo_change_on_next_click(self):
+        """Test that the pending click is re-timed when changes apply on the next subdivision"""
+        engine = PullEngine(120, apply_changes=APPLY_ON_SUBDIVISION)
+        reader = engine.events.subscribe()
+        self.pull(engine, 0.25, frames=12000)
+        engine.update_bpm(60)
+        self.pull(engine, 2.5)
+        assert [event.deadline_ns for event in reader.poll()] == [0, 1_000_000_000, 2_000_000_000]
+    
+    def test_mode_and_meter_changes(self):
+        """Test that a new mode starts at the next beat and a new meter on its first beat"""
+        beats = []
+        engine = PullEngine(120, beats_per_measure=3, on_beat=beats.append)
+        reader = engine.events.subscribe()
+        self.pull(engine, 0.25, frames=12000)
+        engine.set_rhythm_mode(EIGHTH_MODE)
+        engine.set_time_signature(2)
+        self.pull(engine, 2)
+        events = reader.poll()
+        assert [event.sound_id for event in events[:4]] == [SOUND_BEAT, SOUND_BEAT, SOUND_SUB, SOUND_BEAT]
+        assert beats == [1, 1, 2, 1]
+    
+    def test_invalid_time_signature(self):
+        """Test that the engine refuses meters outside 1..12 like a Metronome"""
+        engine = PullEngine(120)
+        for beats in (0, MAX_BEATS + 1):
+            with pytest.raises(ValueError, match="Time signature"):
+                engine.set_time_signature(beats)
+            with pytest.raises(ValueError, match="Time signature"):
+                PullEngine(120, beats_per_measure=beats, samples=engine.samples)
+        engine.set_time_signature(MAX_BEATS)
+        assert engine.requested.beats_per_measure == MAX_BEATS
+    
+    def test_stream_to_wav(self, tmp_path):
+        """Test that a stream written block by block is the same as the offline render"""
+        path = str(tmp_path / "pull.wav")
+        stream_to_wav(PullEngine(90), path, 3, frames=4000)
+        expected = render_click_track(90, 4, NORMAL_MODE, 3)
+        assert np.abs(decode_wav(path) - expected).max() < 1e-3  # 16-bit rounding only
+
+#===============================================================
+# Engine Process Tests
+#===============================================================
+
+class TestIsolatedEngine:
+    """Tests for the engine process and its shared-memory control"""
+    
+    def test_shared_ring_overwrite(self):
+        """Test that a reader gets the newest events after the ring wrapped"""
+        ring = SharedEventRing(size=4)
+        try:
+            for beat in range(1, 7):
+                ring.publish(beat, SOUND_BEAT, beat * 1000)
+            events, cursor = ring.read(0)
+            assert [(event.seq, event.beat, event.deadline_ns) for event in events] == [
+                (2, 3, 3000), (3, 4, 4000), (4, 5, 5000), (5, 6, 6000)]
+            assert cursor == 6
+            assert ring.read(cursor) == ([], 6)
+        finally:
+            ring.close(unlink=True)
+    
+    def test_control_block_between_processes(self):
+        """Test that settings and a timing summary survive the trip through shared memory"""
+        control = ControlBlock()
+        engine_side = ControlBlock(control.name)  # Attached like the engine process
+        try:
+            control.write(Config(140, 60 / 140, 3, SWING_MODE, PATTERNS[SWING_MODE]), running=True)
+            assert engine_side.read()[1:] == (140, 3, SWING_MODE, True)
+            
+            control.words[0] += 1  # Half-written settings are not read
+            assert engine_side.read() is None
+            
+            assert control.read_stats() is None  # Nothing played yet
+            timing = TimingStats()
+            timing.record(0, 1_500_000)
+            engine_side.write_stats(timing.summary())
+            assert control.read_stats() == timing.summary()
+        finally:
+            engine_side.close()
+            control.close(unlink=True)
+    
+    def test_engine_process(self, monkeypatch):
+        """Test playing, changing and stopping an engine in a child process"""
+        monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")  # Inherited by the child
+        beats = []
+        metronome = IsolatedMetronome(MAX_BPM, on_beat=beats.append, beats_per_measure=2)
+        reader = metronome.events.subscribe()
+        metronome.start()
+        try:
+            deadline = time.monotonic() + 30
+            while len(beats) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert beats[:3] == [1, 2, 1]
+            assert metronome.priority in ("normal", "nice", "realtime")
+            
+            metronome.set_time_signature(3)
+            assert metronome.set_rhythm_mode(EIGHTH_MODE) == EIGHTH_MODE
+            metronome.set_sounds(DEFAULT_SOUND_SET)
+            count = len(beats)
+            while len(beats) < count + 4 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert 3 in beats[count:]
+            assert metronome.timing_summary().clicks >= len(beats)
+        finally:
+            metronome.stop()
+        assert metronome.process is None and not metronome.is_running
+        assert [event.beat for event in reader.poll() if event.sound_id == SOUND_BEAT] == beats
+    
+    def test_settings_api(self):
+        """Test the Metronome settings API of a stopped isolated metronome"""
+        metronome = IsolatedMetronome(120)
+        metronome.bpm = 90
+        assert metronome.interval == 60 / 90
+        metronome.interval = 0.25
+        assert metronome.bpm == 240 and isinstance(metronome.bpm, int)
+        metronome.beats_per_measure = 3
+        metronome.rhythm_mode = TRIPLET_MODE
+        assert (metronome.beats_per_measure, metronome.rhythm_mode) == (3, TRIPLET_MODE)
+        assert metronome.get_subdivision_interval() == pytest.approx(0.25 / 3)
+        
+        with pytest.raises(ValueError):
+            metronome.rhythm_mode = "polka"
+        with pytest.raises(ValueError):
+            metronome.interval = 60 / (MAX_BPM + 10)
+        with pytest.raises(FileNotFoundError):
+            metronome.set_sounds(SoundSet("missing.wav", SOUND_FILE_UP, SOUND_FILE_SUBDIVISION))
+        metronome.set_sounds(DEFAULT_SOUND_SET)
+        assert metronome.sound_set == DEFAULT_SOUND_SET and not metronome.is_running
+    
+    def test_metronome_from_env(self, mock_pygame, mock_path, monkeypatch):
+        """Test that the environment variable chooses the engine placement"""
+        monkeypatch.delenv("METRONOMNOM_ISOLATE", raising=False)
+        assert isinstance(metronome_from_env(120), Metronome)
+        monkeypatch.setenv("METRONOMNOM_ISOLATE", "1")
+        isolated = metronome_from_env(120, beats_per_measure=3)
+        assert isinstance(isolated, IsolatedMetronome)
+        assert isolated.beats_per_measure == 3 and not isolated.is_running
+
+#===============================================================
+# Tracing Tests
+#===============================================================
+
+class TestTracing:
+    """Tests for the Chrome trace of the beat loop"""
+    
+    def test_chrome_trace_events(self):
+        """Test the conversion of spans to complete events in microseconds"""
+        tracer = BeatTracer(size=2)
+        tracer.span(PHASE_CALLBACK, 0, 1000)
+        tracer.span(PHASE_CALLBACK, 1000, 3000)
+        tracer.span(PHASE_SLEEP, 3000, 9000, overshoot_ns=500)
+        events = tracer.chrome_events()
+        assert [event["name"] for event in events] == [PHASE_CALLBACK, PHASE_SLEEP]  # Oldest dropped
+        assert (events[1]["ph"], events[1]["ts"], events[1]["dur"]) == ("X", 3.0, 6.0)
+        assert events[1]["args"] == {"overshoot_us": 0.5}
+    
+    @pytest.mark.parametrize("scheduling", ["relative", SCHEDULE_ABSOLUTE])
+    def test_trace_dumped_on_stop(self, mock_pygame, mock_path, tmp_path, scheduling):
+        """Test that a traced metronome writes every phase when it stops"""
+        import json
+        path = tmp_path / "trace.json"
+        metronome = Metronome(MAX_BPM, scheduling=scheduling, tracer=BeatTracer(str(path)))
+        metronome.set_rhythm_mode(EIGHTH_MODE)
+        metronome.start()
+        time.sleep(0.4)
+        metronome.stop()
+        
+        trace = json.loads(path.read_text())
+        names = {event["name"] for event in trace["traceEvents"]}
+        # On the absolute grid every wait is a sleep until the next click
+        expected = set(PHASES) - ({PHASE_SUBDIVISION_WAIT} if scheduling == SCHEDULE_ABSOLUTE else set())
+        assert names == expected
+    
+    def test_tracer_from_env(self, tmp_path):
+        """Test that tracing is off unless the environment names a file"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert tracer_from_env() is None
+        with patch.dict(os.environ, {"METRONOMNOM_TRACE": str(tmp_path / "t.json")}):
+            assert tracer_from_env().path == str(tmp_path / "t.json")
+
 #===============================================================
 # Input Validation Tests
 #===============================================================
@@ -293,12 +1877,22 @@ class TestCommandHandlers:
             # Start metronome
             metronome.start()
             
+            reader = metronome.events.subscribe()
+            
             # Change time signature
             result = handle_time_signature("3", metronome)
             assert result is True
             assert metronome.beats_per_measure == 3
-            assert metronome.current_beat == 1  # Reset to first beat
             mock_print.assert_called_with(CURRENT_LANG["TIME_SIG_CHANGE"].format(3, 4))
+            
+            # The change is applied at the next beat line, which starts a new measure
+            events = []
+            deadline = time.monotonic() + 2
+            while not events and time.monotonic() < deadline:
+                time.sleep(0.01)
+                events = reader.poll()
+            assert events[0].beat == 1  # Reset to first beat
+            assert metronome.config.beats_per_measure == 3
     
     def test_handle_time_signature_not_running(self):
         """Test time signature handling when metronome is not running"""
@@ -0,0 +1,454 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+import traceback
+import weakref
+from clock import SystemClock
+from constants import TIMERFD_OVERRUN_MS
+
+#=======================================================
+# Linux Timer File Descriptors
+#=======================================================
+#
+# A timerfd is a kernel timer that shows up as a readable file descriptor
+# when it expires. Armed with TFD_TIMER_ABSTIME it fires at an absolute
+# time on CLOCK_MONOTONIC, the clock of time.monotonic_ns(), so a sleeper
+# hands the kernel the click's deadline itself instead of a relative
+# timeout computed from a clock reading (which is already stale by the
+# time the sleep starts). Reading it returns the number of expirations
+# since the last read, so with a repeat interval it also tells how late
+# the reader was.
+#
+# Python 3.13 wraps the calls in the os module; older versions go
+# through libc with ctypes.
+
+CLOCK_MONOTONIC = getattr(time, "CLOCK_MONOTONIC", 1)
+TFD_TIMER_ABSTIME = getattr(os, "TFD_TIMER_ABSTIME", 1)
+TFD_NONBLOCK = getattr(os, "TFD_NONBLOCK", getattr(os, "O_NONBLOCK", 0o4000))
+TFD_CLOEXEC = getattr(os, "TFD_CLOEXEC", getattr(os, "O_CLOEXEC", 0o2000000))
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+
+def _load_libc():
+    """
+    Returns:
+        ctypes.CDLL: libc with the timerfd calls declared, or None if it has none
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.timerfd_create.argtypes = [ctypes.c_int, ctypes.c_int]
+        libc.timerfd_create.restype = ctypes.c_int
+        libc.timerfd_settime.argtypes = [ctypes.c_int, ctypes.c_int,
+                                         ctypes.POINTER(_Itimerspec), ctypes.POINTER(_Itimerspec)]
+        libc.timerfd_settime.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_libc = None if hasattr(os, "timerfd_create") else _load_libc()
+
+
+def timerfd_available():
+    """
+    Returns:
+        bool: True if this host has timerfds and eventfds (Linux)
+    """
+    return (hasattr(os, "timerfd_create") or _libc is not None) and hasattr(os, "eventfd")
+
+
+def _timespec(ns):
+    """
+    Args:
+        ns (int): Time in nanoseconds
+
+    Returns:
+        _Timespec: The same time as seconds and nanoseconds
+    """
+    seconds, nanoseconds = divmod(ns, 1_000_000_000)
+    return _Timespec(seconds, nanoseconds)
+
+
+class Timerfd:
+    """
+    A timer file descriptor on CLOCK_MONOTONIC, armed with absolute deadlines.
+    """
+
+    def __init__(self):
+        """
+        Create a disarmed, non-blocking timer.
+
+        Raises:
+            OSError: If the host has no timerfds
+        """
+        flags = TFD_NONBLOCK | TFD_CLOEXEC
+        if hasattr(os, "timerfd_create"):
+            self.fd = os.timerfd_create(CLOCK_MONOTONIC, flags=flags)
+        elif _libc is not None:
+            self.fd = _libc.timerfd_create(CLOCK_MONOTONIC, flags)
+            if self.fd < 0:
+                error = ctypes.get_errno()
+                raise OSError(error, os.strerror(error))
+        else:
+            raise OSError("timerfd is not available on this host")
+
+    def fileno(self):
+        """
+        Returns:
+            int: The file descriptor, for select and epoll
+        """
+        return self.fd
+
+    def arm(self, deadline_ns, interval_ns=0):
+        """
+        Make the timer expire at an absolute monotonic time, and then
+        every interval_ns until it is re-armed. A deadline in the past
+        expires at once.
+
+        Args:
+            deadline_ns (int): Monotonic deadline in nanoseconds (above 0)
+            interval_ns (int, optional): Repeat interval, defaults to 0 (once)
+        """
+        self._settime(max(deadline_ns, 1), interval_ns, TFD_TIMER_ABSTIME)
+
+    def disarm(self):
+        """Stop the timer."""
+        self._settime(0, 0, 0)
+
+    def _settime(self, initial_ns, interval_ns, flags):
+        """
+        Args:
+            initial_ns (int): First expiration, 0 disarms
+            interval_ns (int): Repeat interval, 0 for none
+            flags (int): 0 or TFD_TIMER_ABSTIME
+        """
+        if hasattr(os, "timerfd_settime_ns"):
+            os.timerfd_settime_ns(self.fd, flags=flags, initial=initial_ns, interval=interval_ns)
+            return
+        spec = _Itimerspec(_timespec(interval_ns), _timespec(initial_ns))
+        if _libc.timerfd_settime(self.fd, flags, ctypes.byref(spec), None) < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def expirations(self):
+        """
+        Consume the expirations since the last call.
+
+        Returns:
+            int: Number of expirations, 0 if the timer has not expired
+        """
+        try:
+            return int.from_bytes(os.read(self.fd, 8), sys.byteorder)
+        except BlockingIOError:
+            return 0
+
+    def close(self):
+        """Release the file descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _drain(fd):
+    """
+    Reset an eventfd used to wake a sleeper.
+
+    Args:
+        fd (int): Non-blocking eventfd
+    """
+    try:
+        os.eventfd_read(fd)
+    except BlockingIOError:
+        pass
+
+
+#=======================================================
+# Timerfd Clock
+#=======================================================
+
+class TimerfdClock(SystemClock):
+    """
+    Clock whose waits sleep on a timerfd armed with the absolute deadline.
+
+    Each sleeping thread gets its own timer and its own eventfd, which
+    interrupt() writes to, and sleeps in select on both. The wait is
+    exact to the kernel's timer resolution and never drifts with the
+    time spent between computing a timeout and starting to sleep.
+
+    Every timer also repeats every overrun_ms after its deadline. When
+    a sleeper is late by one or more of those periods, the kernel counts
+    the missed expirations; they are summed in `overruns`, a number that
+    can be logged to spot a starved engine thread.
+    """
+
+    def __init__(self, overrun_ms=TIMERFD_OVERRUN_MS):
+        """
+        Args:
+            overrun_ms (float, optional): Lateness counted as one overrun,
+                defaults to TIMERFD_OVERRUN_MS
+
+        Raises:
+            OSError: If the host has no timerfds
+        """
+        if not timerfd_available():
+            raise OSError("timerfd is not available on this host")
+        self.overrun_ns = int(overrun_ms * 1_000_000)
+        self.waits = 0         # Waits that ran to their deadline
+        self.overruns = 0      # Overrun periods they woke late, counted by the kernel
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wakeups = set()  # eventfds of the sleeping threads
+
+    def _sleeper(self):
+        """
+        Get the timer and wakeup eventfd of the calling thread, created on
+        its first wait and closed when the thread is gone.
+
+        Returns:
+            tuple: (Timerfd, eventfd)
+        """
+        sleeper = getattr(self._local, "sleeper", None)
+        if sleeper is None:
+            sleeper = (Timerfd(), os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC))
+            with self._lock:
+                self._wakeups.add(sleeper[1])
+            self._local.sleeper = sleeper
+            weakref.finalize(threading.current_thread(), self._release, sleeper)
+        return sleeper
+
+    def _release(self, sleeper):
+        """
+        Args:
+            sleeper (tuple): (Timerfd, eventfd) of a finished thread
+        """
+        timer, wakeup = sleeper
+        with self._lock:
+            self._wakeups.discard(wakeup)
+        timer.close()
+        os.close(wakeup)
+
+    def wait(self, event, timeout_ns):
+        """
+        Sleep until an event is set or a timeout passes.
+
+        Args:
+            event (threading.Event): Event that cuts the sleep short
+            timeout_ns (int): Longest sleep in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        return self.wait_until(event, time.monotonic_ns() + timeout_ns)
+
+    def wait_until(self, event, deadline_ns):
+        """
+        Sleep on the calling thread's timerfd until an event is set or an
+        absolute deadline passes.
+
+        Args:
+            event (threading.Event): Event that cuts the sleep short
+            deadline_ns (int): Monotonic deadline in nanoseconds
+
+        Returns:
+            bool: True if the event was set
+        """
+        timer, wakeup = self._sleeper()
+        timer.arm(deadline_ns, self.overrun_ns)
+        try:
+            while not event.is_set():
+                readable, _, _ = select.select([timer.fd, wakeup], [], [])
+                if wakeup in readable:
+                    _drain(wakeup)  # Look at the event again
+                if timer.fd in readable:
+                    expirations = timer.expirations()
+                    if expirations:
+                        self.waits += 1
+                        self.overruns += expirations - 1
+                        return event.is_set()
+            return True
+        finally:
+            timer.disarm()
+
+    def interrupt(self):
+        """Wake every sleeper so it notices an event set by another thread."""
+        with self._lock:
+            for wakeup in self._wakeups:
+                os.eventfd_write(wakeup, 1)
+
+
+#=======================================================
+# Timerfd Scheduler
+#=======================================================
+
+class TimerfdScheduler:
+    """
+    One thread servicing any number of metronomes, each on its own timerfd.
+
+    Works like Scheduler (same register/unregister/shutdown), but instead
+    of keeping a heap of deadlines and sleeping until the earliest one,
+    every task gets a timer armed at the absolute deadline of its next
+    click and the thread waits in epoll on all of them. The kernel wakes
+    it on the timers that expired, and counts how many overrun periods
+    late each click was served (`overruns`).
+    """
+
+    def __init__(self, name="metronome-timerfd", overrun_ms=TIMERFD_OVERRUN_MS):
+        """
+        Initialize an idle scheduler. The thread starts with the first task.
+
+        Args:
+            name (str, optional): Name of the scheduler thread
+            overrun_ms (float, optional): Lateness counted as one overrun,
+                defaults to TIMERFD_OVERRUN_MS
+
+        Raises:
+            OSError: If the host has no timerfds
+        """
+        if not timerfd_available():
+            raise OSError("timerfd is not available on this host")
+        self.name = name
+        self.overrun_ns = int(overrun_ms * 1_000_000)
+        self.overruns = 0                 # Overrun periods clicks were served late
+        self._tasks = {}                  # key -> (clicks generator, Timerfd)
+        self._timers = {}                 # timer fd -> key
+        self._epoll = select.epoll()
+        self._wakeup = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)  # Written by shutdown()
+        self._epoll.register(self._wakeup, select.EPOLLIN)
+        self._condition = threading.Condition()
+        self._current = None              # Key of the task being resumed right now
+        self._thread = None
+        self._running = False
+
+    def __len__(self):
+        """int: Number of registered tasks."""
+        return len(self._tasks)
+
+    #-----------------------------------------------------
+    # Task Registration
+    #-----------------------------------------------------
+
+    def register(self, key, clicks):
+        """
+        Add a click generator to the scheduler.
+
+        Args:
+            key (object): Identifies the task (usually its Metronome)
+            clicks (generator): Yields the deadline of each click in nanoseconds
+        """
+        deadline_ns = next(clicks, None)
+        if deadline_ns is None:
+            return
+
+        timer = Timerfd()
+        timer.arm(deadline_ns, self.overrun_ns)
+        with self._condition:
+            self._tasks[key] = (clicks, timer)
+            self._timers[timer.fd] = key
+            self._epoll.register(timer.fd, select.EPOLLIN)
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _drop(self, key):
+        """
+        Forget a task and close its timer. Called with the condition held.
+
+        Args:
+            key (object): The key the task was registered with
+        """
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            _, timer = task
+            del self._timers[timer.fd]
+            self._epoll.unregister(timer.fd)
+            timer.close()
+
+    def unregister(self, key):
+        """
+        Remove a task. Once this returns, the task will not play again.
+
+        If the task is being resumed right now, this waits for that click
+        to finish (unless called from the scheduler thread itself).
+
+        Args:
+            key (object): The key the task was registered with
+        """
+        with self._condition:
+            self._drop(key)
+            if threading.current_thread() is not self._thread:
+                while self._current is key:
+                    self._condition.wait()
+            self._condition.notify_all()
+
+    def shutdown(self):
+        """
+        Remove every task and stop the scheduler thread.
+        """
+        with self._condition:
+            for key in list(self._tasks):
+                self._drop(key)
+            self._running = False
+            os.eventfd_write(self._wakeup, 1)
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    #-----------------------------------------------------
+    # Scheduler Thread
+    #-----------------------------------------------------
+
+    def _run(self):
+        """
+        Scheduler loop: wait for expired timers, then resume their tasks.
+        """
+        while True:
+            events = self._epoll.poll()
+            for fd, _ in events:
+                if fd == self._wakeup:
+                    _drain(self._wakeup)
+                with self._condition:
+                    if not self._running:
+                        return
+                    # The task may have been dropped since the poll, and its
+                    # fd reused by a new timer that has not expired yet
+                    key = self._timers.get(fd)
+                    if key is None:
+                        continue
+                    clicks, timer = self._tasks[key]
+                    expirations = timer.expirations()
+                    if not expirations:
+                        continue
+                    self.overruns += expirations - 1
+                    self._current = key
+
+                # Play the click outside the lock and get the task's next deadline.
+                # A failing task is dropped without taking the others down.
+                try:
+                    deadline_ns = next(clicks, None)
+                except Exception:
+                    traceback.print_exc()
+                    deadline_ns = None
+
+                with self._condition:
+                    self._current = None
+                    task = self._tasks.get(key)
+                    if task is not None and task[0] is clicks:
+                        if deadline_ns is None:
+                            self._drop(key)  # Task finished by itself
+                        else:
+                            timer.arm(deadline_ns, self.overrun_ns)
+                    self._condition.notify_all()
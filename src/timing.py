@@ -0,0 +1,150 @@
+from array import array
+from collections import namedtuple
+from constants import TIMING_RING_SIZE, LATE_CLICK_MS
+
+# Summary of the recorded clicks. Jitter is how late Channel.play was
+# called after the click's deadline; everything is in milliseconds.
+# Overruns are the late wake-ups counted by a timerfd clock or scheduler.
+TimingSummary = namedtuple(
+    "TimingSummary",
+    ["clicks", "p50_ms", "p99_ms", "max_ms", "drift_ms", "late", "overshoot_ms", "callback_ms", "overruns"],
+    defaults=(0,)
+)
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a sorted sequence.
+
+    Args:
+        values (list): Sorted values (must not be empty)
+        fraction (float): Percentile as a fraction, e.g. 0.99
+
+    Returns:
+        The value at that rank
+    """
+    index = min(len(values) - 1, max(0, int(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class TimingStats:
+    """
+    Per-click timing record of a metronome's audio thread.
+
+    For each click it keeps the scheduled deadline, the time Channel.play
+    was called, how far the sleep overshot its deadline and how long
+    on_beat took. The four columns are preallocated integer arrays used
+    as a ring, so recording a click never allocates. Only the last
+    `size` clicks are kept for the percentiles, while the drift and the
+    late count cover the whole run.
+
+    The drift is how far the latest beat is from where a perfect
+    metronome started at the same time would have played it.
+
+    Percentiles are computed on demand by the reader (the CLI or the UI),
+    never on the audio thread.
+    """
+
+    def __init__(self, size=TIMING_RING_SIZE, late_ms=LATE_CLICK_MS):
+        """
+        Initialize an empty record.
+
+        Args:
+            size (int, optional): Clicks kept for percentiles, defaults to TIMING_RING_SIZE
+            late_ms (float, optional): Jitter above which a click counts as late,
+                defaults to LATE_CLICK_MS
+        """
+        self.size = size
+        self.late_ns = int(late_ms * 1_000_000)
+        self.deadline_ns = array("q", bytes(8 * size))   # Scheduled time
+        self.play_ns = array("q", bytes(8 * size))       # Channel.play call time
+        self.overshoot_ns = array("q", bytes(8 * size))  # Sleep overshoot
+        self.callback_ns = array("q", bytes(8 * size))   # Time spent in on_beat
+        self.reset()
+
+    def reset(self):
+        """
+        Forget every recorded click (called when playback starts).
+        """
+        self.count = 0     # Clicks recorded since the reset
+        self.drift_ns = 0  # Offset of the latest beat from the ideal grid
+        self.late = 0      # Clicks later than late_ns
+        self.first_beat = None  # (grid_ns, drift_ns) of the first beat
+        self.last_grid_ns = 0   # Grid time of the latest beat
+        self.overruns = 0       # Timer overruns, set by the metronome
+
+    def record(self, deadline_ns, play_ns, overshoot_ns=0, callback_ns=0, grid_ns=None):
+        """
+        Record one click (called from the audio thread).
+
+        Args:
+            deadline_ns (int): Scheduled monotonic time of the click
+            play_ns (int): Monotonic time Channel.play was called
+            overshoot_ns (int, optional): How late the sleep before it woke up
+            callback_ns (int, optional): Time spent in on_beat before playing
+            grid_ns (int, optional): Time of a beat on an ideal grid anchored at
+                the first beat. Given for beats only, it updates the drift.
+                On an absolute grid it is the deadline itself; relative
+                scheduling measures each beat from the previous one, so
+                its deadlines drift away from this grid.
+        """
+        slot = self.count % self.size
+        self.deadline_ns[slot] = deadline_ns
+        self.play_ns[slot] = play_ns
+        self.overshoot_ns[slot] = overshoot_ns
+        self.callback_ns[slot] = callback_ns
+
+        jitter_ns = play_ns - deadline_ns
+        if jitter_ns > self.late_ns:
+            self.late += 1
+        if grid_ns is not None:
+            self.drift_ns = play_ns - grid_ns
+            self.last_grid_ns = grid_ns
+            if self.first_beat is None:
+                self.first_beat = (grid_ns, self.drift_ns)
+        self.count += 1
+
+    def drift_per_hour_ms(self):
+        """
+        Extrapolate the drift to one hour of playing.
+        
+        The rate is the change of the drift from the first beat to the
+        latest one, so a constant offset (like the latency of every click
+        on an absolute grid) does not count as drift.
+        
+        Returns:
+            float: Drift in milliseconds per hour, 0.0 before the second beat
+        """
+        if self.first_beat is None or self.last_grid_ns == self.first_beat[0]:
+            return 0.0
+        grid_ns, drift_ns = self.first_beat
+        return (self.drift_ns - drift_ns) * 3600 / (self.last_grid_ns - grid_ns) * 1000
+
+    def summary(self):
+        """
+        Summarize the recorded clicks.
+
+        Returns:
+            TimingSummary: Jitter p50/p99/max, drift, late count, and the
+                worst sleep overshoot and on_beat time and the timer overruns,
+                or None if no click was recorded yet
+        """
+        count = min(self.count, self.size)
+        if count == 0:
+            return None
+
+        # Copy the columns first; the audio thread keeps writing meanwhile
+        jitter = sorted(play - deadline for play, deadline in zip(self.play_ns[:count], self.deadline_ns[:count]))
+        overshoot = max(self.overshoot_ns[:count])
+        callback = max(self.callback_ns[:count])
+        return TimingSummary(
+            clicks=self.count,
+            p50_ms=percentile(jitter, 0.50) / 1_000_000,
+            p99_ms=percentile(jitter, 0.99) / 1_000_000,
+            max_ms=jitter[-1] / 1_000_000,
+            drift_ms=self.drift_ns / 1_000_000,
+            late=self.late,
+            overshoot_ms=overshoot / 1_000_000,
+            callback_ms=callback / 1_000_000,
+            overruns=self.overruns,
+        )
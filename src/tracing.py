@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+from array import array
+from constants import TRACE_BUFFER_SIZE, TRACE_ENV
+
+#-------------------------------------------------------
+# Phases of one iteration of the beat loop
+#-------------------------------------------------------
+PHASE_CALLBACK = "callback"            # Publishing the beat and on_beat
+PHASE_MAIN_BEAT = "main_beat"          # Channel.play of the beat
+PHASE_SUBDIVISION_WAIT = "subdivision_wait"  # Sleeping until a subdivision
+PHASE_SUBDIVISION = "subdivision"      # Channel.play of a subdivision
+PHASE_INCREMENT = "increment"          # Moving to the next beat
+PHASE_SLEEP = "sleep"                  # Sleeping until the next beat
+PHASES = (PHASE_CALLBACK, PHASE_MAIN_BEAT, PHASE_SUBDIVISION_WAIT,
+          PHASE_SUBDIVISION, PHASE_INCREMENT, PHASE_SLEEP)
+PHASE_IDS = {phase: index for index, phase in enumerate(PHASES)}
+
+
+class BeatTracer:
+    """
+    Opt-in recorder of the phases of the beat loop.
+
+    Every span is a phase id, its start and end on the monotonic
+    nanosecond clock, the native id of the recording thread and, for
+    waits, how far the wake-up overshot the deadline. The columns are
+    preallocated arrays used as a ring, so tracing allocates nothing
+    while the metronome plays and keeps the latest `size` spans.
+
+    dump() writes the spans as Chrome Trace Event JSON, which opens in
+    chrome://tracing or Perfetto. Long callbacks, late wake-ups after a
+    sleep and gaps between phases (another thread holding the GIL) are
+    then easy to tell apart.
+    """
+
+    def __init__(self, path=None, size=TRACE_BUFFER_SIZE):
+        """
+        Initialize an empty trace.
+
+        Args:
+            path (str, optional): File the trace is written to when the
+                metronome stops, defaults to None (keep it in memory)
+            size (int, optional): Spans kept, defaults to TRACE_BUFFER_SIZE
+        """
+        self.path = path
+        self.size = size
+        self.count = 0
+        self.phases = array("B", bytes(size))
+        self.start_ns = array("q", bytes(8 * size))
+        self.end_ns = array("q", bytes(8 * size))
+        self.thread_ids = array("q", bytes(8 * size))
+        self.overshoot_ns = array("q", bytes(8 * size))
+
+    def span(self, phase, start_ns, end_ns, overshoot_ns=0):
+        """
+        Record one phase (called from the audio thread).
+
+        Args:
+            phase (str): One of PHASES
+            start_ns (int): Monotonic start of the phase
+            end_ns (int): Monotonic end of the phase
+            overshoot_ns (int, optional): How late a wait woke up
+        """
+        slot = self.count % self.size
+        self.phases[slot] = PHASE_IDS[phase]
+        self.start_ns[slot] = start_ns
+        self.end_ns[slot] = end_ns
+        self.thread_ids[slot] = threading.get_native_id()
+        self.overshoot_ns[slot] = overshoot_ns
+        self.count += 1
+
+    def chrome_events(self):
+        """
+        Convert the recorded spans to Chrome trace events, oldest first.
+
+        Returns:
+            list: Complete ("X") events with microsecond timestamps
+        """
+        first = max(0, self.count - self.size)
+        pid = os.getpid()
+        events = []
+        for index in range(first, self.count):
+            slot = index % self.size
+            event = {
+                "name": PHASES[self.phases[slot]],
+                "ph": "X",
+                "ts": self.start_ns[slot] / 1000,
+                "dur": (self.end_ns[slot] - self.start_ns[slot]) / 1000,
+                "pid": pid,
+                "tid": self.thread_ids[slot],
+            }
+            if self.overshoot_ns[slot]:
+                event["args"] = {"overshoot_us": self.overshoot_ns[slot] / 1000}
+            events.append(event)
+        return events
+
+    def dump(self, path=None):
+        """
+        Write the trace as Chrome Trace Event JSON.
+
+        Args:
+            path (str, optional): Output file, defaults to the tracer's path
+
+        Returns:
+            str: The file written, or None if there is no path
+        """
+        path = path or self.path
+        if not path:
+            return None
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ns"}, file)
+        return path
+
+
+def tracer_from_env():
+    """
+    Create a tracer if the METRONOMNOM_TRACE environment variable names a file.
+
+    Returns:
+        BeatTracer: A tracer writing to that file, or None
+    """
+    path = os.environ.get(TRACE_ENV)
+    return BeatTracer(path) if path else None
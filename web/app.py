@@ -1,10 +1,112 @@
-from flask import Flask, render_template
+import hashlib
+import sys
+from pathlib import Path
+from flask import Flask, render_template, request, Response, send_file
+
+# The click track renderer lives with the Python engine in src/
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from constants import (
+    MIN_BPM,
+    MAX_BPM,
+    MIN_BEATS,
+    MAX_BEATS,
+    MAX_TRACK_SECONDS,
+    STREAM_CACHE_BLOCKS,
+    RENDER_SAMPLE_RATE,
+    PATTERNS_FILE,
+    CURRENT_LANG
+)
+from metronome import NORMAL_MODE
+from patterns import PATTERNS
+from render import BlockCache, iter_click_track, sample_files_version, WAV_HEADER_SIZE, FRAME_SIZE
 
 app = Flask(__name__)
 
+# Rendered blocks are shared by every request with the same settings
+block_cache = BlockCache(STREAM_CACHE_BLOCKS)
+
 @app.route("/")
 def index():
     return render_template("index.html")
 
+@app.route("/patterns.json")
+def patterns():
+    """Serve the rhythm pattern table shared with the Python engine."""
+    return send_file(PATTERNS_FILE, mimetype="application/json")
+
+def parse_click_track_args(args):
+    """
+    Read and validate click track settings from query parameters.
+
+    Args:
+        args (MultiDict): The request's query parameters
+
+    Returns:
+        tuple: (bpm, beats, mode, length) settings
+
+    Raises:
+        ValueError: With a user-facing message if a setting is invalid
+    """
+    try:
+        bpm = int(args.get("bpm", 120))
+        beats = int(args.get("beats", 4))
+        length = int(args.get("length", 60))
+    except ValueError:
+        raise ValueError(CURRENT_LANG["COMMAND_ERROR"])
+    mode = args.get("mode", NORMAL_MODE)
+
+    if not MIN_BPM <= bpm <= MAX_BPM:
+        raise ValueError(CURRENT_LANG["INVALID_BPM_MSG"])
+    if not MIN_BEATS <= beats <= MAX_BEATS:
+        raise ValueError(CURRENT_LANG["INVALID_TIME_SIG"])
+    if mode not in PATTERNS:
+        raise ValueError(CURRENT_LANG["INVALID_MODE"])
+    if not 1 <= length <= MAX_TRACK_SECONDS:
+        raise ValueError(CURRENT_LANG["INVALID_TRACK_LENGTH"])
+    return bpm, beats, mode, length
+
+@app.route("/click-track.wav")
+def click_track():
+    """
+    Stream a rendered click track as a WAV file.
+
+    Query parameters: bpm, beats (time signature), mode and length in
+    seconds. The file is generated block by block and supports ETag
+    revalidation and single byte-range requests. The ETag covers the
+    settings and the version of the sound files.
+    """
+    try:
+        bpm, beats, mode, length = parse_click_track_args(request.args)
+    except ValueError as error:
+        return str(error), 400
+
+    total = WAV_HEADER_SIZE + length * RENDER_SAMPLE_RATE * FRAME_SIZE
+    version = "-".join(str(mtime_ns) for mtime_ns in sample_files_version())
+    settings = f"{bpm}-{beats}-{mode}-{length}-{RENDER_SAMPLE_RATE}-{version}"
+    etag = hashlib.sha1(settings.encode()).hexdigest()
+
+    # Same settings and sound files always render the same bytes
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+
+    headers = {"Accept-Ranges": "bytes", "ETag": f'"{etag}"'}
+    status = 200
+    start, end = 0, total
+
+    # Serve a single byte range; multiple ranges get the whole file
+    if request.range and request.range.units == "bytes":
+        byte_range = request.range.range_for_length(total)
+        if byte_range is None and len(request.range.ranges) == 1:
+            return Response(status=416, headers={"Content-Range": f"bytes */{total}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{total}"
+
+    headers["Content-Length"] = str(end - start)
+    body = iter_click_track(block_cache, bpm, beats, mode, length, start, end)
+    return Response(body, status=status, mimetype="audio/wav", headers=headers, direct_passthrough=True)
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
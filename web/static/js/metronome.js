@@ -50,6 +50,7 @@ let minTapsRequired = 2;
 let activeNotifications = 0;
 let audioContext = null;
 let audioBuffers = {};
+let patterns = {};
 
 function showNotification(message, type = 'info', duration = 3000) {
     const container = document.getElementById('notification-container');
@@ -93,10 +94,29 @@ function showNotification(message, type = 'info', duration = 3000) {
     }
 }
 
+function parseOffset(offset) {
+    const [numerator, denominator = '1'] = offset.split('/');
+    return parseInt(numerator) / parseInt(denominator);
+}
+
+function loadPatterns() {
+    return fetch('patterns.json')
+        .then(response => response.json())
+        .then(definitions => {
+            for (const [mode, definition] of Object.entries(definitions)) {
+                patterns[mode] = {
+                    offsets: definition.offsets.map(parseOffset),
+                    sounds: definition.sounds
+                };
+            }
+        });
+}
+
 function initializeAudio() {
     if (!audioContext) audioContext = new (window.AudioContext || window.webkitAudioContext)();
     if (audioLoaded) return Promise.resolve();
     return Promise.all([
+        loadPatterns(),
         loadAudio("static/sounds/4c.wav"),
         loadAudio("static/sounds/4d.wav"),
         loadAudio("static/sounds/tripl.wav")
@@ -155,13 +175,8 @@ function updateUI(running) {
     }
 }
 
-function getSubdivisionCount() {
-    switch (rhythmMode) {
-        case 'eighth': return 2;
-        case 'triplet': return 3;
-        case 'sixteenth': return 4;
-        default: return 1;
-    }
+function getPattern() {
+    return patterns[rhythmMode] || { offsets: [0], sounds: ['beat'] };
 }
 
 function nextNote() {
@@ -177,35 +192,25 @@ function scheduleNote(beatNumber, time) {
         time: time
     });
     
-    const subdivisions = getSubdivisionCount();
-    
-    if (subdivisions === 1) {
-        const source = audioContext.createBufferSource();
-        source.buffer = (beatNumber === 1) ? 
-            audioBuffers["static/sounds/4c.wav"] : 
-            audioBuffers["static/sounds/4d.wav"];
-        source.connect(audioContext.destination);
-        source.start(time);
-        return;
-    }
-    
+    const pattern = getPattern();
     const beatDuration = 60.0 / bpm;
-    const subdivisionDuration = beatDuration / subdivisions;
     
-    for (let i = 0; i < subdivisions; i++) {
-        const subdivisionTime = time + (i * subdivisionDuration);
+    for (let i = 0; i < pattern.offsets.length; i++) {
         const source = audioContext.createBufferSource();
+        const sound = pattern.sounds[i];
         
-        if (i === 0) {
+        if (sound === 'beat') {
             source.buffer = (beatNumber === 1) ? 
                 audioBuffers["static/sounds/4c.wav"] : 
                 audioBuffers["static/sounds/4d.wav"];
+        } else if (sound === 'group') {
+            source.buffer = audioBuffers["static/sounds/4d.wav"];
         } else {
             source.buffer = audioBuffers["static/sounds/tripl.wav"];
         }
         
         source.connect(audioContext.destination);
-        source.start(subdivisionTime);
+        source.start(time + pattern.offsets[i] * beatDuration);
     }
 }
 